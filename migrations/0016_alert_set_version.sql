@@ -0,0 +1,51 @@
+-- Version counter for the alert set read by alert-processor.
+-- Bumped by triggers whenever alerts or the email consent that filters them change,
+-- so warm processor instances can cheaply check whether their cached alerts are stale.
+CREATE TABLE IF NOT EXISTS public.alert_set_version (
+    id integer PRIMARY KEY DEFAULT 1,
+    version bigint DEFAULT 0 NOT NULL,
+    updated_at timestamp  DEFAULT now() NOT NULL,
+    CONSTRAINT alert_set_version_single_row CHECK (id = 1)
+);
+
+INSERT INTO alert_set_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION public.bump_alert_set_version() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    UPDATE alert_set_version SET version = version + 1, updated_at = now() WHERE id = 1;
+    RETURN NULL;
+END;
+$$;
+
+-- New or deleted alerts always change the set
+DROP TRIGGER IF EXISTS trigger_alerts_insert_delete_version ON alerts;
+CREATE TRIGGER trigger_alerts_insert_delete_version
+    AFTER INSERT OR DELETE OR TRUNCATE ON alerts
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_alert_set_version();
+
+-- Edits only count when a matched column changes (not matching_assets_* bookkeeping)
+DROP TRIGGER IF EXISTS trigger_alerts_update_version ON alerts;
+CREATE TRIGGER trigger_alerts_update_version
+    AFTER UPDATE ON alerts
+    FOR EACH ROW
+    WHEN (
+        (OLD.user_id, OLD.name, OLD.match_strings, OLD.match_all, OLD.max_price,
+         OLD.bottled_year_min, OLD.bottled_year_max, OLD.age_min, OLD.age_max)
+        IS DISTINCT FROM
+        (NEW.user_id, NEW.name, NEW.match_strings, NEW.match_all, NEW.max_price,
+         NEW.bottled_year_min, NEW.bottled_year_max, NEW.age_min, NEW.age_max)
+    )
+    EXECUTE FUNCTION bump_alert_set_version();
+
+-- Consent and address changes move alerts in and out of alerts_with_email_consent
+DROP TRIGGER IF EXISTS trigger_users_alert_set_version ON users;
+CREATE TRIGGER trigger_users_alert_set_version
+    AFTER UPDATE OF email, email_consent ON users
+    FOR EACH ROW
+    WHEN (
+        OLD.email IS DISTINCT FROM NEW.email
+        OR OLD.email_consent IS DISTINCT FROM NEW.email_consent
+    )
+    EXECUTE FUNCTION bump_alert_set_version();
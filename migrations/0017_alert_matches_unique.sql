@@ -0,0 +1,13 @@
+-- One alert_matches row per (alert, listing activity) so Pub/Sub redeliveries
+-- to alert-processor cannot record duplicate matches or trigger duplicate emails.
+
+-- Remove existing duplicates, keeping the first match recorded
+DELETE FROM alert_matches am
+USING alert_matches keep
+WHERE am.alert_id = keep.alert_id
+  AND am.activity_idx = keep.activity_idx
+  AND am.match_idx > keep.match_idx;
+
+ALTER TABLE alert_matches DROP CONSTRAINT IF EXISTS alert_matches_alert_id_activity_idx_unique;
+ALTER TABLE alert_matches
+  ADD CONSTRAINT alert_matches_alert_id_activity_idx_unique UNIQUE (alert_id, activity_idx);
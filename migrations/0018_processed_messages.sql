@@ -0,0 +1,13 @@
+-- Listings alert-processor has fully processed, keyed by the activity feed index
+-- (the message's external_id). Checked with one primary-key lookup before any alert
+-- load, so Pub/Sub redeliveries and republished listings short-circuit.
+CREATE TABLE IF NOT EXISTS public.processed_messages (
+    activity_idx integer PRIMARY KEY,
+    message_id varchar NOT NULL,
+    match_count integer DEFAULT 0 NOT NULL,
+    processed_at timestamp DEFAULT now() NOT NULL
+);
+
+-- Supports pruning old rows by age
+CREATE INDEX IF NOT EXISTS processed_messages_processed_at_idx
+    ON public.processed_messages (processed_at);
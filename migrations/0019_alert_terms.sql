@@ -0,0 +1,98 @@
+-- Normalized match terms of every alert, indexed so alert-processor can ask Postgres
+-- for the candidate alerts of one listing (ALERT_SOURCE=postgres) instead of holding
+-- the whole alert set in memory.
+--
+-- A term can only be a substring of a listing name if its first three characters
+-- (the whole term when shorter) also appear in the name, so each term is keyed by
+-- that prefix (B-tree)
+-- and looked up with `gram = ANY(alert_name_grams(name))`, one index probe per
+-- 1-3 character substring of the name, then confirmed with strpos(). A GIN index on
+-- every trigram of each term (`grams <@ name_grams`) was slower: with common words in
+-- the terms it has to recheck most of the table. pg_trgm is not used either; it pads
+-- words with blanks, so a term inside a word ("ourbo" in "bourbon") would not match.
+
+-- Same normalization as Alert.from_row and plan.normalize_terms: drop apostrophes, strip, lowercase
+CREATE OR REPLACE FUNCTION public.alert_normalize_term(value text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$
+    SELECT lower(btrim(replace(value, '''', ''), E' \t\n\r\f\v'))
+$$;
+
+-- Lookup keys of a (normalized) listing name: '' plus every distinct substring of
+-- 1 to 3 characters, i.e. every value alert_terms.gram can have for a term in the name
+CREATE OR REPLACE FUNCTION public.alert_name_grams(value text) RETURNS text[]
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$
+    SELECT array_agg(DISTINCT gram)
+    FROM (
+        SELECT ''::text AS gram
+        UNION ALL
+        SELECT substr(value, i, n)
+        FROM generate_series(1, length(value)) AS i, generate_series(1, 3) AS n
+        WHERE i + n - 1 <= length(value)
+    ) grams
+$$;
+
+-- One row per distinct normalized term. An alert without terms gets a single row with
+-- term '' (contained in every name) and term_count 0, so it is a candidate for every
+-- listing, like an alert plan without a terms check.
+CREATE TABLE IF NOT EXISTS public.alert_terms (
+    alert_id varchar NOT NULL REFERENCES alerts(id) ON DELETE CASCADE,
+    term text NOT NULL,
+    gram text NOT NULL,
+    term_count integer NOT NULL,
+    CONSTRAINT alert_terms_pkey PRIMARY KEY (alert_id, term)
+);
+
+CREATE INDEX IF NOT EXISTS alert_terms_gram_idx ON public.alert_terms (gram);
+
+CREATE OR REPLACE FUNCTION public.sync_alert_terms() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    DELETE FROM alert_terms WHERE alert_id = NEW.id;
+
+    INSERT INTO alert_terms (alert_id, term, gram, term_count)
+    SELECT NEW.id, t.term, left(t.term, 3), count(*) OVER ()
+    FROM (
+        SELECT DISTINCT alert_normalize_term(s) AS term
+        FROM unnest(NEW.match_strings) AS s
+    ) t
+    WHERE t.term <> '';
+
+    IF NOT FOUND THEN
+        INSERT INTO alert_terms (alert_id, term, gram, term_count)
+        VALUES (NEW.id, '', '', 0);
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trigger_alerts_insert_terms ON alerts;
+CREATE TRIGGER trigger_alerts_insert_terms
+    AFTER INSERT ON alerts
+    FOR EACH ROW EXECUTE FUNCTION sync_alert_terms();
+
+DROP TRIGGER IF EXISTS trigger_alerts_update_terms ON alerts;
+CREATE TRIGGER trigger_alerts_update_terms
+    AFTER UPDATE OF match_strings ON alerts
+    FOR EACH ROW
+    WHEN (OLD.match_strings IS DISTINCT FROM NEW.match_strings)
+    EXECUTE FUNCTION sync_alert_terms();
+
+-- Backfill existing alerts
+INSERT INTO alert_terms (alert_id, term, gram, term_count)
+SELECT t.alert_id, t.term, left(t.term, 3), count(*) OVER (PARTITION BY t.alert_id)
+FROM (
+    SELECT DISTINCT a.id AS alert_id, alert_normalize_term(s) AS term
+    FROM alerts a, unnest(a.match_strings) AS s
+) t
+WHERE t.term <> ''
+ON CONFLICT (alert_id, term) DO NOTHING;
+
+INSERT INTO alert_terms (alert_id, term, gram, term_count)
+SELECT a.id, '', '', 0
+FROM alerts a
+WHERE NOT EXISTS (SELECT 1 FROM alert_terms t WHERE t.alert_id = a.id)
+ON CONFLICT (alert_id, term) DO NOTHING;
@@ -0,0 +1,45 @@
+-- One normalization for listing names and alert match strings, shared by baxus-monitor,
+-- alert-processor (src/normalize.py in both) and SQL: lowercase, accent folding (NFKD
+-- without combining marks U+0300-U+036F), apostrophes dropped, any other run of
+-- non-alphanumerics collapsed to one space, ends trimmed. Requires a UTF8 database.
+CREATE OR REPLACE FUNCTION public.normalize_name(value text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$
+    SELECT btrim(regexp_replace(
+        translate(
+            regexp_replace(normalize(replace(lower(value), 'ß', 'ss'), NFKD), E'[\u0300-\u036f]+', '', 'g'),
+            '''‘’`´ʼ', ''),
+        '[^[:alnum:]]+', ' ', 'g'))
+$$;
+
+-- Listing names normalized by baxus-monitor and sent to alert-processor in the payload
+ALTER TABLE baxus.assets ADD COLUMN IF NOT EXISTS name_normalized text;
+
+-- Backfill without touching last_updated / count_updated
+ALTER TABLE baxus.assets DISABLE TRIGGER trigger_assets_update;
+UPDATE baxus.assets SET name_normalized = normalize_name(name) WHERE name_normalized IS NULL;
+ALTER TABLE baxus.assets ENABLE TRIGGER trigger_assets_update;
+
+-- Alert terms (0019) use the same normalization
+CREATE OR REPLACE FUNCTION public.alert_normalize_term(value text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$
+    SELECT normalize_name(value)
+$$;
+
+DELETE FROM alert_terms;
+
+INSERT INTO alert_terms (alert_id, term, gram, term_count)
+SELECT t.alert_id, t.term, left(t.term, 3), count(*) OVER (PARTITION BY t.alert_id)
+FROM (
+    SELECT DISTINCT a.id AS alert_id, alert_normalize_term(s) AS term
+    FROM alerts a, unnest(a.match_strings) AS s
+) t
+WHERE t.term <> ''
+ON CONFLICT (alert_id, term) DO NOTHING;
+
+INSERT INTO alert_terms (alert_id, term, gram, term_count)
+SELECT a.id, '', '', 0
+FROM alerts a
+WHERE NOT EXISTS (SELECT 1 FROM alert_terms t WHERE t.alert_id = a.id)
+ON CONFLICT (alert_id, term) DO NOTHING;
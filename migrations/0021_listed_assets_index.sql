@@ -0,0 +1,6 @@
+-- Streaming the listed inventory (alert-processor process_alert_change): a partial index
+-- over listed assets, and each asset's latest activity found by one backward index scan
+CREATE INDEX IF NOT EXISTS idx_assets_listed ON baxus.assets (asset_idx) WHERE is_listed;
+
+CREATE INDEX IF NOT EXISTS idx_activity_feed_asset_idx_activity_idx
+    ON baxus.activity_feed (asset_idx, activity_idx DESC);
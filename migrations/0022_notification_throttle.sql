@@ -0,0 +1,71 @@
+-- Per-user notification budget for alert-processor: one token bucket row per user.
+-- A match is published (one alert-sender email) only if a token can be taken; the
+-- rest are folded into the user's pending digest. Shared by every processor instance.
+CREATE TABLE IF NOT EXISTS public.notification_buckets (
+    user_id varchar PRIMARY KEY,
+    tokens real NOT NULL,
+    updated_at timestamp DEFAULT now() NOT NULL
+);
+
+-- Refill each user's bucket (up to p_burst, p_refill_per_sec tokens per second since the
+-- last take) and take up to the requested tokens. Returns the tokens granted per user.
+-- Rows are locked in user_id order, so concurrent callers serialize per user without deadlocks.
+CREATE OR REPLACE FUNCTION public.take_notification_tokens(
+    p_user_ids varchar[], p_requested integer[], p_burst real, p_refill_per_sec real
+) RETURNS TABLE (user_id varchar, granted integer)
+    LANGUAGE plpgsql
+    AS $$
+#variable_conflict use_column
+BEGIN
+    -- New users start with a full bucket
+    INSERT INTO notification_buckets (user_id, tokens, updated_at)
+    SELECT DISTINCT u, p_burst, now() FROM unnest(p_user_ids) AS u
+    ON CONFLICT (user_id) DO NOTHING;
+
+    RETURN QUERY
+    WITH requests AS (
+        SELECT r.user_id, sum(r.requested)::integer AS requested
+        FROM unnest(p_user_ids, p_requested) AS r(user_id, requested)
+        GROUP BY r.user_id
+    ),
+    locked AS (
+        SELECT b.user_id, q.requested,
+               least(p_burst, b.tokens + greatest(0, extract(epoch FROM now() - b.updated_at)) * p_refill_per_sec)
+                   AS available
+        FROM notification_buckets b
+        JOIN requests q ON q.user_id = b.user_id
+        ORDER BY b.user_id
+        FOR UPDATE OF b
+    ),
+    taken AS (
+        UPDATE notification_buckets b
+        SET tokens = l.available - least(l.requested, floor(l.available)),
+            updated_at = now()
+        FROM locked l
+        WHERE b.user_id = l.user_id
+        RETURNING b.user_id, least(l.requested, floor(l.available))::integer AS granted
+    )
+    SELECT t.user_id, t.granted FROM taken t;
+END;
+$$;
+
+-- Matches over a user's budget, coalesced into one digest email. At most one pending
+-- (sent_at IS NULL) digest per user; alert-processor publishes it once first_match_at is
+-- older than the coalescing window and stamps sent_at.
+CREATE TABLE IF NOT EXISTS public.notification_digests (
+    digest_idx SERIAL PRIMARY KEY,
+    user_id varchar NOT NULL,
+    user_email varchar,
+    match_idxs integer[] NOT NULL,
+    match_count integer NOT NULL,
+    first_match_at timestamp DEFAULT now() NOT NULL,
+    last_match_at timestamp DEFAULT now() NOT NULL,
+    sent_at timestamp
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS notification_digests_pending_user_idx
+    ON public.notification_digests (user_id) WHERE sent_at IS NULL;
+
+-- Supports finding the digests whose window has passed
+CREATE INDEX IF NOT EXISTS notification_digests_pending_first_match_idx
+    ON public.notification_digests (first_match_at) WHERE sent_at IS NULL;
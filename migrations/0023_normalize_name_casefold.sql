@@ -0,0 +1,59 @@
+-- Bring normalize_name() (0020) in line with normalize_text() in src/normalize.py, which
+-- case-folds (str.casefold) where SQL only lowercased, and splits on anything str.isalnum()
+-- rejects where [:alnum:] follows the database's ctype. Beyond lower():
+--   * ß -> ss and final sigma -> sigma, as casefold does; lunate sigma still becomes a final
+--     sigma through NFKD, and the spacing ypogegrammeni becomes a space
+--   * a ypogegrammeni left by NFKD (iota subscript, "ᾳ") becomes iota, as casefold spells it
+--   * combining marks outside U+0300-U+036F (Hebrew points, Arabic harakat, combining
+--     Cyrillic) are separators, and enclosed numbers that are not [:alnum:] are kept
+-- Checked character by character against Python for Latin, Greek, Cyrillic, Hebrew, Arabic,
+-- CJK, kana, Hangul, symbols and the compatibility forms (PostgreSQL 16, ctype C.UTF-8).
+-- Indic, Southeast Asian, Ethiopic and Cherokee letters can still differ; names in those
+-- scripts are matched on the name_normalized that baxus-monitor computes in Python.
+ALTER FUNCTION public.normalize_name(text) RENAME TO normalize_name_0020;
+
+CREATE OR REPLACE FUNCTION public.normalize_name(value text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$
+    SELECT btrim(regexp_replace(
+        translate(
+            regexp_replace(
+                translate(
+                    normalize(translate(replace(lower(value), 'ß', 'ss'), E'\u03c2\u037a', E'\u03c3 '), NFKD),
+                    E'\u0345', E'\u03b9'),
+                E'[\u0300-\u036f]+', '', 'g'),
+            '''‘’`´ʼ', ''),
+        E'([^[:alnum:]\u24eb-\u24ff\u2776-\u2793\u3248-\u324f]'
+        '|[\u0591-\u05c7\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06dc\u06df-\u06e4\u06e7\u06e8'
+        '\u06ea-\u06ed\u2de0-\u2dff\ufb1e])+',
+        ' ', 'g'))
+$$;
+
+-- Names still holding the 0020 backfill are normalized again; names written by
+-- baxus-monitor since come from Python and are left alone
+ALTER TABLE baxus.assets DISABLE TRIGGER trigger_assets_update;
+UPDATE baxus.assets
+SET name_normalized = normalize_name(name)
+WHERE name_normalized = normalize_name_0020(name)
+  AND name_normalized <> normalize_name(name);
+ALTER TABLE baxus.assets ENABLE TRIGGER trigger_assets_update;
+
+DROP FUNCTION public.normalize_name_0020(text);
+
+-- Alert terms (0019/0020) go through normalize_name() as well
+DELETE FROM alert_terms;
+
+INSERT INTO alert_terms (alert_id, term, gram, term_count)
+SELECT t.alert_id, t.term, left(t.term, 3), count(*) OVER (PARTITION BY t.alert_id)
+FROM (
+    SELECT DISTINCT a.id AS alert_id, alert_normalize_term(s) AS term
+    FROM alerts a, unnest(a.match_strings) AS s
+) t
+WHERE t.term <> ''
+ON CONFLICT (alert_id, term) DO NOTHING;
+
+INSERT INTO alert_terms (alert_id, term, gram, term_count)
+SELECT a.id, '', '', 0
+FROM alerts a
+WHERE NOT EXISTS (SELECT 1 FROM alert_terms t WHERE t.alert_id = a.id)
+ON CONFLICT (alert_id, term) DO NOTHING;
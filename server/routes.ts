@@ -32,6 +32,25 @@ function isSafeReturnPath(path: unknown): path is string {
   return true;
 }
 
+// Match created/edited alerts against the listed assets. When PUBSUB_TOPIC_ALERT_CHANGES is
+// set (GCP), alert-processor's process_alert_change does it; otherwise (dev) it runs here with
+// the same semantics (storage.matchAlertToAssets).
+async function rematchAlerts(alertIds: string[]): Promise<void> {
+  const topicName = process.env.PUBSUB_TOPIC_ALERT_CHANGES;
+  if (!topicName) {
+    await Promise.all(alertIds.map((alertId) => storage.matchAlertToAssets(alertId)));
+    return;
+  }
+
+  const topic = new PubSub().topic(topicName);
+  await topic.publishMessage({
+    data: Buffer.from(JSON.stringify({ event_type: "alert_changed", alert_ids: alertIds })),
+    attributes: {
+      event_type: "alert_changed",
+    },
+  });
+}
+
 export async function registerRoutes(app: Express): Promise<Server> {
   // Initialize Google OAuth client
   // Use CUSTOM_DOMAIN env var to support both production (baxpro.xyz) and dev (dev.baxpro.xyz)
@@ -669,7 +688,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
       const alert = await storage.createAlert(validatedData);
       
       // Match alert to existing assets (run in background, don't block response)
-      storage.matchAlertToAssets(alert.id).catch(err => {
+      rematchAlerts([alert.id]).catch(err => {
         console.error("Error matching alert to assets:", err);
       });
       
@@ -697,7 +716,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
       const alert = await storage.updateAlert(id, updateData);
       
       // Re-match alert to assets after update (run in background)
-      storage.matchAlertToAssets(id).catch(err => {
+      rematchAlerts([id]).catch(err => {
         console.error("Error matching alert to assets:", err);
       });
       
@@ -740,10 +759,11 @@ export async function registerRoutes(app: Express): Promise<Server> {
         message: "Refreshing matches for alerts across all users"
       });
       
-      // Run matching for all alerts in background
-      for (const alert of allAlerts) {
-        storage.matchAlertToAssets(alert.id).catch(err => {
-          console.error(`Error matching alert ${alert.id} to assets:`, err);
+      // Run matching for all alerts in background, 100 alerts per event
+      for (let i = 0; i < allAlerts.length; i += 100) {
+        const alertIds = allAlerts.slice(i, i + 100).map((alert) => alert.id);
+        rematchAlerts(alertIds).catch(err => {
+          console.error(`Error matching alerts ${alertIds.join(", ")} to assets:`, err);
         });
       }
     } catch (error) {
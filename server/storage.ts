@@ -470,6 +470,10 @@ export class DbStorage implements IStorage {
     }
   }
 
+  // Same semantics as alert-processor's process_alert_change (which replaces this in GCP): the
+  // alert is matched against the currently listed assets, each keyed by its latest NEW_LISTING
+  // activity and priced at its current price, comparing normalize_name() forms of the name and
+  // match strings (migration 0020).
   async matchAlertToAssets(alertId: string): Promise<{ matched: number; matchingAssetsString: string }> {
     // Get the alert details
     const alert = await this.getAlert(alertId);
@@ -477,75 +481,6 @@ export class DbStorage implements IStorage {
       return { matched: 0, matchingAssetsString: '' };
     }
 
-    // Helper to build conditions and params for a given starting param index
-    const buildConditions = (startIndex: number): { conditions: string[]; params: any[]; nextIndex: number } => {
-      const conditions: string[] = [];
-      const params: any[] = [];
-      let paramIndex = startIndex;
-
-      // Price filter uses activity_feed price (use explicit null check to allow 0 as valid value)
-      if (alert.maxPrice !== null && alert.maxPrice !== undefined) {
-        conditions.push(`af.price <= $${paramIndex}`);
-        params.push(alert.maxPrice);
-        paramIndex++;
-      }
-
-      // Bottled year filter
-      if (alert.bottledYearMin !== null && alert.bottledYearMax !== null) {
-        conditions.push(`a.bottled_year BETWEEN $${paramIndex} AND $${paramIndex + 1}`);
-        params.push(alert.bottledYearMin, alert.bottledYearMax);
-        paramIndex += 2;
-      } else if (alert.bottledYearMin !== null) {
-        conditions.push(`a.bottled_year >= $${paramIndex}`);
-        params.push(alert.bottledYearMin);
-        paramIndex++;
-      } else if (alert.bottledYearMax !== null) {
-        conditions.push(`a.bottled_year <= $${paramIndex}`);
-        params.push(alert.bottledYearMax);
-        paramIndex++;
-      }
-
-      // Age filter
-      if (alert.ageMin !== null && alert.ageMax !== null) {
-        conditions.push(`a.age BETWEEN $${paramIndex} AND $${paramIndex + 1}`);
-        params.push(alert.ageMin, alert.ageMax);
-        paramIndex += 2;
-      } else if (alert.ageMin !== null) {
-        conditions.push(`a.age >= $${paramIndex}`);
-        params.push(alert.ageMin);
-        paramIndex++;
-      } else if (alert.ageMax !== null) {
-        conditions.push(`a.age <= $${paramIndex}`);
-        params.push(alert.ageMax);
-        paramIndex++;
-      }
-
-      // Match strings filter (name matching) using parameterized LIKE
-      // Strip special characters (commas, apostrophes, etc.) from both sides for comparison
-      if (alert.matchStrings && alert.matchStrings.length > 0) {
-        const likeConditions: string[] = [];
-        for (const s of alert.matchStrings) {
-          // Remove special characters from search string before passing as parameter
-          const normalizedSearch = s.replace(/[^a-zA-Z0-9\s]/g, '');
-          // Compare normalized asset name against normalized search string
-          likeConditions.push(`LOWER(REGEXP_REPLACE(a.name, '[^a-zA-Z0-9\\s]', '', 'g')) LIKE LOWER($${paramIndex})`);
-          params.push(`%${normalizedSearch}%`);
-          paramIndex++;
-        }
-        
-        if (alert.matchAll) {
-          conditions.push(`(${likeConditions.join(' AND ')})`);
-        } else {
-          conditions.push(`(${likeConditions.join(' OR ')})`);
-        }
-      }
-
-      // Only match activity records with price
-      conditions.push(`af.price IS NOT NULL`);
-
-      return { conditions, params, nextIndex: paramIndex };
-    };
-
     // Use a transaction to ensure atomicity
     const client = await pool.connect();
     try {
@@ -554,37 +489,91 @@ export class DbStorage implements IStorage {
       // Delete existing matches for this alert
       await client.query('DELETE FROM alert_assets WHERE alert_id = $1', [alertId]);
 
-      // Build conditions for INSERT query (starts at $2, $1 is alertId)
-      const insertBuild = buildConditions(2);
-      const insertWhereClause = insertBuild.conditions.length > 0 ? `WHERE ${insertBuild.conditions.join(' AND ')}` : '';
-      const insertParams = [alertId, ...insertBuild.params];
-
-      // Insert matching activity records with parameterized query
-      // Join to dim_activity_types to filter for NEW_LISTING activity type
-      const insertQuery = `
-        INSERT INTO alert_assets (alert_id, activity_idx)
-        SELECT $1, af.activity_idx
-        FROM baxus.assets a
-        JOIN baxus.activity_feed af ON af.asset_idx = a.asset_idx
-        JOIN baxus.dim_activity_types dat ON dat.activity_type_idx = af.activity_type_idx
-          AND dat.activity_type_code = 'NEW_LISTING'
-        ${insertWhereClause}
-        ON CONFLICT DO NOTHING
-      `;
+      // Blank match strings are ignored; ones that normalize to nothing (punctuation only) are
+      // dropped, and an alert left with none of its match strings matches nothing
+      const matchStrings = (alert.matchStrings ?? []).filter((s) => s.trim() !== '');
+      let terms: string[] = [];
+      if (matchStrings.length > 0) {
+        const termsResult = await client.query(
+          `SELECT DISTINCT normalize_name(s) AS term FROM unnest($1::text[]) AS s`,
+          [matchStrings]
+        );
+        terms = termsResult.rows.map((r: any) => r.term).filter((term: string) => term !== '');
+      }
+
+      let matched = 0;
+      if (matchStrings.length === 0 || terms.length > 0) {
+        const conditions: string[] = ['a.is_listed'];
+        const params: any[] = [alertId];
+
+        // A listing without a price passes the price filter (use explicit null check to allow 0)
+        if (alert.maxPrice !== null && alert.maxPrice !== undefined) {
+          params.push(alert.maxPrice);
+          conditions.push(`(a.price IS NULL OR a.price <= $${params.length})`);
+        }
+
+        // Bottled year and age filters need the asset to have a value in range
+        if (alert.bottledYearMin !== null || alert.bottledYearMax !== null) {
+          conditions.push(`a.bottled_year IS NOT NULL`);
+          if (alert.bottledYearMin !== null) {
+            params.push(alert.bottledYearMin);
+            conditions.push(`a.bottled_year >= $${params.length}`);
+          }
+          if (alert.bottledYearMax !== null) {
+            params.push(alert.bottledYearMax);
+            conditions.push(`a.bottled_year <= $${params.length}`);
+          }
+        }
+        if (alert.ageMin !== null || alert.ageMax !== null) {
+          conditions.push(`a.age IS NOT NULL`);
+          if (alert.ageMin !== null) {
+            params.push(alert.ageMin);
+            conditions.push(`a.age >= $${params.length}`);
+          }
+          if (alert.ageMax !== null) {
+            params.push(alert.ageMax);
+            conditions.push(`a.age <= $${params.length}`);
+          }
+        }
 
-      const insertResult = await client.query(insertQuery, insertParams);
-      const matched = insertResult.rowCount || 0;
-
-      // Build matching assets string with time range
-      // Oldest listing date in activity feed is June 25, 2025 (hardcoded for performance)
-      let matchingAssetsString = 'No matches';
-      if (matched > 0) {
-        const now = new Date();
-        const oldest = new Date('2025-06-25');
-        const monthsDiff = Math.max(1, Math.ceil((now.getTime() - oldest.getTime()) / (1000 * 60 * 60 * 24 * 30)));
-        matchingAssetsString = `${matched} match${matched === 1 ? '' : 'es'} in the last ${monthsDiff} month${monthsDiff === 1 ? '' : 's'}`;
+        // Match terms: substring of the normalized name, all (matchAll) or any of them
+        if (terms.length > 0) {
+          params.push(terms);
+          const nameNormalized = 'coalesce(a.name_normalized, normalize_name(a.name))';
+          const termsParam = `unnest($${params.length}::text[]) AS term`;
+          conditions.push(alert.matchAll
+            ? `NOT EXISTS (SELECT 1 FROM ${termsParam} WHERE strpos(${nameNormalized}, term) = 0)`
+            : `EXISTS (SELECT 1 FROM ${termsParam} WHERE strpos(${nameNormalized}, term) > 0)`
+          );
+        }
+
+        // Insert the latest NEW_LISTING activity of each matching listed asset
+        const insertQuery = `
+          INSERT INTO alert_assets (alert_id, activity_idx)
+          SELECT $1, l.activity_idx
+          FROM baxus.assets a
+          JOIN LATERAL (
+            SELECT af.activity_idx
+            FROM baxus.activity_feed af
+            JOIN baxus.dim_activity_types dat ON dat.activity_type_idx = af.activity_type_idx
+            WHERE af.asset_idx = a.asset_idx
+              AND dat.activity_type_code = 'NEW_LISTING'
+            ORDER BY af.activity_idx DESC
+            LIMIT 1
+          ) l ON true
+          WHERE ${conditions.join(' AND ')}
+          ON CONFLICT DO NOTHING
+        `;
+        const insertResult = await client.query(insertQuery, params);
+        matched = insertResult.rowCount || 0;
       }
 
+      // Listings available now, as process_alert_change counts them; this used to be every
+      // NEW_LISTING since June 2025 ("N matches in the last M months")
+      const matchingAssetsString = matched > 0
+        ? `${matched} match${matched === 1 ? '' : 'es'} listed now`
+        : 'No matches';
+
       // Update the alert with the matching info
       await client.query(
         'UPDATE alerts SET matching_assets_string = $1, matching_assets_last_updated = $2 WHERE id = $3',
@@ -0,0 +1 @@
+# Alert Processor Benchmarks
@@ -0,0 +1,128 @@
+"""Benchmark recording and publishing matches: sync path vs AsyncMatchPipeline.
+
+Runs offline. Inserts are simulated as a round trip plus a per-row cost and
+publishing goes through LocalPublisher. Run from the alert-processor
+directory:
+
+    python -m benchmarks.bench_async_pipeline --matches 100 1000 5000 --assets 1 10
+
+"sync" is the default path: each asset's matches are bulk inserted, then
+published and waited for, before the next asset starts. "async" sends all
+assets through one pipeline run, so publishing overlaps the remaining inserts.
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.async_pipeline import AsyncMatchPipeline
+from src.models import Alert, AlertMatch, Asset
+from src.pubsub import publish_matches
+
+from .fakes import LocalPublisher
+
+
+def _alerts(count: int) -> list[Alert]:
+    """Build placeholder alerts to record matches for."""
+    return [
+        Alert(
+            id=f"alert-{i}", user_id=f"user-{i}", user_email=f"user{i}@example.com", name=f"Alert {i}",
+            match_strings=["bourbon"], match_all=False, max_price=None,
+            bottled_year_min=None, bottled_year_max=None, age_min=None, age_max=None,
+        )
+        for i in range(count)
+    ]
+
+
+def _assets(count: int) -> list[Asset]:
+    """Build listings that every placeholder alert matches."""
+    return [
+        Asset(
+            asset_idx=i + 1, activity_idx=i + 1, name="Buffalo Trace Kentucky Straight Bourbon",
+            price=29.99, bottled_year=2020, age=8, url=f"https://baxpro.xyz/asset/{i + 1}",
+        )
+        for i in range(count)
+    ]
+
+
+class _SimulatedTable:
+    """alert_matches stand-in: a round trip per statement plus a per-row cost."""
+
+    def __init__(self, round_trip_sec: float, row_sec: float):
+        self.round_trip_sec = round_trip_sec
+        self.row_sec = row_sec
+        self.next_idx = 0
+
+    def _ids(self, matches: list[AlertMatch]) -> dict[str, int]:
+        ids = {}
+        for match in matches:
+            self.next_idx += 1
+            ids[str(match.alert_id)] = self.next_idx
+        return ids
+
+    def insert(self, matches: list[AlertMatch]) -> dict[str, int]:
+        time.sleep(self.round_trip_sec + self.row_sec * len(matches))
+        return self._ids(matches)
+
+    async def insert_async(self, matches: list[AlertMatch]) -> dict[str, int]:
+        await asyncio.sleep(self.round_trip_sec + self.row_sec * len(matches))
+        return self._ids(matches)
+
+
+def _sync(table: _SimulatedTable, publisher: LocalPublisher, items: list[tuple[Asset, list[Alert]]]) -> None:
+    """The sync path of _record_and_publish, one asset after another."""
+    for asset, alerts in items:
+        matches = [AlertMatch(alert.id, "baxus", asset.activity_idx, asset.asset_idx) for alert in alerts]
+        match_ids = table.insert(matches)
+        errors = publish_matches(asset, [(alert, match_ids[str(alert.id)]) for alert in alerts], publisher=publisher)
+        assert not errors, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, nargs="+", default=[100, 1000, 5000], help="matches per asset")
+    parser.add_argument("--assets", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--insert-round-trip-ms", type=float, default=5.0)
+    parser.add_argument("--insert-row-us", type=float, default=20.0)
+    parser.add_argument("--publish-round-trip-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--chunk", type=int, default=500)
+    args = parser.parse_args()
+
+    warm_up = [(asset, _alerts(1)) for asset in _assets(1)]
+
+    for asset_count in args.assets:
+        for match_count in args.matches:
+            items = [(asset, _alerts(match_count)) for asset in _assets(asset_count)]
+            total = asset_count * match_count
+            results = {}
+            for label in ("sync", "async"):
+                table = _SimulatedTable(args.insert_round_trip_ms / 1000, args.insert_row_us / 1e6)
+                publisher = LocalPublisher(round_trip_sec=args.publish_round_trip_ms / 1000)
+                pipeline = AsyncMatchPipeline(
+                    concurrency=args.concurrency, chunk_size=args.chunk,
+                    insert=table.insert_async, publisher=publisher,
+                )
+                # Start the event loop thread and executor outside the timing, as on a warm instance
+                pipeline.run(warm_up)
+                publisher.published.clear()
+
+                start = time.perf_counter()
+                if label == "sync":
+                    _sync(table, publisher, items)
+                else:
+                    errors = pipeline.run(items)
+                    assert not errors, errors
+                elapsed = time.perf_counter() - start
+                assert len(publisher.published) == total
+                results[label] = elapsed
+                print(
+                    f"assets={asset_count:<4} matches/asset={match_count:<6} {label:<5} "
+                    f"total={elapsed * 1000:9.1f}ms throughput={total / elapsed:9.0f} matches/s"
+                )
+            speedup = results["sync"] / results["async"]
+            print(f"assets={asset_count:<4} matches/asset={match_count:<6} speedup={speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
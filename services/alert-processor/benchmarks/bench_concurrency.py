@@ -0,0 +1,127 @@
+"""Load test: process_listing throughput as instance concurrency goes up.
+
+Needs a reachable database with alerts (same environment variables as the
+service). Publishing goes through LocalPublisher, so no Pub/Sub access is
+needed. Run from the alert-processor directory:
+
+    python -m benchmarks.bench_concurrency --events 400 --concurrency 1 2 4 8 16
+
+A local event generator builds Pub/Sub CloudEvents for synthetic listings
+(``benchmarks/corpus.py``), each with a fresh activity_idx, and feeds them
+to ``main.process_listing`` from a thread pool of each concurrency level, as
+a gen2 instance with ``max_instance_request_concurrency`` would. The alert
+cache is dropped before each level, so the level starts with concurrent
+misses; the single-flight refresh must turn them into one reload. Reported
+per level: events per second, speedup over concurrency 1, p50/p99 event
+latency and alert reloads. Rows written to alert_matches and
+processed_messages are deleted afterwards.
+"""
+
+import argparse
+import base64
+import json
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cloudevents.http import CloudEvent
+from sqlalchemy import text
+
+import main as processor
+from src import pubsub
+from src.alert_cache import alert_cache
+from src.db import get_database
+
+from . import corpus
+from .fakes import LocalPublisher
+
+# activity_idx range used for generated events (below the integer column's maximum)
+ACTIVITY_BASE = 2_000_000_000
+
+
+def _events(count: int, first_activity: int, seed: int) -> list[CloudEvent]:
+    """Build Pub/Sub CloudEvents for synthetic listings, as baxus-monitor publishes them."""
+    events = []
+    for i, asset in enumerate(corpus.assets(count, seed=seed)):
+        activity_idx = first_activity + i
+        payload = {
+            "asset_idx": asset.asset_idx,
+            "name": asset.name,
+            "price": asset.price,
+            "bottled_year": asset.bottled_year,
+            "age": asset.age,
+        }
+        message = {
+            "data": base64.b64encode(json.dumps(payload).encode()).decode(),
+            "attributes": {"event_type": "new_listing", "external_id": str(activity_idx)},
+        }
+        events.append(CloudEvent(
+            {
+                "id": f"bench-{activity_idx}",
+                "type": "google.cloud.pubsub.topic.v1.messagePublished",
+                "source": "bench",
+            },
+            {"message": message},
+        ))
+    return events
+
+
+def _timed(event: CloudEvent) -> float:
+    """Process one event and return its latency in milliseconds."""
+    start = time.perf_counter()
+    processor.process_listing(event)
+    return (time.perf_counter() - start) * 1000
+
+
+def _cleanup() -> None:
+    """Delete the rows the generated events wrote."""
+    conn = get_database().get_connection()
+    try:
+        for table in ("alert_matches", "processed_messages"):
+            conn.execute(text(f"DELETE FROM {table} WHERE activity_idx >= :base"), {"base": ACTIVITY_BASE})
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=400, help="events per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--publish-round-trip", type=float, default=0.02,
+                        help="simulated publish round trip (seconds)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="keep the rows written by the generated events")
+    args = parser.parse_args()
+
+    # Per-event INFO logs would dominate the measurement (get_logger() resets levels, so disable globally)
+    logging.disable(logging.INFO)
+    # The shared publisher is created on first use; install the offline stand-in in its place
+    pubsub._publisher = LocalPublisher(round_trip_sec=args.publish_round_trip)
+
+    baseline = None
+    try:
+        for level, concurrency in enumerate(args.concurrency):
+            events = _events(args.events, ACTIVITY_BASE + level * args.events, args.seed + level)
+            alert_cache.invalidate()
+            before = alert_cache.stats()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                latencies = sorted(pool.map(_timed, events))
+            rate = len(events) / (time.perf_counter() - start)
+            baseline = baseline or rate
+            after = alert_cache.stats()
+            counts = {key: after[key] - before[key] for key in ("reloads", "coalesced", "stale_hits")}
+            print(
+                f"concurrency={concurrency:<4} rate={rate:8.1f}/s speedup={rate / baseline:5.2f}x "
+                f"p50={statistics.median(latencies):7.1f}ms p99={latencies[int(len(latencies) * 0.99) - 1]:7.1f}ms "
+                f"reloads={counts['reloads']} coalesced={counts['coalesced']} stale_hits={counts['stale_hits']}"
+            )
+    finally:
+        if not args.keep:
+            _cleanup()
+
+
+if __name__ == "__main__":
+    main()
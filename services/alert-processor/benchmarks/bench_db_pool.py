@@ -0,0 +1,71 @@
+"""Benchmark per-call database engines against the shared pooled engine.
+
+Needs a reachable database (same environment variables as the service).
+Run from the alert-processor directory:
+
+    python -m benchmarks.bench_db_pool --iterations 200
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from src.config import config
+from src.db import Database, get_database
+
+PROBE_SQL = text("SELECT version FROM alert_set_version WHERE id = 1")
+
+
+def _per_call_engine() -> None:
+    """The old repository pattern: new engine and pool, one query, dispose."""
+    db = Database(config=config)
+    conn = db.get_connection()
+    try:
+        conn.execute(PROBE_SQL).scalar()
+    finally:
+        conn.close()
+        db.close()
+
+
+def _shared_engine() -> None:
+    """The current repository pattern: borrow a pooled connection."""
+    conn = get_database().get_connection()
+    try:
+        conn.execute(PROBE_SQL).scalar()
+    finally:
+        conn.close()
+
+
+def _run(label: str, fn, iterations: int) -> list[float]:
+    """Time ``fn`` over the given number of iterations, in milliseconds."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{label:<18} n={iterations:<5} mean={statistics.mean(timings):8.2f}ms "
+        f"p50={statistics.median(timings):8.2f}ms p95={p95:8.2f}ms max={timings[-1]:8.2f}ms"
+    )
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    # Warm the shared pool so its one-off connect is not counted
+    _shared_engine()
+
+    per_call = _run("per-call engine", _per_call_engine, args.iterations)
+    shared = _run("shared engine", _shared_engine, args.iterations)
+    print(f"speedup (mean): {statistics.mean(per_call) / statistics.mean(shared):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
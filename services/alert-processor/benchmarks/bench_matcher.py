@@ -0,0 +1,140 @@
+"""Benchmark suite for the alert matching engines.
+
+Run from the alert-processor directory (no database or network needed):
+
+    python -m benchmarks.bench_matcher --alerts 10000 100000 --assets 500
+
+For each alert set size and engine it reports the build time, memory held
+by the compiled engine, per-asset latency percentiles for ``match``,
+throughput for ``match`` and ``match_batch``, and asserts that every engine
+returns exactly what the linear matcher returns. The linear engine is only
+run up to --linear-max alerts; above that, results are compared with the
+first engine that ran.
+"""
+
+import argparse
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+
+from src.matcher import IN_PROCESS_ENGINES, MATCH_ENGINES, build_index
+
+from . import corpus
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def _engine_bytes(alert_set: list, engine: str) -> int:
+    """Bytes still allocated by building the engine (alerts themselves excluded)."""
+    gc.collect()
+    tracemalloc.start()
+    index = build_index(alert_set, engine)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del index
+    return current
+
+
+def _ids(results: dict) -> dict[int, list[str]]:
+    """Reduce match results to comparable alert ids per asset."""
+    return {asset_idx: [a.id for a in alerts] for asset_idx, alerts in results.items()}
+
+
+def run_engine(alert_set: list, listings: list, engine: str, repeat: int) -> tuple[dict, dict]:
+    """Benchmark one engine on one alert set.
+
+    Returns:
+        tuple[dict, dict]: The measurements and the match results keyed by asset_idx.
+    """
+    start = time.perf_counter()
+    index = build_index(alert_set, engine)
+    build_sec = time.perf_counter() - start
+
+    latencies = []
+    single: dict = {}
+    for _ in range(repeat):
+        for asset in listings:
+            start = time.perf_counter_ns()
+            single[asset.asset_idx] = index.match(asset)
+            latencies.append((time.perf_counter_ns() - start) / 1e3)
+    latencies.sort()
+
+    # Throughputs are timed the same way for both paths: whole passes, no per-call timers
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for asset in listings:
+            index.match(asset)
+    match_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        batch = index.match_batch(listings)
+    batch_sec = time.perf_counter() - start
+
+    assert _ids(batch) == _ids(single), f"{engine}: match and match_batch disagree"
+
+    stats = {
+        "engine": engine,
+        "alerts": len(alert_set),
+        "build_ms": round(build_sec * 1000, 1),
+        "memory_mb": round(_engine_bytes(alert_set, engine) / 2**20, 1),
+        "p50_us": round(_percentile(latencies, 50), 1),
+        "p90_us": round(_percentile(latencies, 90), 1),
+        "p99_us": round(_percentile(latencies, 99), 1),
+        "max_us": round(latencies[-1], 1),
+        "mean_us": round(statistics.fmean(latencies), 1),
+        "assets_per_sec": round(len(listings) * repeat / match_sec, 1),
+        "batch_assets_per_sec": round(len(listings) * repeat / batch_sec, 1),
+        "matches": sum(len(v) for v in single.values()),
+    }
+    return stats, single
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--assets", type=int, default=500)
+    parser.add_argument("--engines", nargs="+", default=list(IN_PROCESS_ENGINES), choices=MATCH_ENGINES)
+    parser.add_argument("--linear-max", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the listings per engine")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print one JSON object per result")
+    args = parser.parse_args()
+
+    listings = corpus.assets(args.assets, seed=args.seed)
+
+    for count in args.alerts:
+        alert_set = corpus.alerts(count, seed=args.seed + 1)
+        reference = None
+        for engine in args.engines:
+            if engine == "linear" and count > args.linear_max:
+                continue
+
+            stats, results = run_engine(alert_set, listings, engine, args.repeat)
+            results = _ids(results)
+            if reference is None:
+                reference = (engine, results)
+            assert results == reference[1], f"{engine}: results differ from {reference[0]} at {count} alerts"
+
+            if args.json:
+                print(json.dumps(stats))
+                continue
+            print(
+                f"alerts={count:<8} engine={engine:<9} build={stats['build_ms']:9.1f}ms "
+                f"mem={stats['memory_mb']:7.1f}MB p50={stats['p50_us']:9.1f}us "
+                f"p90={stats['p90_us']:9.1f}us p99={stats['p99_us']:9.1f}us "
+                f"match={stats['assets_per_sec']:9.1f}/s batch={stats['batch_assets_per_sec']:9.1f}/s "
+                f"matches={stats['matches']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark sharded multi-process matching against the single-process engine.
+
+Run from the alert-processor directory (no database or network needed):
+
+    python -m benchmarks.bench_parallel --alerts 100000 1000000 --assets 5000 --workers 1 2 4 8
+
+For each alert set size the single-process engine (--engine) matches the
+listings with ``match_batch`` in chunks of --batch assets, then a
+``ShardedMatcher`` running the same engine in each worker does the same
+for every worker count. It reports setup time (build, or shared-memory
+encode plus worker start-up), batch throughput and the speedup over the
+single process, and asserts that every run returns the same matches.
+"""
+
+import argparse
+import time
+
+from src.matcher import IN_PROCESS_ENGINES, build_index
+from src.parallel import ShardedMatcher, default_workers
+
+from . import corpus
+
+
+def _ids(results: dict) -> dict[int, list[str]]:
+    """Reduce match results to comparable alert ids per asset."""
+    return {asset_idx: [a.id for a in alerts] for asset_idx, alerts in results.items()}
+
+
+def _throughput(index, listings: list, batch: int, repeat: int) -> tuple[float, dict]:
+    """Assets per second of match_batch over the listings, and the last pass's results."""
+    results: dict = {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = {}
+        for offset in range(0, len(listings), batch):
+            results.update(index.match_batch(listings[offset:offset + batch]))
+    return len(listings) * repeat / (time.perf_counter() - start), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--assets", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500, help="assets per match_batch call")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="worker counts (default 1, 2, 4 ... CPUs)")
+    parser.add_argument("--engine", default="index", choices=IN_PROCESS_ENGINES)
+    parser.add_argument("--start-method", default="spawn", choices=["spawn", "forkserver", "fork"])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    worker_counts = args.workers
+    if worker_counts is None:
+        cpus = default_workers()
+        worker_counts = sorted({1, cpus} | {2**i for i in range(1, cpus.bit_length()) if 2**i <= cpus})
+    listings = corpus.assets(args.assets, seed=args.seed)
+
+    for count in args.alerts:
+        alert_set = corpus.alerts(count, seed=args.seed + 1)
+
+        start = time.perf_counter()
+        index = build_index(alert_set, args.engine)
+        setup_ms = (time.perf_counter() - start) * 1000
+        baseline, expected = _throughput(index, listings, args.batch, args.repeat)
+        expected = _ids(expected)
+        del index
+        print(
+            f"alerts={count:<8} {'single':<10} setup={setup_ms:9.1f}ms "
+            f"batch={baseline:10.1f}/s speedup=  1.00x matches={sum(len(v) for v in expected.values())}"
+        )
+
+        for workers in worker_counts:
+            start = time.perf_counter()
+            matcher = ShardedMatcher(alert_set, workers, args.engine, start_method=args.start_method)
+            setup_ms = (time.perf_counter() - start) * 1000
+            try:
+                rate, results = _throughput(matcher, listings, args.batch, args.repeat)
+            finally:
+                matcher.close()
+            assert _ids(results) == expected, (
+                f"{workers} workers disagree with the single-process {args.engine} engine"
+            )
+            print(
+                f"alerts={count:<8} {f'workers={workers}':<10} setup={setup_ms:9.1f}ms "
+                f"batch={rate:10.1f}/s speedup={rate / baseline:6.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Benchmark Postgres candidate filtering (ALERT_SOURCE=postgres) against the in-memory engines.
+
+Needs a reachable database with migration 0019 applied (same environment
+variables as the service). Run from the alert-processor directory:
+
+    python -m benchmarks.bench_pg_candidates --assets 200
+    python -m benchmarks.bench_pg_candidates --seed-alerts 10000 100000 --cleanup   # scratch databases only
+
+By default the alerts already in the database are used. --seed-alerts
+replaces the benchmark's own synthetic alerts (users ``bench-user-*``)
+with each corpus size before measuring; --cleanup deletes them at the end.
+
+"memory" engines pay for loading every alert and building the engine once
+per instance, then match in-process; "postgres" runs one candidate query
+per asset plus the final matches_alert check. Both must return the same
+matches.
+"""
+
+import argparse
+import gc
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import text
+
+from src.db import get_database
+from src.matcher import MATCH_ENGINES, build_index, matches_alert
+from src.repository import get_alerts, get_candidate_alerts
+
+from . import corpus
+
+BENCH_USER_PREFIX = "bench-user-"
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def _delete_bench_alerts(conn) -> None:
+    """Remove the benchmark's users; their alerts and alert_terms rows cascade."""
+    conn.execute(text("DELETE FROM users WHERE id LIKE :prefix"), {"prefix": f"{BENCH_USER_PREFIX}%"})
+
+
+def _seed(count: int) -> None:
+    """Replace the benchmark alerts with a corpus of the given size, owned by consenting users."""
+    alerts = corpus.alerts(count, seed=7)
+    user_ids = sorted({alert.user_id for alert in alerts})
+    with get_database().get_connection() as conn:
+        _delete_bench_alerts(conn)
+        conn.execute(
+            text("""
+                INSERT INTO users (id, email, provider, provider_id, email_consent)
+                VALUES (:id, :email, 'bench', :id, true)
+            """),
+            [{"id": f"{BENCH_USER_PREFIX}{user_id}", "email": f"{user_id}@bench.example.com"} for user_id in user_ids],
+        )
+        conn.execute(
+            text("""
+                INSERT INTO alerts (id, user_id, name, match_strings, match_all, max_price,
+                                    bottled_year_min, bottled_year_max, age_min, age_max)
+                VALUES (:id, :user_id, :name, :match_strings, :match_all, :max_price,
+                        :bottled_year_min, :bottled_year_max, :age_min, :age_max)
+            """),
+            [
+                {
+                    "id": f"bench-{alert.id}", "user_id": f"{BENCH_USER_PREFIX}{alert.user_id}", "name": alert.name,
+                    "match_strings": alert.match_strings, "match_all": alert.match_all, "max_price": alert.max_price,
+                    "bottled_year_min": alert.bottled_year_min, "bottled_year_max": alert.bottled_year_max,
+                    "age_min": alert.age_min, "age_max": alert.age_max,
+                }
+                for alert in alerts
+            ],
+        )
+        conn.execute(text("ANALYZE alerts"))
+        conn.execute(text("ANALYZE alert_terms"))
+        conn.commit()
+
+
+def _report(
+    label: str, alert_count: int, setup_ms: float, memory_mb: float, latencies: list[float], matches: int
+) -> None:
+    latencies.sort()
+    print(
+        f"alerts={alert_count:<8} {label:<10} setup={setup_ms:9.1f}ms memory={memory_mb:7.1f}MB "
+        f"p50={_percentile(latencies, 50):8.1f}us p90={_percentile(latencies, 90):8.1f}us "
+        f"p99={_percentile(latencies, 99):8.1f}us assets/s={1e6 / statistics.fmean(latencies):9.1f} "
+        f"matches={matches}"
+    )
+
+
+def _run(listings: list, engines: list[str]) -> None:
+    """Measure every engine and the Postgres source on the alerts currently in the database."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    alerts = get_alerts()
+    load_ms = (time.perf_counter() - start) * 1000
+    alerts_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    expected = None
+    for engine in engines:
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        index = build_index(alerts, engine)
+        build_ms = (time.perf_counter() - start) * 1000
+        engine_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies = []
+        results = {}
+        for asset in listings:
+            start = time.perf_counter_ns()
+            results[asset.asset_idx] = sorted(str(alert.id) for alert in index.match(asset))
+            latencies.append((time.perf_counter_ns() - start) / 1e3)
+        if expected is None:
+            expected = results
+        assert results == expected, f"{engine} disagrees with {engines[0]}"
+        _report(
+            f"memory:{engine}", len(alerts), load_ms + build_ms, (alerts_bytes + engine_bytes) / 2**20,
+            latencies, sum(len(v) for v in results.values()),
+        )
+
+    latencies = []
+    candidates = 0
+    results = {}
+    for asset in listings:
+        start = time.perf_counter_ns()
+        found = get_candidate_alerts(asset)
+        results[asset.asset_idx] = sorted(str(alert.id) for alert in found if matches_alert(alert, asset))
+        latencies.append((time.perf_counter_ns() - start) / 1e3)
+        candidates += len(found)
+    assert expected is None or results == expected, "postgres candidates disagree with the in-memory engines"
+    matches = sum(len(v) for v in results.values())
+    _report("postgres", len(alerts), 0.0, 0.0, latencies, matches)
+    print(f"alerts={len(alerts):<8} postgres candidates={candidates} false positives={candidates - matches}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", type=int, default=200)
+    parser.add_argument("--seed-alerts", type=int, nargs="+", default=None,
+                        help="synthetic alert set sizes to load first")
+    parser.add_argument("--engines", nargs="+", default=["index", "columnar"], choices=MATCH_ENGINES)
+    parser.add_argument("--cleanup", action="store_true", help="delete the synthetic alerts afterwards")
+    args = parser.parse_args()
+
+    listings = corpus.assets(args.assets, seed=11)
+    try:
+        for count in args.seed_alerts or [None]:
+            if count is not None:
+                _seed(count)
+            _run(listings, args.engines)
+    finally:
+        if args.cleanup:
+            with get_database().get_connection() as conn:
+                _delete_bench_alerts(conn)
+                conn.commit()
+
+
+if __name__ == "__main__":
+    main()
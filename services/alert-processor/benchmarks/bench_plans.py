@@ -0,0 +1,93 @@
+"""Benchmark precompiled alert plans against per-asset normalization.
+
+Run from the alert-processor directory:
+
+    python -m benchmarks.bench_plans --alerts 10000 100000 --assets 200
+
+"before" re-normalizes every alert's match strings and checks every limit
+for each asset, as matches_alert did before plans; "after" runs the
+compiled plans. Memory is traced while building the alerts, with the share
+taken by the plans reported separately.
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from src.models import Alert, Asset
+from src.normalize import normalize_text
+from src.plan import compile_plan
+
+from . import corpus
+
+
+def _legacy_matches_alert(alert: Alert, asset: Asset) -> bool:
+    """matches_alert as it was before plans were compiled at load time (normalizing per call)."""
+    if alert.match_strings:
+        name = normalize_text(asset.name)
+        required_terms = [term for term in (normalize_text(s) for s in alert.match_strings) if term]
+        if required_terms:
+            if alert.match_all:
+                if not all(term in name for term in required_terms):
+                    return False
+            elif not any(term in name for term in required_terms):
+                return False
+
+    if alert.max_price is not None and asset.price is not None and asset.price > alert.max_price:
+        return False
+    for low, high, value in (
+        (alert.bottled_year_min, alert.bottled_year_max, asset.bottled_year),
+        (alert.age_min, alert.age_max, asset.age),
+    ):
+        if low is not None and (value is None or value < low):
+            return False
+        if high is not None and (value is None or value > high):
+            return False
+    return True
+
+
+def _traced(build) -> tuple[object, int]:
+    """Return build()'s result and the bytes still allocated by it."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--assets", type=int, default=200)
+    args = parser.parse_args()
+
+    listings = corpus.assets(args.assets, seed=1)
+
+    for count in args.alerts:
+        alert_set, alerts_bytes = _traced(lambda: corpus.alerts(count, seed=2))
+        _, plans_bytes = _traced(lambda: [compile_plan(alert) for alert in alert_set])
+
+        start = time.perf_counter()
+        before = [[a for a in alert_set if _legacy_matches_alert(a, asset)] for asset in listings]
+        before_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        after = []
+        for asset in listings:
+            after.append([a for a in alert_set if a.plan.matches(asset, asset.name_normalized)])
+        after_sec = time.perf_counter() - start
+
+        assert before == after, "plans disagree with the legacy matcher"
+
+        print(
+            f"alerts={count:<8} before={before_sec / len(listings) * 1000:8.2f}ms/asset "
+            f"after={after_sec / len(listings) * 1000:8.2f}ms/asset "
+            f"speedup={before_sec / after_sec:5.2f}x "
+            f"alert_bytes={alerts_bytes / count:7.0f} plan_bytes={plans_bytes / count:6.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark adaptive predicate ordering against the fixed plan order.
+
+Run from the alert-processor directory (no database or network needed):
+
+    python -m benchmarks.bench_predicate_order --alerts 1000 10000 --assets 2000
+
+For each alert set size the listings are matched three times with the
+linear engine: with the plans' default check order, with a
+``PredicateOrdering`` learning the order as it goes (sampling one asset in
+--sample-every), and again with the order it settled on but no sampling.
+Every run must return the same alerts for every listing as the default
+order and as the index engine, otherwise the run fails. The learned order
+and the per-predicate rejection counters are printed with the timings.
+"""
+
+import argparse
+import json
+import time
+
+from src.matcher import LinearIndex, build_index
+from src.plan import PREDICATES, compile_plan
+from src.selectivity import PredicateOrdering
+
+from . import corpus
+
+
+def _ids(results: dict) -> dict[int, list[str]]:
+    """Reduce match results to comparable alert ids per asset."""
+    return {asset_idx: [a.id for a in alerts] for asset_idx, alerts in results.items()}
+
+
+def _run(index, listings: list, repeat: int) -> tuple[float, dict]:
+    """Assets per second of index.match over the listings, and the last pass's results."""
+    results: dict = {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = {asset.asset_idx: index.match(asset) for asset in listings}
+    return len(listings) * repeat / (time.perf_counter() - start), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--assets", type=int, default=2000)
+    parser.add_argument("--sample-every", type=int, default=100)
+    parser.add_argument("--adapt-every", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--stats", action="store_true", help="print the full counter report as JSON")
+    args = parser.parse_args()
+
+    listings = corpus.assets(args.assets, seed=args.seed)
+    for count in args.alerts:
+        alert_set = corpus.alerts(count, seed=args.seed + 1)
+        expected = _ids(build_index(alert_set, "index").match_batch(listings))
+
+        for alert in alert_set:
+            alert.plan = compile_plan(alert)
+        baseline, results = _run(LinearIndex(alert_set), listings, args.repeat)
+        assert _ids(results) == expected, "default predicate order disagrees with the index engine"
+        print(
+            f"alerts={count:<8} {'default':<10} rate={baseline:10.1f}/s speedup=  1.00x "
+            f"order={' > '.join(PREDICATES)}"
+        )
+
+        ordering = PredicateOrdering(sample_every=args.sample_every, adapt_every=args.adapt_every)
+        rate, results = _run(LinearIndex(alert_set, ordering), listings, args.repeat)
+        assert _ids(results) == expected, "adaptive predicate order changed the matches"
+        print(
+            f"alerts={count:<8} {'adaptive':<10} rate={rate:10.1f}/s speedup={rate / baseline:6.2f}x "
+            f"order={' > '.join(ordering.order)} adaptations={ordering.adaptations}"
+        )
+
+        learned = PredicateOrdering(sample_every=0)
+        learned.order = ordering.order
+        rate, results = _run(LinearIndex(alert_set, learned), listings, args.repeat)
+        assert _ids(results) == expected, "learned predicate order changed the matches"
+        print(f"alerts={count:<8} {'learned':<10} rate={rate:10.1f}/s speedup={rate / baseline:6.2f}x")
+        if args.stats:
+            print(json.dumps(ordering.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
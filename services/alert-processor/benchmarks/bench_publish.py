@@ -0,0 +1,77 @@
+"""Benchmark match fan-out: one blocking publish per match vs batched publish_matches.
+
+Runs offline against LocalPublisher, which simulates a fixed round trip per
+batch. Run from the alert-processor directory:
+
+    python -m benchmarks.bench_publish --matches 10 100 500 --round-trip-ms 20
+"""
+
+import argparse
+import time
+
+from src.models import Alert, Asset
+from src.pubsub import _encode_match, publish_matches
+
+from .fakes import LocalPublisher
+
+
+def _alerts(count: int) -> list[Alert]:
+    """Build placeholder alerts to publish matches for."""
+    return [
+        Alert(
+            id=f"alert-{i}", user_id=f"user-{i}", user_email=f"user{i}@example.com", name=f"Alert {i}",
+            match_strings=["bourbon"], match_all=False, max_price=None,
+            bottled_year_min=None, bottled_year_max=None, age_min=None, age_max=None,
+        )
+        for i in range(count)
+    ]
+
+
+def _sequential(publisher: LocalPublisher, asset: Asset, matches: list[tuple[Alert, int]]) -> None:
+    """The old pattern: publish one match and wait for it before the next."""
+    topic_path = publisher.topic_path("bench", "alert-matches")
+    for alert, match_idx in matches:
+        data = _encode_match(alert.id, alert.user_id, asset, match_idx, alert.name, alert.user_email)
+        publisher.publish(topic_path, data, event_type="baxus_listing_alert").result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--round-trip-ms", type=float, default=20.0)
+    parser.add_argument("--batch-max-messages", type=int, default=100)
+    parser.add_argument("--batch-max-latency-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    asset = Asset(
+        asset_idx=1, activity_idx=1, name="Buffalo Trace Kentucky Straight Bourbon", price=29.99,
+        bottled_year=2020, age=8, url="https://baxpro.xyz/asset/1",
+    )
+
+    for count in args.matches:
+        matches = [(alert, i + 1) for i, alert in enumerate(_alerts(count))]
+        results = {}
+        for label, run in (("sequential", _sequential), ("batched", publish_matches)):
+            publisher = LocalPublisher(
+                round_trip_sec=args.round_trip_ms / 1000,
+                max_messages=args.batch_max_messages,
+                max_latency=args.batch_max_latency_ms / 1000,
+            )
+            start = time.perf_counter()
+            if label == "sequential":
+                run(publisher, asset, matches)
+            else:
+                errors = run(asset, matches, publisher=publisher)
+                assert not errors, errors
+            elapsed = time.perf_counter() - start
+            assert len(publisher.published) == count
+            results[label] = elapsed
+            print(
+                f"matches={count:<6} {label:<10} total={elapsed * 1000:9.1f}ms "
+                f"throughput={count / elapsed:9.0f} msg/s batches={publisher.batches}"
+            )
+        print(f"matches={count:<6} speedup={results['sequential'] / results['batched']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark materializing the alert set: database rows vs a snapshot.
+
+Runs offline. "rows" materializes tuples shaped like the get_alerts()
+result (standing in for the driver's fetchall; the query round trip itself
+is not included) and builds alerts with Alert.from_row; "snapshot" decodes
+a msgpack snapshot of the same alerts. Run from the alert-processor
+directory:
+
+    python -m benchmarks.bench_snapshot --alerts 10000 100000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import msgpack
+
+from src.models import Alert
+from src.repository import ALERT_COLUMNS
+from src.snapshot import decode_snapshot, encode_snapshot
+
+from . import corpus
+
+
+def _measure(build) -> tuple[list, float, int]:
+    """Time build(), then trace the memory it retains in a second run."""
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    for count in args.alerts:
+        alerts = corpus.alerts(count, seed=2)
+        rows = msgpack.packb([[getattr(alert, column) for column in ALERT_COLUMNS] for alert in alerts])
+        data = encode_snapshot(alerts, version=1)
+
+        from_rows, rows_sec, rows_bytes = _measure(
+            lambda: [Alert.from_row(row, ALERT_COLUMNS) for row in msgpack.unpackb(rows, use_list=False)]
+        )
+        (from_snapshot, version), snapshot_sec, snapshot_bytes = _measure(lambda: decode_snapshot(data))
+
+        assert version == 1
+        assert from_snapshot == from_rows, "snapshot does not round-trip the alert set"
+
+        print(
+            f"alerts={count:<8} rows={rows_sec * 1000:8.1f}ms ({rows_bytes / count:5.0f} B/alert) "
+            f"snapshot={snapshot_sec * 1000:8.1f}ms ({snapshot_bytes / count:5.0f} B/alert) "
+            f"file={len(data) / 2**20:6.2f}MB speedup={rows_sec / snapshot_sec:4.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Benchmark the streaming-pull worker against one process_listing call per message.
+
+Needs a reachable database with alerts (same environment variables as the
+service). Messages come from the in-process ``LocalSubscriber`` and matches
+go to ``LocalPublisher``, so no Pub/Sub access is needed. Run from the
+alert-processor directory:
+
+    NOTIFY_THROTTLE=false python -m benchmarks.bench_worker --events 2000 --batch-size 1 100 500
+
+The same synthetic listings (``benchmarks/corpus.py``) are first handled
+one message at a time by ``main.process_listing``, as push deliveries to
+the Cloud Function would be, then pulled by a ``ListingWorker`` once per
+--batch-size, each run under its own activity_idx range. --duplicates adds
+redelivered copies of some messages, which the worker must ack without
+recording them again. Every run must ack every message and record the same
+number of matches as the per-message baseline, otherwise it fails. Reported
+per run: messages per second, speedup, batches and the most messages leased
+at once (bounded by --max-messages). Rows written to alert_matches and
+processed_messages are deleted afterwards. Leave NOTIFY_THROTTLE off so the
+runs do not use up the alert owners' notification budgets.
+"""
+
+import argparse
+import base64
+import json
+import logging
+import random
+import threading
+import time
+
+from cloudevents.http import CloudEvent
+from sqlalchemy import text
+
+import main as processor
+from src import pubsub
+from src.db import get_database
+from src.worker import ListingWorker
+
+from . import corpus
+from .fakes import LocalPublisher, LocalSubscriber
+
+# activity_idx range used for generated listings (below the integer column's maximum)
+ACTIVITY_BASE = 2_100_000_000
+
+
+def _payloads(count: int, seed: int) -> list[bytes]:
+    """Encode synthetic listings as baxus-monitor publishes them."""
+    return [
+        json.dumps({
+            "asset_idx": asset.asset_idx,
+            "name": asset.name,
+            "price": asset.price,
+            "bottled_year": asset.bottled_year,
+            "age": asset.age,
+        }).encode()
+        for asset in corpus.assets(count, seed=seed)
+    ]
+
+
+def _match_count(first_activity: int, count: int) -> int:
+    """Matches recorded for an activity_idx range."""
+    conn = get_database().get_connection()
+    try:
+        return conn.execute(
+            text("SELECT count(*) FROM alert_matches WHERE activity_idx >= :lo AND activity_idx < :hi"),
+            {"lo": first_activity, "hi": first_activity + count},
+        ).scalar()
+    finally:
+        conn.close()
+
+
+def _per_message(payloads: list[bytes], first_activity: int) -> float:
+    """Run every listing through process_listing as its own CloudEvent; returns messages per second."""
+    start = time.perf_counter()
+    for i, data in enumerate(payloads):
+        activity_idx = first_activity + i
+        message = {
+            "data": base64.b64encode(data).decode(),
+            "attributes": {"event_type": "new_listing", "external_id": str(activity_idx)},
+        }
+        processor.process_listing(CloudEvent(
+            {
+                "id": f"bench-{activity_idx}",
+                "type": "google.cloud.pubsub.topic.v1.messagePublished",
+                "source": "bench",
+            },
+            {"message": message},
+        ))
+    return len(payloads) / (time.perf_counter() - start)
+
+
+def _pulled(
+    payloads: list[bytes], first_activity: int, args, batch_size: int
+) -> tuple[float, ListingWorker, LocalSubscriber]:
+    """Pull every listing (plus redelivered copies) through a ListingWorker; returns messages per second."""
+    subscriber = LocalSubscriber()
+    rng = random.Random(args.seed)
+    sent = 0
+    for i, data in enumerate(payloads):
+        copies = 2 if rng.random() < args.duplicates else 1
+        for _ in range(copies):
+            subscriber.put(data, event_type="new_listing", external_id=str(first_activity + i))
+            sent += 1
+
+    worker = ListingWorker(
+        subscriber, subscriber.subscription_path("bench", "listings"), batch_size=batch_size,
+        batch_latency_sec=args.batch_latency, max_messages=args.max_messages, max_bytes=10_000_000,
+    )
+    start = time.perf_counter()
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    drained = subscriber.wait_drained(timeout=args.timeout)
+    elapsed = time.perf_counter() - start
+    worker.stop()
+    thread.join()
+    assert drained, f"worker did not ack every message within {args.timeout}s"
+    assert len(subscriber.acked) == sent, f"acked {len(subscriber.acked)} of {sent} messages"
+    return sent / elapsed, worker, subscriber
+
+
+def _cleanup() -> None:
+    """Delete the rows the generated listings wrote."""
+    conn = get_database().get_connection()
+    try:
+        for table in ("alert_matches", "processed_messages"):
+            conn.execute(text(f"DELETE FROM {table} WHERE activity_idx >= :base"), {"base": ACTIVITY_BASE})
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000, help="distinct listings per run")
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 100, 500])
+    parser.add_argument("--batch-latency", type=float, default=0.05, help="worker batch fill timeout (seconds)")
+    parser.add_argument("--max-messages", type=int, default=1000, help="flow control: leased, unacked messages")
+    parser.add_argument("--duplicates", type=float, default=0.05, help="fraction of listings delivered twice")
+    parser.add_argument("--publish-round-trip", type=float, default=0.02,
+                        help="simulated publish round trip (seconds)")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="keep the rows written by the generated listings")
+    args = parser.parse_args()
+
+    # Per-message INFO logs would dominate the measurement (get_logger() resets levels, so disable globally)
+    logging.disable(logging.INFO)
+    # The shared publisher is created on first use; install the offline stand-in in its place
+    pubsub._publisher = LocalPublisher(round_trip_sec=args.publish_round_trip)
+    payloads = _payloads(args.events, args.seed)
+
+    try:
+        baseline = _per_message(payloads, ACTIVITY_BASE)
+        expected = _match_count(ACTIVITY_BASE, args.events)
+        print(f"{'per-message':<16} rate={baseline:8.1f}/s speedup= 1.00x matches={expected}")
+
+        for run, batch_size in enumerate(args.batch_size, start=1):
+            first_activity = ACTIVITY_BASE + run * args.events
+            rate, worker, subscriber = _pulled(payloads, first_activity, args, batch_size)
+            matches = _match_count(first_activity, args.events)
+            assert matches == expected, f"batch_size={batch_size} recorded {matches} matches, expected {expected}"
+            stats = worker.stats()
+            print(
+                f"{f'batch_size={batch_size}':<16} rate={rate:8.1f}/s speedup={rate / baseline:5.2f}x "
+                f"matches={matches} batches={stats['batches']} duplicates={stats['duplicates']} "
+                f"max_leased={subscriber.max_outstanding}"
+            )
+    finally:
+        if not args.keep:
+            _cleanup()
+
+
+if __name__ == "__main__":
+    main()
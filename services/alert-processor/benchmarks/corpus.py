@@ -0,0 +1,142 @@
+"""Synthetic alert and listing corpora for the matcher benchmarks."""
+
+import json
+import random
+from pathlib import Path
+
+from src.models import Alert, Asset
+
+# Bottle names published by baxus-monitor, used as a seed vocabulary
+TOKENS_PATH = Path(__file__).resolve().parents[2] / "baxus-monitor" / "tokens.json"
+
+_BRANDS = [
+    "Buffalo Trace", "Eagle Rare", "Blanton's", "Weller", "Stagg", "E.H. Taylor", "Pappy Van Winkle",
+    "Old Rip Van Winkle", "Elijah Craig", "Heaven Hill", "Old Forester", "Woodford Reserve",
+    "Wild Turkey", "Russell's Reserve", "Four Roses", "Knob Creek", "Booker's", "Michter's",
+    "Willett", "Old Fitzgerald", "Larceny", "Maker's Mark", "Jack Daniel's", "Macallan",
+    "Lagavulin", "Ardbeg", "Yamazaki", "Hibiki",
+]
+_EXPRESSIONS = [
+    "Single Barrel", "Small Batch", "Barrel Proof", "Cask Strength", "Bottled in Bond", "Straight Rye",
+    "Kentucky Straight Bourbon", "Toasted Barrel", "Private Selection", "Limited Edition", "Full Proof",
+    "Store Pick", "Sherry Oak", "Double Cask", "Port Finish", "Antique Collection", "Birthday Bourbon",
+]
+_SIZES = ["", "", "", "750ml", "1 Liter", "1750ml", "375ml"]
+
+
+def _seed_names() -> list[str]:
+    """Return real bottle names from tokens.json (empty if it is not present)."""
+    if not TOKENS_PATH.exists():
+        return []
+    return [token["name"].strip() for token in json.loads(TOKENS_PATH.read_text())]
+
+
+def listing_names(count: int, seed: int = 0) -> list[str]:
+    """Generate listing names resembling Baxus bottle names."""
+    rng = random.Random(seed)
+    real = _seed_names()
+    names = []
+    for _ in range(count):
+        if real and rng.random() < 0.3:
+            names.append(rng.choice(real))
+            continue
+        parts = [rng.choice(_BRANDS)]
+        if rng.random() < 0.5:
+            parts.append(f"{rng.choice([6, 8, 10, 12, 15, 18, 20, 23, 25])} Year")
+        parts.append(rng.choice(_EXPRESSIONS))
+        if rng.random() < 0.3:
+            parts.append(str(rng.randint(1990, 2024)))
+        parts.append(rng.choice(_SIZES))
+        names.append(" ".join(p for p in parts if p))
+    return names
+
+
+def assets(count: int, seed: int = 0) -> list[Asset]:
+    """Generate listings with names, prices, bottled years and ages."""
+    rng = random.Random(seed)
+    result = []
+    for i, name in enumerate(listing_names(count, seed)):
+        result.append(Asset(
+            asset_idx=i + 1,
+            activity_idx=i + 1,
+            name=name,
+            price=None if rng.random() < 0.05 else round(rng.lognormvariate(5.5, 1.0), 2),
+            bottled_year=rng.randint(1960, 2024) if rng.random() < 0.6 else None,
+            age=rng.choice([6, 8, 10, 12, 15, 18, 23, 25]) if rng.random() < 0.5 else None,
+            url=None,
+        ))
+    return result
+
+
+# Limits of the alert form in the web app (client/src/components/AlertModal.tsx)
+MAX_MATCH_STRINGS = 5
+MAX_MATCH_STRING_LENGTH = 50
+
+# Round max prices as typed into the form; max_price is always set
+_MAX_PRICES = [50, 75, 100, 150, 200, 250, 300, 400, 500, 750, 1000, 1500, 2000, 2500, 5000, 10000]
+
+
+def _term(rng: random.Random, names: list[str]) -> str:
+    """Draw one alert match term the way users type them.
+
+    Mostly one to three consecutive words of a bottle name, sometimes a word
+    prefix ("blant"), a bare number ("12", "2019") or odd casing/whitespace.
+    """
+    words = rng.choice(names).split()
+    roll = rng.random()
+    long_words = [w for w in words if len(w) >= 4]
+    if roll < 0.1 and long_words:
+        word = rng.choice(long_words)
+        term = word[:rng.randint(3, len(word))]
+    elif roll < 0.15:
+        term = str(rng.choice([10, 12, 15, 18, 23, rng.randint(1990, 2023)]))
+    else:
+        start = rng.randrange(len(words))
+        term = " ".join(words[start:start + rng.choice([1, 1, 2, 2, 3])])
+    if rng.random() < 0.2:
+        term = rng.choice([term.lower(), term.upper(), f" {term} "])
+    return term[:MAX_MATCH_STRING_LENGTH]
+
+
+def _bounds(rng: random.Random, share: float, low: int, high: int, width: int) -> tuple[int | None, int | None]:
+    """Draw an optional (min, max) pair; either side may be left open."""
+    if rng.random() >= share:
+        return None, None
+    lower = rng.randint(low, high)
+    upper = lower + rng.randint(0, width)
+    side = rng.random()
+    if side < 0.3:
+        return lower, None
+    if side < 0.45:
+        return None, upper
+    return lower, upper
+
+
+def alerts(count: int, seed: int = 0) -> list[Alert]:
+    """Generate alerts shaped like those saved from the alert form.
+
+    One to five match strings (mostly one or two), a mix of any/all terms, an
+    always-set max_price, and optional bottled year and age ranges.
+    """
+    rng = random.Random(seed)
+    names = listing_names(500, seed + 1)
+    result = []
+    for i in range(count):
+        term_count = rng.choices(range(1, MAX_MATCH_STRINGS + 1), weights=[50, 28, 12, 6, 4])[0]
+        match_strings = [_term(rng, names) for _ in range(term_count)]
+        year_min, year_max = _bounds(rng, 0.15, 1970, 2020, 15)
+        age_min, age_max = _bounds(rng, 0.2, 6, 25, 10)
+        result.append(Alert(
+            id=f"alert-{i}",
+            user_id=f"user-{i % max(1, count // 3)}",
+            user_email=f"user{i}@example.com",
+            name=f"Alert {i}",
+            match_strings=match_strings,
+            match_all=term_count > 1 and rng.random() < 0.5,
+            max_price=rng.choice(_MAX_PRICES),
+            bottled_year_min=year_min,
+            bottled_year_max=year_max,
+            age_min=age_min,
+            age_max=age_max,
+        ))
+    return result
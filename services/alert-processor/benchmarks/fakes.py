@@ -0,0 +1,212 @@
+"""In-process stand-ins for the Pub/Sub clients, for benchmarks and tests.
+
+``LocalPublisher`` replaces ``PublisherClient`` (``get_publisher()``) and
+``LocalSubscriber`` replaces ``SubscriberClient`` (``get_subscriber()``), so
+the publishing paths and ``ListingWorker`` run without Pub/Sub access.
+Callers inject them: pass them as ``publisher=`` / ``subscriber``, or set
+``src.pubsub._publisher``.
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent import futures
+
+
+class LocalPublisher:
+    """In-process stand-in for PublisherClient, for offline benchmarks.
+
+    Mimics client-side batching: messages are buffered until ``max_messages``
+    are queued or ``max_latency`` has passed, then each batch costs one
+    simulated round trip of ``round_trip_sec`` before its futures resolve.
+    Published messages are kept in ``published``.
+    """
+
+    def __init__(self, round_trip_sec: float = 0.02, max_messages: int = 100, max_latency: float = 0.01):
+        self.round_trip_sec = round_trip_sec
+        self.max_messages = max_messages
+        self.max_latency = max_latency
+        self.published: list[tuple[str, bytes, dict]] = []
+        self.batches = 0
+        self._pending: list[tuple[futures.Future, tuple[str, bytes, dict]]] = []
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._message_id = 0
+
+    def topic_path(self, project: str, topic: str) -> str:
+        """Return the fully qualified topic path, like PublisherClient.topic_path."""
+        return f"projects/{project}/topics/{topic}"
+
+    def publish(self, topic: str, data: bytes, **attrs) -> futures.Future:
+        """Queue a message and return a future resolved when its batch is sent."""
+        future = futures.Future()
+        with self._lock:
+            self._pending.append((future, (topic, data, attrs)))
+            if len(self._pending) >= self.max_messages:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_latency, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def _flush(self) -> None:
+        """Send whatever is queued (max_latency timer callback)."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        """Hand the queued messages to a sender thread. Caller holds the lock."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            threading.Thread(target=self._send, args=(batch,), daemon=True).start()
+
+    def _send(self, batch) -> None:
+        """Simulate one round trip for the batch, then resolve its futures."""
+        time.sleep(self.round_trip_sec)
+        for future, message in batch:
+            with self._lock:
+                self.published.append(message)
+                self._message_id += 1
+                message_id = str(self._message_id)
+            future.set_result(message_id)
+
+
+class LocalMessage:
+    """A message delivered by LocalSubscriber, with the parts of the client's ``Message`` the worker uses."""
+
+    def __init__(self, subscriber: "LocalSubscriber", message_id: str, data: bytes, attributes: dict,
+                 delivery_attempt: int = 1):
+        self.message_id = message_id
+        self.data = data
+        self.attributes = attributes
+        self.delivery_attempt = delivery_attempt
+        self.size = len(data)
+        self._subscriber = subscriber
+        self._settled = False
+
+    def ack(self) -> None:
+        """Acknowledge the message; it is not delivered again."""
+        self._subscriber._settle(self, acked=True)
+
+    def nack(self) -> None:
+        """Return the message to the subscription for redelivery."""
+        self._subscriber._settle(self, acked=False)
+
+
+class LocalStreamingPull:
+    """Handle returned by LocalSubscriber.subscribe, like the client's ``StreamingPullFuture``."""
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def cancel(self) -> None:
+        """Stop delivering messages."""
+        self._cancelled.set()
+
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def done(self) -> bool:
+        return self._thread is not None and not self._thread.is_alive()
+
+    def result(self, timeout: float | None = None) -> None:
+        """Wait for the delivery thread to stop (after cancel)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+class LocalSubscriber:
+    """In-process stand-in for SubscriberClient streaming pull, for tests and offline benchmarks.
+
+    Messages added with ``put`` are handed to the subscribe callback from a
+    delivery thread, honouring the flow control's ``max_messages`` and
+    ``max_bytes``: delivery pauses while that many are leased and not yet
+    acked or nacked. Nacked messages go to the back of the queue and are
+    delivered again with ``delivery_attempt`` increased. Acked message ids
+    are kept in ``acked``.
+    """
+
+    def __init__(self):
+        self.acked: list[str] = []
+        self.nacked = 0
+        self.max_outstanding = 0
+        self._queue: deque[LocalMessage] = deque()
+        self._outstanding = 0
+        self._outstanding_bytes = 0
+        self._cond = threading.Condition()
+
+    def subscription_path(self, project: str, subscription: str) -> str:
+        """Return the fully qualified subscription path, like SubscriberClient.subscription_path."""
+        return f"projects/{project}/subscriptions/{subscription}"
+
+    def put(self, data: bytes, message_id: str | None = None, **attributes) -> str:
+        """Add a message to the subscription and return its id.
+
+        Passing the id of a message acked before simulates a redelivery after a lost ack.
+        """
+        with self._cond:
+            message = LocalMessage(self, message_id or uuid.uuid4().hex, data, attributes)
+            self._queue.append(message)
+            self._cond.notify_all()
+        return message.message_id
+
+    def subscribe(self, subscription: str, callback, flow_control=None) -> LocalStreamingPull:
+        """Start delivering messages to ``callback`` on a background thread."""
+        max_messages = getattr(flow_control, "max_messages", 0) or float("inf")
+        max_bytes = getattr(flow_control, "max_bytes", 0) or float("inf")
+        pull = LocalStreamingPull()
+        pull._thread = threading.Thread(
+            target=self._deliver, args=(callback, max_messages, max_bytes, pull), daemon=True
+        )
+        pull._thread.start()
+        return pull
+
+    def wait_drained(self, timeout: float | None = None) -> bool:
+        """Block until every message has been acked; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._outstanding, timeout)
+
+    def _deliver(self, callback, max_messages: float, max_bytes: float, pull: LocalStreamingPull) -> None:
+        """Hand queued messages to the callback while the flow control allows."""
+        while not pull.cancelled():
+            with self._cond:
+                ready = self._cond.wait_for(
+                    lambda: pull.cancelled() or (
+                        self._queue
+                        and self._outstanding < max_messages
+                        # A single message larger than max_bytes is still delivered on its own
+                        and (not self._outstanding or self._outstanding_bytes + self._queue[0].size <= max_bytes)
+                    ),
+                    timeout=0.1,
+                )
+                if not ready or pull.cancelled():
+                    continue
+                message = self._queue.popleft()
+                self._outstanding += 1
+                self._outstanding_bytes += message.size
+                self.max_outstanding = max(self.max_outstanding, self._outstanding)
+            callback(message)
+
+    def _settle(self, message: LocalMessage, acked: bool) -> None:
+        """Release a leased message, recording the ack or queueing the redelivery."""
+        with self._cond:
+            if message._settled:
+                return
+            message._settled = True
+            self._outstanding -= 1
+            self._outstanding_bytes -= message.size
+            if acked:
+                self.acked.append(message.message_id)
+            else:
+                self.nacked += 1
+                self._queue.append(LocalMessage(
+                    self, message.message_id, message.data, message.attributes, message.delivery_attempt + 1
+                ))
+            self._cond.notify_all()
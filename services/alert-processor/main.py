@@ -11,19 +11,113 @@ specifying a subdirectory for the entry module. All implementation code
 lives in src/ - this file is just a thin entry point that imports from there.
 """
 
+# Installed before anything else so IMPORT_PROFILE=1 sees every import
+from src import import_profile
+
+if import_profile.enabled():
+    import_profile.install()
+
 import base64
 import json
+import random
 
 import functions_framework
 from cloudevents.http import CloudEvent
 
+from src.alert_cache import alert_cache
+from src.async_pipeline import get_pipeline
 from src.config import config
+from src.dedupe import message_deduper
 from src.log import get_logger
-from src.matcher import find_matching_alerts
+from src.matcher import build_index, find_matching_alerts, match_batch, unique_asset_chunks
 from src import models
-from src.pubsub import publish_match
-from src.repository import get_alerts, insert_alert_match
+from src.pubsub import publish_digests, publish_matches
+from src.repository import (
+    get_alerts_by_id,
+    get_candidate_alerts,
+    insert_alert_matches,
+    iter_listed_assets,
+    replace_alert_assets,
+)
+from src.selectivity import match_alerts, predicate_ordering
+from src.throttle import notification_throttle
+from src.timing import StageTimer
+
 logger = get_logger()
+# Once per instance at cold start, not per message
+logger.info(config)
+
+# Heavy clients (SQLAlchemy, Pub/Sub, Cloud Logging, NumPy, asyncpg) are
+# imported on first use, so they show up in the first message's import profile
+import_profile.report("startup", logger)
+
+
+def _record_and_publish(asset: models.Asset, matching_alerts: list[models.Alert], timer: StageTimer) -> None:
+    """Insert the matches for an asset and publish the newly recorded ones."""
+    if config.async_pipeline:
+        # Inserts and publishes overlap in the pipeline, so they are timed as one stage
+        with timer.stage("insert_publish"):
+            get_pipeline().run([(asset, matching_alerts)])
+        return
+
+    # Record all matches in one statement; redelivered matches are skipped
+    matches = [
+        models.AlertMatch(
+            alert_id=alert.id,
+            listing_source="baxus",
+            activity_idx=asset.activity_idx,
+            asset_idx=asset.asset_idx,
+        )
+        for alert in matching_alerts
+    ]
+    try:
+        with timer.stage("insert"):
+            match_ids = insert_alert_matches(matches)
+        logger.info(f"Inserted {len(match_ids)} of {len(matches)} matches")
+    except Exception as e:
+        logger.warning(f"Failed to insert matches for asset {asset.asset_idx}: {e}")
+        raise
+
+    # Publish every new match concurrently; failures are reported per alert
+    new_matches = []
+    for alert in matching_alerts:
+        match_idx = match_ids.get(str(alert.id))
+        if not match_idx:
+            logger.info(f"Match for alert={alert.id} already recorded, skipping publish")
+            continue
+        new_matches.append((alert, match_idx))
+    if config.notify_throttle and new_matches:
+        # Matches over their user's budget go to the user's digest instead
+        with timer.stage("throttle"):
+            new_matches = notification_throttle.admit(new_matches)
+    with timer.stage("publish"):
+        publish_matches(asset, new_matches)
+
+
+def _match_candidates(asset: models.Asset, timer: StageTimer) -> tuple[list[models.Alert], int]:
+    """ALERT_SOURCE=postgres: fetch the asset's candidate alerts and confirm them with their plans.
+
+    The plans run in the learned predicate order (see ``src.selectivity``).
+
+    Returns:
+        tuple[list[Alert], int]: The matching alerts and the number of candidates.
+    """
+    try:
+        with timer.stage("alert_load"):
+            candidates = get_candidate_alerts(asset)
+    except Exception as e:
+        logger.warning(f"Failed to fetch candidate alerts: {e}")
+        raise
+    with timer.stage("match"):
+        matching_alerts = match_alerts(candidates, asset, predicate_ordering)
+    return matching_alerts, len(candidates)
+
+
+def _log_matching_alerts(matching_alerts: list[models.Alert]) -> None:
+    """Log each matching alert, for a sampled fraction of messages (ALERT_LOG_SAMPLE_RATE)."""
+    if matching_alerts and random.random() < config.alert_log_sample_rate:
+        for alert in matching_alerts:
+            logger.info(alert)
 
 
 @functions_framework.cloud_event
@@ -43,73 +137,295 @@ def process_listing(cloud_event: CloudEvent):
         "asset_json": {...}
     }
     """
-    logger.info(config)
+    timer = StageTimer()
     pubsub_message_id = cloud_event["id"]
     logger.info(f"Received CloudEvent ID: {pubsub_message_id}")
 
-    # Extract the Pub/Sub message
-    pubsub_message = cloud_event.data["message"]
+    with timer.stage("decode"):
+        # Extract the Pub/Sub message
+        pubsub_message = cloud_event.data["message"]
 
-    # 1. Decode the base64 data
-    payload_bytes = base64.b64decode(pubsub_message["data"])
-    payload = json.loads(payload_bytes.decode("utf-8"))
+        # 1. Decode the base64 data
+        payload_bytes = base64.b64decode(pubsub_message["data"])
+        payload = json.loads(payload_bytes.decode("utf-8"))
 
-    # 2. Extract attributes (these come from your publish() call)
-    attributes = pubsub_message.get("attributes", {})
-    event_type = attributes.get("event_type")
-    activity_idx = int(attributes.get("external_id"))
+        # 2. Extract attributes (these come from your publish() call)
+        attributes = pubsub_message.get("attributes", {})
+        event_type = attributes.get("event_type")
+        activity_idx = int(attributes.get("external_id"))
 
     logger.info(f"Processing {event_type} for record {activity_idx}")
 
-    asset_idx = payload.get("asset_idx", 0)
-    name = payload.get("name", "")
-    price = payload.get("price", 0.0)
-    bottled_year = payload.get("bottled_year", None)
-    age = payload.get("age", None)
-
+    # Redeliveries stop here, before any alert load or DB write
+    with timer.stage("dedupe"):
+        seen = message_deduper.seen(pubsub_message_id, activity_idx)
+    if seen:
+        logger.info(
+            f"Skipping already processed message_id={pubsub_message_id} "
+            f"activity_idx={activity_idx}, dedupe={message_deduper.stats()}"
+        )
+        timer.emit(
+            logger, "process_listing", message_id=pubsub_message_id, activity_idx=activity_idx, duplicate=True
+        )
+        return
 
     logger.info(
-        f"Processing: event_type={event_type}, asset_idx={asset_idx} message_id={pubsub_message_id}")
+        f"Processing: event_type={event_type}, asset_idx={payload.get('asset_idx', 0)} message_id={pubsub_message_id}")
 
-    # # Parse asset from message
-    asset = models.get_asset(asset_idx=asset_idx, name=name, price=price, bottled_year=bottled_year, age=age, activity_idx=activity_idx)
+    # Parse asset from message
+    asset = models.asset_from_payload(payload, activity_idx)
     logger.info(asset)
 
     # Fetch alerts and find matches
-    try:
-        alerts = get_alerts()
-        logger.info(f"Loaded {len(alerts)} alerts")
-    except Exception as e:
-        logger.warning(f"Failed to fetch alerts: {e}")
-        raise
+    if config.alert_source == "postgres":
+        matching_alerts, alert_count = _match_candidates(asset, timer)
+        logger.info(f"Loaded {alert_count} candidate alerts from Postgres, predicate_order={predicate_ordering.order}")
+    else:
+        try:
+            with timer.stage("alert_load"):
+                alert_set = alert_cache.get()
+            logger.info(f"Loaded {len(alert_set.alerts)} alerts, cache={alert_cache.stats()}")
+        except Exception as e:
+            logger.warning(f"Failed to fetch alerts: {e}")
+            raise
 
-    matching_alerts = find_matching_alerts(alerts, asset)
+        with timer.stage("match"):
+            matching_alerts = find_matching_alerts(alert_set.alerts, asset, index=alert_set.index)
+        alert_count = len(alert_set.alerts)
     logger.info(f"Found {len(matching_alerts)} matches for asset: {asset.name[:50]}")
-    for a in matching_alerts:
-        logger.info(a)
+    _log_matching_alerts(matching_alerts)
 
-    # Process each match
-    for alert in matching_alerts:
+    _record_and_publish(asset, matching_alerts, timer)
+    with timer.stage("dedupe"):
+        message_deduper.mark(pubsub_message_id, {activity_idx: len(matching_alerts)})
+
+    logger.info(f"Done. Matched {len(matching_alerts)} alerts. dedupe={message_deduper.stats()}")
+    timer.emit(
+        logger, "process_listing", message_id=pubsub_message_id, activity_idx=activity_idx,
+        asset_idx=asset.asset_idx, alert_source=config.alert_source, alert_count=alert_count,
+        match_count=len(matching_alerts),
+    )
+    import_profile.report("process_listing", logger)
+
+
+@functions_framework.cloud_event
+def process_listing_batch(cloud_event: CloudEvent):
+    """
+    Process a Pub/Sub CloudEvent carrying a batch of listings (catch-up runs, backfills).
+
+    All assets are matched against the alert set in one match_batch call.
+
+    Expected message format:
+    {
+        "assets": [
+            {
+                "asset_idx": 12345,
+                "activity_idx": 67890,
+                "name": "...",
+                "price": 123.45,
+                "bottled_year": 2020,
+                "age": 12
+            },
+            ...
+        ]
+    }
+    """
+    timer = StageTimer()
+    pubsub_message_id = cloud_event["id"]
+    logger.info(f"Received CloudEvent ID: {pubsub_message_id}")
+
+    with timer.stage("decode"):
+        pubsub_message = cloud_event.data["message"]
+        payload_bytes = base64.b64decode(pubsub_message["data"])
+        payload = json.loads(payload_bytes.decode("utf-8"))
+
+        assets = []
+        for item in payload.get("assets", []):
+            try:
+                assets.append(models.asset_from_payload(item, int(item["activity_idx"])))
+            except Exception as e:
+                logger.warning(f"Skipping malformed batch item {item!r}: {e}")
+
+    # Drop listings already processed (redelivered batches, overlapping backfills)
+    with timer.stage("dedupe"):
+        unseen = set(message_deduper.unseen(pubsub_message_id, [asset.activity_idx for asset in assets]))
+    skipped = len(assets) - sum(1 for asset in assets if asset.activity_idx in unseen)
+    assets = [asset for asset in assets if asset.activity_idx in unseen]
+    if not assets:
+        logger.info(
+            f"Skipping already processed batch message_id={pubsub_message_id}, "
+            f"dedupe={message_deduper.stats()}"
+        )
+        timer.emit(
+            logger, "process_listing_batch", message_id=pubsub_message_id, asset_count=0,
+            skipped_count=skipped, duplicate=True,
+        )
+        return
+
+    logger.info(
+        f"Processing batch of {len(assets)} assets ({skipped} already processed), "
+        f"message_id={pubsub_message_id}"
+    )
+
+    match_counts: dict[int, int] = {}
+    matched: list[tuple[models.Asset, list[models.Alert]]] = []
+    if config.alert_source == "postgres":
+        # One candidate query per asset; there is no alert set to batch against
+        alert_count = 0
+        for asset in assets:
+            matching_alerts, candidate_count = _match_candidates(asset, timer)
+            alert_count += candidate_count
+            match_counts[asset.activity_idx] = match_counts.get(asset.activity_idx, 0) + len(matching_alerts)
+            if matching_alerts:
+                matched.append((asset, matching_alerts))
+        logger.info(f"Loaded {alert_count} candidate alerts from Postgres, predicate_order={predicate_ordering.order}")
+    else:
         try:
-            match_idx = insert_alert_match(
-                alert_id=alert.id,
-                listing_source="baxus",
-                activity_idx=asset.activity_idx,
-                asset_idx=asset.asset_idx
-            )
-            logger.info(f"Inserted match id={match_idx} for alert={alert.id}")
-
-            if match_idx:
-                publish_match(
-                    alert_id=alert.id,
-                    user_id=alert.user_id,
-                    asset=asset,
-                    match_idx=match_idx,
-                    user_email=alert.user_email,
-                    alert_name=alert.name
-                )
+            with timer.stage("alert_load"):
+                alert_set = alert_cache.get()
+            logger.info(f"Loaded {len(alert_set.alerts)} alerts, cache={alert_cache.stats()}")
         except Exception as e:
-            logger.warning(f"Error processing match for alert {alert.id}: {e}")
-            continue
+            logger.warning(f"Failed to fetch alerts: {e}")
+            raise
+
+        with timer.stage("match"):
+            for chunk in unique_asset_chunks(assets):
+                matches_by_asset = match_batch(chunk, alert_set.index)
+                for asset in chunk:
+                    matching_alerts = matches_by_asset[asset.asset_idx]
+                    match_counts[asset.activity_idx] = match_counts.get(asset.activity_idx, 0) + len(matching_alerts)
+                    if matching_alerts:
+                        matched.append((asset, matching_alerts))
+        alert_count = len(alert_set.alerts)
+
+    if config.async_pipeline:
+        # One pipeline run, so publishing for early assets overlaps inserts for later ones
+        with timer.stage("insert_publish"):
+            get_pipeline().run(matched)
+    else:
+        for asset, matching_alerts in matched:
+            _record_and_publish(asset, matching_alerts, timer)
+    with timer.stage("dedupe"):
+        message_deduper.mark(pubsub_message_id, match_counts)
+
+    logger.info(
+        f"Done. Matched {sum(match_counts.values())} alerts across {len(assets)} assets. "
+        f"dedupe={message_deduper.stats()}"
+    )
+    timer.emit(
+        logger, "process_listing_batch", message_id=pubsub_message_id, asset_count=len(assets),
+        skipped_count=skipped, alert_source=config.alert_source, alert_count=alert_count,
+        match_count=sum(match_counts.values()),
+    )
+    import_profile.report("process_listing_batch", logger)
+
+
+@functions_framework.cloud_event
+def process_alert_change(cloud_event: CloudEvent):
+    """
+    Process a Pub/Sub CloudEvent sent when alerts are created or edited.
+
+    Matches the alerts against every currently listed asset and replaces
+    their ``alert_assets`` rows and ``matching_assets_*`` summary. Listed
+    assets are streamed from a server-side cursor and matched in batches of
+    ALERT_CHANGE_BATCH_SIZE. Nothing is published: these listings are not
+    new, so no emails go out. Redeliveries simply recompute the same rows.
+
+    Expected message format:
+    {
+        "event_type": "alert_changed",
+        "alert_ids": ["...", ...]       (or "alert_id": "...")
+    }
+    """
+    timer = StageTimer()
+    pubsub_message_id = cloud_event["id"]
+    logger.info(f"Received CloudEvent ID: {pubsub_message_id}")
+
+    with timer.stage("decode"):
+        pubsub_message = cloud_event.data["message"]
+        payload_bytes = base64.b64decode(pubsub_message["data"])
+        payload = json.loads(payload_bytes.decode("utf-8"))
+        alert_ids = [str(alert_id) for alert_id in payload.get("alert_ids") or [payload.get("alert_id")] if alert_id]
+
+    try:
+        with timer.stage("alert_load"):
+            alerts = get_alerts_by_id(alert_ids)
+    except Exception as e:
+        logger.warning(f"Failed to fetch alerts {alert_ids}: {e}")
+        raise
+    if not alerts:
+        # Deleted alerts lose their alert_assets rows by cascade
+        logger.info(f"No alerts left to match for alert_ids={alert_ids}, message_id={pubsub_message_id}")
+        timer.emit(logger, "process_alert_change", message_id=pubsub_message_id, alert_count=0)
+        return
+
+    # A few alerts against many assets: the index engine builds in microseconds
+    index = build_index(alerts, "index")
+    activity_idxs: dict[str, list[int]] = {str(alert.id): [] for alert in alerts}
+    asset_count = 0
+    batches = iter_listed_assets(config.alert_change_batch_size)
+    while True:
+        with timer.stage("asset_load"):
+            assets = next(batches, None)
+        if assets is None:
+            break
+        asset_count += len(assets)
+        with timer.stage("match"):
+            matches_by_asset = index.match_batch(assets)
+            for asset in assets:
+                for alert in matches_by_asset[asset.asset_idx]:
+                    activity_idxs[str(alert.id)].append(asset.activity_idx)
+
+    summaries = {alert_id: _matching_assets_summary(len(found)) for alert_id, found in activity_idxs.items()}
+    try:
+        with timer.stage("insert"):
+            inserted = replace_alert_assets(list(activity_idxs), activity_idxs, summaries)
+    except Exception as e:
+        logger.warning(f"Failed to store listed matches for alerts {list(activity_idxs)}: {e}")
+        raise
+
+    logger.info(
+        f"Done. Matched {len(alerts)} alerts against {asset_count} listed assets, "
+        f"inserted {inserted} alert_assets rows: {summaries}"
+    )
+    timer.emit(
+        logger, "process_alert_change", message_id=pubsub_message_id, alert_count=len(alerts),
+        asset_count=asset_count, match_count=sum(len(found) for found in activity_idxs.values()),
+    )
+    import_profile.report("process_alert_change", logger)
+
+
+@functions_framework.cloud_event
+def flush_digests(cloud_event: CloudEvent):
+    """
+    Publish the digests whose coalescing window has passed.
+
+    Triggered every minute by Cloud Scheduler through the digest-flush topic,
+    so held-back matches go out whether or not more listings arrive. Digests
+    are claimed FOR UPDATE SKIP LOCKED, so overlapping runs send each one once.
+    Nothing is raised: digests that fail to publish are released and picked up
+    by the next run.
+    """
+    timer = StageTimer()
+    pubsub_message_id = cloud_event["id"]
+    logger.info(f"Received CloudEvent ID: {pubsub_message_id}")
+
+    with timer.stage("digests"):
+        sent = notification_throttle.flush(publish_digests)
+
+    logger.info(f"Done. Published {sent} digests. throttle={notification_throttle.stats()}")
+    timer.emit(logger, "flush_digests", message_id=pubsub_message_id, digest_count=sent)
+    import_profile.report("flush_digests", logger)
+
+
+def _matching_assets_summary(match_count: int) -> str:
+    """The matching_assets_string shown on an alert card.
+
+    Counts the listings available now, not every listing matched since
+    June 2025 ("N matches in the last M months") as the web app used to;
+    see "Alert changes" in the README.
+    """
+    if not match_count:
+        return "No matches"
+    return f"{match_count} match{'' if match_count == 1 else 'es'} listed now"
 
-    logger.info(f"Done. Matched {len(matching_alerts)} alerts.")
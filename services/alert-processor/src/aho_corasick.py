@@ -0,0 +1,105 @@
+"""Multi-pattern substring search (Aho-Corasick) for alert match terms."""
+
+from collections import deque
+
+try:
+    # Optional C implementation; the pure-Python automaton below is used without it
+    import ahocorasick
+except ImportError:  # pragma: no cover - depends on the installed packages
+    ahocorasick = None
+
+
+class _PyAutomaton:
+    """Pure-Python Aho-Corasick automaton.
+
+    States are indexes into parallel lists: ``_goto`` holds the trie edges,
+    ``_fail`` the failure links and ``_out`` the ids of every pattern that
+    ends at the state (including those inherited through failure links).
+    """
+
+    def __init__(self, patterns: list[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = next_state
+            self._out[state] += (pattern_id,)
+
+        # Breadth-first pass to wire failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> set[int]:
+        """Return the ids of every pattern that occurs in the text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class _NativeAutomaton:
+    """Wrapper around a pyahocorasick automaton with the same interface."""
+
+    def __init__(self, patterns: list[str]):
+        self._automaton = ahocorasick.Automaton()
+        for pattern_id, pattern in enumerate(patterns):
+            self._automaton.add_word(pattern, pattern_id)
+        self._empty = not patterns
+        if not self._empty:
+            self._automaton.make_automaton()
+
+    def find(self, text: str) -> set[int]:
+        """Return the ids of every pattern that occurs in the text."""
+        if self._empty:
+            return set()
+        return {pattern_id for _, pattern_id in self._automaton.iter(text)}
+
+
+class TermAutomaton:
+    """Compiled set of distinct terms searchable in a single pass.
+
+    Term ids are positions in ``terms``. Uses pyahocorasick when it is installed
+    unless ``native=False`` is passed, and the pure-Python automaton otherwise.
+    """
+
+    def __init__(self, terms: list[str], native: bool | None = None):
+        if any(not term for term in terms):
+            raise ValueError("TermAutomaton terms must be non-empty strings")
+        self.terms = terms
+        if native is None:
+            native = ahocorasick is not None
+        if native and ahocorasick is None:
+            raise RuntimeError("pyahocorasick is not installed")
+        self.native = native
+        self._automaton = _NativeAutomaton(terms) if native else _PyAutomaton(terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def find(self, text: str) -> set[int]:
+        """Return the ids of every term that occurs in the text."""
+        return self._automaton.find(text)
@@ -0,0 +1,185 @@
+"""Process-level alert cache shared across warm Cloud Function invocations."""
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from .config import config
+from .log import get_logger
+from .matcher import AlertMatcher, build_index
+from .models import Alert
+from .repository import get_alert_set_version, get_alerts
+from .snapshot import load_snapshot, save_snapshot
+
+logger = get_logger()
+
+
+@dataclass(frozen=True)
+class AlertSet:
+    """A loaded alert set and the matching engine compiled from it."""
+
+    alerts: list[Alert]
+    index: AlertMatcher
+    version: int | None
+    loaded_at: float
+
+
+class AlertCache:
+    """Keeps the alert set in memory between invocations on a warm instance.
+
+    Within ``ttl_sec`` of the last check the cached set is served as-is. After
+    that, the alert set version (bumped by triggers on ``alerts`` and ``users``)
+    is probed with a single-row query, and the full ``get_alerts()`` reload and
+    engine build (see ``build_index``) only happen when the version has moved.
+
+    With ``snapshot_uri`` set, a reload first tries the alert snapshot (see
+    ``src.snapshot``) stamped with the current version, and falls back to
+    ``get_alerts()``. After a database load the snapshot is rewritten, so the
+    next cold instance can skip the query.
+
+    Safe for concurrent requests on one instance: refreshes (version probe
+    and reload) are single-flight. While one request refreshes, the others
+    keep serving the current set (``stale_hits``), or, on a cold instance,
+    wait for that refresh and share its result (``coalesced``) instead of
+    each loading the alerts again.
+    """
+
+    def __init__(
+        self,
+        ttl_sec: float,
+        engine: str = "index",
+        loader: Callable[[], list[Alert]] = get_alerts,
+        version_probe: Callable[[], int | None] = get_alert_set_version,
+        snapshot_uri: str | None = None,
+    ):
+        self.ttl_sec = ttl_sec
+        self.engine = engine
+        self._loader = loader
+        self._version_probe = version_probe
+        self.snapshot_uri = snapshot_uri
+        self._entry: AlertSet | None = None
+        self._checked_at = 0.0
+        # Held by the one request refreshing the set; _refreshes counts finished refreshes
+        self._refresh_lock = threading.Lock()
+        self._refreshes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.probes = 0
+        self.reloads = 0
+        self.snapshot_loads = 0
+        self.last_reload_ms = 0.0
+        self.total_reload_ms = 0.0
+
+    def get(self) -> AlertSet:
+        """Return the current alert set, reloading it only if it changed."""
+        entry = self._entry
+        if entry is not None and time.monotonic() - self._checked_at < self.ttl_sec:
+            self.hits += 1
+            return entry
+
+        refreshes = self._refreshes
+        if entry is not None:
+            if not self._refresh_lock.acquire(blocking=False):
+                # Another request is refreshing; the current set stays valid until it is done
+                self.stale_hits += 1
+                return entry
+        else:
+            self._refresh_lock.acquire()
+        try:
+            entry = self._entry
+            if entry is not None and self._refreshes != refreshes:
+                # Refreshed by the request this one waited for
+                self.coalesced += 1
+                return entry
+            return self._refresh(entry)
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self, entry: AlertSet | None) -> AlertSet:
+        """Probe the version and reload if it moved (caller holds the refresh lock)."""
+        version = self._probe()
+        if entry is not None and version is not None and version == entry.version:
+            self.hits += 1
+            self._checked_at = time.monotonic()
+            self._refreshes += 1
+            return entry
+
+        self.misses += 1
+        entry = self._reload(version)
+        self._refreshes += 1
+        return entry
+
+    def invalidate(self) -> None:
+        """Drop the cached alert set so the next get() reloads it."""
+        self._entry = None
+
+    def stats(self) -> dict:
+        """Return cache counters for logging."""
+        entry = self._entry
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "coalesced": self.coalesced,
+            "probes": self.probes,
+            "reloads": self.reloads,
+            "snapshot_loads": self.snapshot_loads,
+            "last_reload_ms": round(self.last_reload_ms, 1),
+            "total_reload_ms": round(self.total_reload_ms, 1),
+            "version": entry.version if entry else None,
+            "alerts": len(entry.alerts) if entry else 0,
+        }
+
+    def _probe(self) -> int | None:
+        """Read the alert set version, or None if it cannot be read."""
+        self.probes += 1
+        try:
+            return self._version_probe()
+        except Exception as e:
+            logger.warning(f"Alert set version probe failed, forcing reload: {e}")
+            return None
+
+    def _reload(self, version: int | None) -> AlertSet:
+        """Load all alerts, rebuild the index and store them as the cached set."""
+        start = time.perf_counter()
+        # The version is read before loading, so a change made mid-load is
+        # picked up by the next probe rather than hidden by this reload
+        alerts = None
+        source = "database"
+        # A snapshot can only be trusted when the current version is known
+        if self.snapshot_uri and version is not None:
+            alerts = load_snapshot(self.snapshot_uri, version)
+        if alerts is not None:
+            source = "snapshot"
+            self.snapshot_loads += 1
+        else:
+            alerts = self._loader()
+            if self.snapshot_uri and version is not None:
+                save_snapshot(self.snapshot_uri, alerts, version)
+        index = build_index(alerts, self.engine)
+        entry = AlertSet(alerts=alerts, index=index, version=version, loaded_at=time.time())
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self._entry = entry
+        self._checked_at = time.monotonic()
+        self.reloads += 1
+        self.last_reload_ms = elapsed_ms
+        self.total_reload_ms += elapsed_ms
+
+        logger.info(
+            f"Alert cache reloaded from {source}: version={version}, alerts={len(alerts)}, "
+            f"took={elapsed_ms:.1f}ms"
+        )
+        return entry
+
+
+# Module-level instance so the cache survives across invocations on a warm instance
+alert_cache = AlertCache(
+    ttl_sec=config.alert_cache_ttl_sec,
+    engine=config.match_engine,
+    snapshot_uri=config.alert_snapshot_uri,
+)
@@ -0,0 +1,118 @@
+"""Inverted index over alert match strings."""
+
+from collections import Counter, defaultdict
+
+from .aho_corasick import TermAutomaton
+from .log import get_logger
+from .models import Alert, Asset
+from .range_index import RangeIndex
+
+logger = get_logger()
+
+
+class AlertIndex:
+    """Inverted index from match terms to the alerts that use them.
+
+    Built once from the ``get_alerts()`` result. Every distinct normalized term
+    across all alerts is compiled into a single Aho-Corasick automaton, so one
+    pass over the normalized asset name reports every term that hits. Hits are
+    then counted per alert through the term postings:
+
+    - any-term alerts pass the text stage with at least one hit
+    - match_all alerts pass when every one of their distinct terms hit
+    - alerts with no usable match strings sit in an always-candidate bucket
+
+    Text-stage survivors are intersected with the alerts whose price, year
+    and age limits pass (see ``RangeIndex``), so results are identical to a
+    linear ``find_matching_alerts`` scan, in the same order.
+    """
+
+    def __init__(self, alerts: list[Alert], native: bool | None = None):
+        self.alerts = alerts
+        self._always: list[int] = []
+        self._required: list[int] = []
+
+        term_ids: dict[str, int] = {}
+        postings: dict[int, list[int]] = defaultdict(list)
+
+        for position, alert in enumerate(alerts):
+            plan = alert.plan
+            terms = plan.terms
+            if not terms:
+                self._always.append(position)
+                self._required.append(0)
+                continue
+
+            self._required.append(len(terms) if plan.match_all else 1)
+            for term in terms:
+                term_id = term_ids.setdefault(term, len(term_ids))
+                postings[term_id].append(position)
+
+        self._automaton = TermAutomaton(list(term_ids), native=native)
+        self._postings = [postings[term_id] for term_id in range(len(term_ids))]
+        self._ranges = RangeIndex(alerts)
+
+        logger.info(
+            f"Built alert index: alerts={len(alerts)}, terms={len(term_ids)}, "
+            f"always_candidates={len(self._always)}, native={self._automaton.native}"
+        )
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def text_matches(self, name_normalized: str) -> list[int]:
+        """Return positions of alerts whose match strings pass, in alert order."""
+        hits: dict[int, int] = defaultdict(int)
+        postings = self._postings
+        for term_id in self._automaton.find(name_normalized):
+            for position in postings[term_id]:
+                hits[position] += 1
+
+        required = self._required
+        passed = [position for position, count in hits.items() if count >= required[position]]
+        passed.extend(self._always)
+        passed.sort()
+        return passed
+
+    def match(self, asset: Asset) -> list[Alert]:
+        """Find all alerts that match the given asset."""
+        candidates = self.text_matches(asset.name_normalized)
+        if not candidates:
+            return []
+        passing = self._ranges.matching(asset.price, asset.bottled_year, asset.age, candidates=candidates)
+        alerts = self.alerts
+        return [alerts[position] for position in candidates if position in passing]
+
+    def match_batch(self, assets: list[Asset]) -> dict[int, list[Alert]]:
+        """Match many assets, running the text stage once per repeated normalized name.
+
+        Bursts of relisted or identical bottles share the automaton pass and
+        the posting counts. When every name in the batch is distinct there is
+        nothing to share, and each asset simply goes through ``match``.
+
+        Returns:
+            dict[int, list[Alert]]: Matching alerts keyed by asset_idx. If an
+            asset_idx appears more than once, the last occurrence wins.
+        """
+        counts = Counter(asset.name_normalized for asset in assets)
+        if len(counts) == len(assets):
+            return {asset.asset_idx: self.match(asset) for asset in assets}
+
+        alerts = self.alerts
+        ranges = self._ranges
+        text_cache: dict[str, list[int]] = {}
+        results: dict[int, list[Alert]] = {}
+        for asset in assets:
+            name_normalized = asset.name_normalized
+            candidates = text_cache.get(name_normalized)
+            if candidates is None:
+                candidates = self.text_matches(name_normalized)
+                if counts[name_normalized] > 1:
+                    text_cache[name_normalized] = candidates
+            if not candidates:
+                results[asset.asset_idx] = []
+                continue
+            passing = ranges.matching(asset.price, asset.bottled_year, asset.age, candidates=candidates)
+            results[asset.asset_idx] = [alerts[position] for position in candidates if position in passing]
+
+        return results
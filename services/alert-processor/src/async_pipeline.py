@@ -0,0 +1,217 @@
+"""Asyncio insert-and-publish pipeline for matched listings."""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING
+
+from .config import config
+from .log import get_logger
+from .models import Alert, AlertMatch, Asset
+from .pubsub import get_publisher, submit_matches, wait_for_publishes
+
+if TYPE_CHECKING:
+    from .throttle import NotificationThrottle
+
+logger = get_logger()
+
+_INSERT_MATCHES_SQL = """
+    INSERT INTO alert_matches
+        (alert_id, listing_source, activity_idx, asset_idx)
+    SELECT *
+    FROM unnest($1::varchar[], $2::varchar[], $3::integer[], $4::integer[])
+    ON CONFLICT (alert_id, activity_idx) DO NOTHING
+    RETURNING alert_id, match_idx
+"""
+
+InsertMatches = Callable[[list[AlertMatch]], Awaitable[dict[str, int]]]
+
+
+def asyncpg_dsn(connection_string: str) -> str:
+    """Turn the SQLAlchemy connection string into a DSN asyncpg accepts.
+
+    asyncpg does not understand driver suffixes such as ``+psycopg2``; the
+    Cloud SQL socket form (``@/db?host=/cloudsql/...``) is accepted as is.
+    """
+    scheme, separator, rest = connection_string.partition("://")
+    if not separator:
+        return connection_string
+    return f"{scheme.split('+', 1)[0]}://{rest}"
+
+
+class AsyncMatchPipeline:
+    """Records and publishes matches on a background asyncio event loop.
+
+    Each asset's matches are split into chunks of ``chunk_size`` rows. Every
+    chunk is one bulk insert; as soon as it returns, its new rows are handed
+    to the batching publisher, so publishing overlaps the inserts still
+    running for later chunks and assets. At most ``concurrency`` inserts are
+    in flight at once.
+
+    Failures keep the sync path's semantics. A failed publish is logged and
+    reported for that alert only. A failed insert does not stop the other
+    chunks, but is re-raised once they finish so the message is redelivered.
+    With a ``throttle``, each chunk's new matches pass through
+    ``NotificationThrottle.admit`` before publishing, as on the sync path.
+
+    The Cloud Function handlers are synchronous, so ``run()`` submits work to
+    an event loop owned by a daemon thread; the loop and its asyncpg pool are
+    created on first use and reused across warm invocations.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = config.async_concurrency,
+        chunk_size: int = config.async_insert_chunk,
+        insert: InsertMatches | None = None,
+        publisher=None,
+        throttle: "NotificationThrottle | None" = None,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.chunk_size = max(1, chunk_size)
+        self._insert = insert or self._insert_asyncpg
+        self._publisher = publisher
+        self._throttle = throttle
+        self._pool = None
+        self._pool_lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_lock = threading.Lock()
+
+    def run(self, items: list[tuple[Asset, list[Alert]]]) -> dict[tuple[int, int], Exception]:
+        """Record and publish matches for several assets, blocking until done.
+
+        Args:
+            items: (asset, matching alerts) pairs.
+
+        Returns:
+            dict[tuple[int, int], Exception]: The error for each match whose
+            message failed to publish, keyed by (alert_id, asset_idx).
+        """
+        future = asyncio.run_coroutine_threadsafe(self.process(items), self._ensure_loop())
+        return future.result()
+
+    async def process(self, items: list[tuple[Asset, list[Alert]]]) -> dict[tuple[int, int], Exception]:
+        """Coroutine behind run(); usable directly from async code."""
+        publisher = self._publisher or get_publisher()
+        topic_path = publisher.topic_path(config.gcp_project_id, config.pubsub_topic)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        errors: dict[tuple[int, int], Exception] = {}
+        attempted: list[int] = []
+
+        async def record_chunk(asset: Asset, alerts: list[Alert]) -> None:
+            matches = [
+                AlertMatch(
+                    alert_id=alert.id,
+                    listing_source="baxus",
+                    activity_idx=asset.activity_idx,
+                    asset_idx=asset.asset_idx,
+                )
+                for alert in alerts
+            ]
+            async with semaphore:
+                match_ids = await self._insert(matches)
+            logger.info(f"Inserted {len(match_ids)} of {len(matches)} matches for asset_idx={asset.asset_idx}")
+
+            new_matches = []
+            for alert in alerts:
+                match_idx = match_ids.get(str(alert.id))
+                if not match_idx:
+                    logger.info(f"Match for alert={alert.id} already recorded, skipping publish")
+                    continue
+                new_matches.append((alert, match_idx))
+            if self._throttle is not None and new_matches:
+                # Token take and digest writes are blocking DB calls
+                new_matches = await asyncio.to_thread(self._throttle.admit, new_matches)
+            attempted.append(len(new_matches))
+
+            # The insert slot is already released; the chunk's futures are
+            # waited on in a worker thread while other chunks keep inserting
+            pending, chunk_errors = submit_matches(asset, new_matches, publisher, topic_path)
+            if pending:
+                chunk_errors.update(await asyncio.to_thread(wait_for_publishes, pending))
+            for alert_id, error in chunk_errors.items():
+                errors[(alert_id, asset.asset_idx)] = error
+
+        chunks = [
+            record_chunk(asset, alerts[start:start + self.chunk_size])
+            for asset, alerts in items
+            for start in range(0, len(alerts), self.chunk_size)
+        ]
+        results = await asyncio.gather(*chunks, return_exceptions=True)
+        insert_errors = [result for result in results if isinstance(result, BaseException)]
+
+        for (alert_id, asset_idx), error in errors.items():
+            logger.warning(f"Failed to publish match for alert={alert_id}, asset_idx={asset_idx}: {error}")
+        logger.info(
+            f"Published {sum(attempted) - len(errors)} of {sum(attempted)} matches to {config.pubsub_topic} "
+            f"across {len(items)} assets"
+        )
+
+        for error in insert_errors:
+            logger.warning(f"Failed to insert matches: {error}")
+        if insert_errors:
+            raise insert_errors[0]
+        return errors
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop thread on first use."""
+        if self._loop is None:
+            with self._loop_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="async-pipeline", daemon=True)
+                    thread.start()
+                    self._loop = loop
+        return self._loop
+
+    async def _insert_asyncpg(self, matches: list[AlertMatch]) -> dict[str, int]:
+        """Bulk insert matches with asyncpg; returns match_idx keyed by alert_id."""
+        pool = await self._get_pool()
+        rows = await pool.fetch(
+            _INSERT_MATCHES_SQL,
+            [str(m.alert_id) for m in matches],
+            [m.listing_source for m in matches],
+            [m.activity_idx for m in matches],
+            [m.asset_idx for m in matches],
+        )
+        return {row["alert_id"]: row["match_idx"] for row in rows}
+
+    async def _get_pool(self):
+        """Create the asyncpg pool on first use (on the pipeline's loop)."""
+        if self._pool is None:
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            async with self._pool_lock:
+                if self._pool is None:
+                    # Imported here so asyncpg is only loaded when the pipeline is enabled
+                    import asyncpg
+
+                    self._pool = await asyncpg.create_pool(
+                        asyncpg_dsn(config.get_db_connection_string()),
+                        min_size=1,
+                        max_size=self.concurrency,
+                    )
+                    logger.info(f"Created asyncpg pool: max_size={self.concurrency}")
+        return self._pool
+
+
+# Shared pipeline, created on first use and reused across warm invocations
+_pipeline: AsyncMatchPipeline | None = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline() -> AsyncMatchPipeline:
+    """Return the shared AsyncMatchPipeline, creating it on first use."""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                throttle = None
+                if config.notify_throttle:
+                    from .throttle import notification_throttle as throttle
+                _pipeline = AsyncMatchPipeline(throttle=throttle)
+                logger.info(
+                    f"Created async pipeline: concurrency={_pipeline.concurrency}, "
+                    f"chunk_size={_pipeline.chunk_size}"
+                )
+    return _pipeline
@@ -0,0 +1,227 @@
+"""Columnar (NumPy) alert matching engine."""
+
+import numpy as np
+
+from .aho_corasick import TermAutomaton
+from .log import get_logger
+from .models import Alert, Asset
+
+logger = get_logger()
+
+# Upper bound on the (assets x alerts) cells evaluated at once by match_batch
+_BATCH_CELLS = 4_000_000
+
+
+def _column(values: list, dtype=np.float64) -> np.ndarray:
+    """Build a float column with NaN for None."""
+    return np.array([np.nan if v is None else v for v in values], dtype=dtype)
+
+
+def _asset_column(values: list, none_value: float) -> np.ndarray:
+    """Build a float column of asset values, substituting ``none_value`` for None/NaN."""
+    column = _column(values)
+    column[np.isnan(column)] = none_value
+    return column
+
+
+def _passes_limits(price, year, age, max_price, year_min, year_max, age_min, age_max) -> np.ndarray:
+    """Element-wise numeric limit check; NaN limits always pass."""
+    with np.errstate(invalid="ignore"):
+        return (
+            (np.isnan(max_price) | (price <= max_price))
+            & (np.isnan(year_min) | (year_min <= year))
+            & (np.isnan(year_max) | (year <= year_max))
+            & (np.isnan(age_min) | (age_min <= age))
+            & (np.isnan(age_max) | (age <= age_max))
+        )
+
+
+class ColumnarAlerts:
+    """Alert set held as NumPy columns, matched with vectorized comparisons.
+
+    Numeric limits are float64 columns with NaN for "no limit". Match terms
+    are stored as a CSR-style sparse matrix from term id to alert position
+    (``term_indptr`` / ``term_indices``), fed by the same Aho-Corasick
+    automaton as ``AlertIndex``. Per-alert hit counts come from one
+    ``np.bincount`` and are compared with ``required`` (distinct terms for
+    match_all, 1 for any-term, 0 when the alert has no terms).
+
+    None handling follows ``matches_filters``: a missing asset price passes
+    every max_price (it is evaluated as -inf), while a missing bottled year or
+    age is NaN and so only passes alerts without that bound.
+    """
+
+    def __init__(self, alerts: list[Alert], native: bool | None = None):
+        self.alerts = alerts
+        size = len(alerts)
+
+        self.max_price = _column([a.max_price for a in alerts])
+        self.bottled_year_min = _column([a.bottled_year_min for a in alerts])
+        self.bottled_year_max = _column([a.bottled_year_max for a in alerts])
+        self.age_min = _column([a.age_min for a in alerts])
+        self.age_max = _column([a.age_max for a in alerts])
+        self.match_all = np.array([a.plan.match_all for a in alerts], dtype=bool)
+
+        term_ids: dict[str, int] = {}
+        postings: list[list[int]] = []
+        required = np.zeros(size, dtype=np.int32)
+        for position, alert in enumerate(alerts):
+            plan = alert.plan
+            terms = plan.terms
+            if not terms:
+                continue
+            required[position] = len(terms) if plan.match_all else 1
+            for term in terms:
+                term_id = term_ids.get(term)
+                if term_id is None:
+                    term_id = term_ids[term] = len(postings)
+                    postings.append([])
+                postings[term_id].append(position)
+
+        self.required = required
+        self.term_indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in postings], out=self.term_indptr[1:])
+        self.term_indices = np.fromiter(
+            (position for p in postings for position in p), dtype=np.int32, count=int(self.term_indptr[-1])
+        )
+        self._automaton = TermAutomaton(list(term_ids), native=native)
+        self._always = np.flatnonzero(required == 0)
+
+        logger.info(
+            f"Built columnar alerts: alerts={size}, terms={len(term_ids)}, "
+            f"postings={len(self.term_indices)}, always_candidates={len(self._always)}"
+        )
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def text_candidates(self, name_normalized: str) -> np.ndarray:
+        """Return sorted positions of alerts whose match strings pass."""
+        hit_terms = self._automaton.find(name_normalized)
+        if not hit_terms:
+            return self._always
+        indptr, indices = self.term_indptr, self.term_indices
+        hits = np.concatenate([indices[indptr[t]:indptr[t + 1]] for t in hit_terms])
+        counts = np.bincount(hits, minlength=len(self.alerts))
+        return np.flatnonzero(counts >= self.required)
+
+    def numeric_mask(
+        self,
+        prices: np.ndarray,
+        bottled_years: np.ndarray,
+        ages: np.ndarray,
+        positions: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Evaluate the numeric limits for one or more assets.
+
+        Args:
+            prices: Asset prices, shape (m,), with -inf for a missing price.
+            bottled_years: Asset bottled years, shape (m,), NaN when missing.
+            ages: Asset ages, shape (m,), NaN when missing.
+            positions: Optional alert positions to restrict the evaluation to.
+
+        Returns:
+            np.ndarray: Boolean array of shape (m, alerts) (or (m, len(positions))).
+        """
+        columns = (self.max_price, self.bottled_year_min, self.bottled_year_max, self.age_min, self.age_max)
+        if positions is not None:
+            columns = tuple(column[positions] for column in columns)
+        return _passes_limits(prices[:, None], bottled_years[:, None], ages[:, None], *columns)
+
+    @staticmethod
+    def asset_columns(prices: list, bottled_years: list, ages: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Encode asset values (None when missing) as columns for numeric_mask / match_pairs."""
+        return _asset_column(prices, -np.inf), _column(bottled_years), _column(ages)
+
+    @classmethod
+    def _asset_columns(cls, assets: list[Asset]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Encode assets' values as columns for numeric_mask."""
+        return cls.asset_columns([a.price for a in assets], [a.bottled_year for a in assets], [a.age for a in assets])
+
+    def match(self, asset: Asset) -> list[Alert]:
+        """Find all alerts that match the given asset."""
+        candidates = self.text_candidates(asset.name_normalized)
+        if not len(candidates):
+            return []
+        passing = candidates[self.numeric_mask(*self._asset_columns([asset]), positions=candidates)[0]]
+        alerts = self.alerts
+        return [alerts[position] for position in passing]
+
+    def match_pairs(
+        self,
+        names: list[str],
+        prices: np.ndarray,
+        bottled_years: np.ndarray,
+        ages: np.ndarray,
+        text_cache: dict[str, np.ndarray] | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Match many listings given as columns, returning every (listing, alert) match.
+
+        The text stage runs once per distinct name (and across calls when
+        ``text_cache`` is shared). The surviving (listing, alert) candidate
+        pairs are then checked against the numeric limits in one vectorized
+        pass, so no per-listing result lists are built.
+
+        Args:
+            names: Normalized listing names.
+            prices, bottled_years, ages: Listing values from ``asset_columns``.
+            text_cache: Optional name -> text candidates cache to reuse.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Listing row and alert position of
+            each match, ordered by row and then alert position.
+        """
+        if text_cache is None:
+            text_cache = {}
+        name_ids: dict[str, int] = {}
+        row_names = np.fromiter(
+            (name_ids.setdefault(name, len(name_ids)) for name in names), dtype=np.int64, count=len(names)
+        )
+        candidates = []
+        for name in name_ids:
+            found = text_cache.get(name)
+            if found is None:
+                found = text_cache[name] = self.text_candidates(name)
+            candidates.append(found)
+
+        # CSR from name id to its candidate alert positions, expanded to one pair per (row, candidate)
+        counts = np.fromiter((len(c) for c in candidates), dtype=np.int64, count=len(candidates))
+        indptr = np.zeros(len(candidates) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        indices = np.concatenate(candidates) if candidates else np.zeros(0, dtype=np.int64)
+        per_row = counts[row_names]
+        rows = np.repeat(np.arange(len(names), dtype=np.int64), per_row)
+        offsets = np.arange(len(rows), dtype=np.int64) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+        positions = indices[indptr[row_names[rows]] + offsets]
+
+        limits = (self.max_price, self.bottled_year_min, self.bottled_year_max, self.age_min, self.age_max)
+        passing = _passes_limits(
+            prices[rows], bottled_years[rows], ages[rows], *(column[positions] for column in limits)
+        )
+        return rows[passing], positions[passing]
+
+    def match_batch(self, assets: list[Asset]) -> dict[int, list[Alert]]:
+        """Match many assets: numeric limits for a whole chunk in one 2-D evaluation.
+
+        Returns:
+            dict[int, list[Alert]]: Matching alerts keyed by asset_idx. If an
+            asset_idx appears more than once, the last occurrence wins.
+        """
+        alerts = self.alerts
+        results: dict[int, list[Alert]] = {}
+        if not assets:
+            return results
+
+        chunk_size = max(1, _BATCH_CELLS // max(1, len(alerts)))
+        text_cache: dict[str, np.ndarray] = {}
+        for start in range(0, len(assets), chunk_size):
+            chunk = assets[start:start + chunk_size]
+            numeric = self.numeric_mask(*self._asset_columns(chunk))
+            for row, asset in enumerate(chunk):
+                name_normalized = asset.name_normalized
+                candidates = text_cache.get(name_normalized)
+                if candidates is None:
+                    candidates = text_cache[name_normalized] = self.text_candidates(name_normalized)
+                passing = candidates[numeric[row, candidates]]
+                results[asset.asset_idx] = [alerts[position] for position in passing]
+        return results
@@ -24,10 +24,94 @@ class Config:
     db_host: str | None = os.environ.get("DB_HOST")
     instance_unix_socket: str | None = os.environ.get("INSTANCE_UNIX_SOCKET")
 
+    # Shared connection pool (one engine per instance)
+    db_pool_size: int = int(os.environ.get("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+    db_pool_pre_ping: bool = os.environ.get("DB_POOL_PRE_PING", "true").strip().lower() in ("1", "true", "yes")
+    # Recycle connections before Cloud SQL / proxies drop them as idle
+    db_pool_recycle_sec: int = int(os.environ.get("DB_POOL_RECYCLE_SEC", "1800"))
+
     environment: Literal["dev", "staging", "production"] = os.environ.get(  # type: ignore
         "ENVIRONMENT", "dev"
     )
 
+    # ──────── PUB/SUB PUBLISHING ────────
+    pubsub_batch_max_messages: int = int(os.environ.get("PUBSUB_BATCH_MAX_MESSAGES", "100"))
+    pubsub_batch_max_bytes: int = int(os.environ.get("PUBSUB_BATCH_MAX_BYTES", "1000000"))
+    pubsub_batch_max_latency_sec: float = float(os.environ.get("PUBSUB_BATCH_MAX_LATENCY_SEC", "0.01"))
+    pubsub_publish_timeout_sec: float = float(os.environ.get("PUBSUB_PUBLISH_TIMEOUT_SEC", "30"))
+
+    # ──────── ASYNC PIPELINE ────────
+    # Record and publish matches through the asyncio pipeline (asyncpg + publisher futures)
+    async_pipeline: bool = os.environ.get("ASYNC_PIPELINE", "false").strip().lower() in ("1", "true", "yes")
+    # Bulk inserts in flight at once (also the asyncpg pool size)
+    async_concurrency: int = int(os.environ.get("ASYNC_CONCURRENCY", "4"))
+    # Match rows per bulk insert; publishing of one chunk overlaps the next chunk's insert
+    async_insert_chunk: int = int(os.environ.get("ASYNC_INSERT_CHUNK", "500"))
+
+    # ──────── MATCHING ────────
+    # Matching engine: "index" (default), "columnar" (NumPy), "linear" or "sharded" (process pool)
+    match_engine: str = os.environ.get("MATCH_ENGINE", "index")
+    # Worker processes for MATCH_ENGINE=sharded; 0 uses every available CPU
+    match_workers: int = int(os.environ.get("MATCH_WORKERS", "0"))
+    # Engine each sharded worker builds for its part of the alert set
+    match_shard_engine: str = os.environ.get("MATCH_SHARD_ENGINE", "index")
+    # Plan-based matching (linear engine, postgres candidates): evaluate one asset in this many
+    # with every predicate counted, to learn the predicate order (0 keeps the default order)
+    predicate_sample_every: int = int(os.environ.get("PREDICATE_SAMPLE_EVERY", "100"))
+    # Sampled assets between predicate order recomputations
+    predicate_adapt_every: int = int(os.environ.get("PREDICATE_ADAPT_EVERY", "50"))
+
+    # Where alerts come from: "memory" (whole set cached per instance, default) or
+    # "postgres" (per-asset candidate query on alert_terms, for sets too large to cache)
+    alert_source: str = os.environ.get("ALERT_SOURCE", "memory")
+
+    # ──────── ALERT CACHE ────────
+    # Seconds a warm instance trusts its cached alerts before re-checking the version
+    alert_cache_ttl_sec: float = float(os.environ.get("ALERT_CACHE_TTL_SEC", "30"))
+    # Alert set snapshot (local path or gs:// URI) for fast cold starts; unset disables it
+    alert_snapshot_uri: str | None = os.environ.get("ALERT_SNAPSHOT_URI") or None
+
+    # ──────── ALERT CHANGES ────────
+    # Listed assets fetched from the server-side cursor and matched per batch by process_alert_change
+    alert_change_batch_size: int = int(os.environ.get("ALERT_CHANGE_BATCH_SIZE", "5000"))
+
+    # ──────── NOTIFICATIONS ────────
+    # Per-user token buckets: matches over budget go to a digest instead of their own message
+    notify_throttle: bool = os.environ.get("NOTIFY_THROTTLE", "false").strip().lower() in ("1", "true", "yes")
+    # Matches a user can be sent back to back, and the rate the budget refills at
+    notify_burst: int = int(os.environ.get("NOTIFY_BURST", "5"))
+    notify_rate_per_hour: float = float(os.environ.get("NOTIFY_RATE_PER_HOUR", "12"))
+    # Held-back matches are coalesced for this long before their digest is published
+    notify_digest_window_sec: float = float(os.environ.get("NOTIFY_DIGEST_WINDOW_SEC", "900"))
+    # Matches listed in one digest message (the count covers all of them)
+    notify_digest_max_items: int = int(os.environ.get("NOTIFY_DIGEST_MAX_ITEMS", "25"))
+    # Users whose empty bucket is remembered per warm instance (skips the DB until a token is due)
+    notify_cache_size: int = int(os.environ.get("NOTIFY_CACHE_SIZE", "10000"))
+
+    # ──────── STREAMING-PULL WORKER ────────
+    # Subscription the long-running worker (python -m src.worker) pulls new listings from
+    worker_subscription: str | None = os.environ.get("WORKER_SUBSCRIPTION")
+    # Listings matched, recorded and acked together
+    worker_batch_size: int = int(os.environ.get("WORKER_BATCH_SIZE", "500"))
+    # Longest the first message of a batch waits for the batch to fill
+    worker_batch_latency_sec: float = float(os.environ.get("WORKER_BATCH_LATENCY_SEC", "1.0"))
+    # Flow control: messages / bytes leased from the subscription and not yet acked
+    worker_max_messages: int = int(os.environ.get("WORKER_MAX_MESSAGES", "1000"))
+    worker_max_bytes: int = int(os.environ.get("WORKER_MAX_BYTES", "10000000"))
+
+    # ──────── LOGGING ────────
+    # Fraction of messages whose matching alerts are each logged (0 turns the dumps off)
+    alert_log_sample_rate: float = float(os.environ.get("ALERT_LOG_SAMPLE_RATE", "1.0"))
+
+    # ──────── NORMALIZATION ────────
+    # Normalized listing names remembered per warm instance, keyed by asset_idx
+    name_cache_size: int = int(os.environ.get("NAME_CACHE_SIZE", "10000"))
+
+    # ──────── DEDUPLICATION ────────
+    # Message ids / activity indexes remembered per warm instance to skip redeliveries
+    dedupe_cache_size: int = int(os.environ.get("DEDUPE_CACHE_SIZE", "10000"))
+
     def get_db_connection_string(self) -> str:
         """Return the PostgreSQL connection string."""
         # 1. Prefer explicit DATABASE_URL
@@ -1,13 +1,15 @@
 """Database connection and session management."""
 
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Connection
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import QueuePool
+import threading
+from typing import TYPE_CHECKING
 
-from .config import Config
+from .config import Config, config
 from .log import get_logger
 
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection
+    from sqlalchemy.orm import Session
+
 logger = get_logger()
 
 
@@ -15,22 +17,31 @@ class Database:
     """Database connection manager."""
 
     def __init__(self, config: Config):
+        # Imported here so SQLAlchemy stays off the cold-start import path
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import QueuePool
+
         self.config = config
         self.engine = create_engine(
             config.get_db_connection_string(),
             poolclass=QueuePool,
-            pool_size=5,
-            max_overflow=10,
-            pool_pre_ping=True,
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_pre_ping=config.db_pool_pre_ping,
+            pool_recycle=config.db_pool_recycle_sec,
             echo=False,  # set to True only for debugging
         )
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        self.SessionLocal = None
 
-    def get_session(self) -> Session:
+    def get_session(self) -> "Session":
         """Get a new database session."""
+        if self.SessionLocal is None:
+            from sqlalchemy.orm import sessionmaker
+
+            self.SessionLocal = sessionmaker(bind=self.engine)
         return self.SessionLocal()
 
-    def get_connection(self) -> Connection:
+    def get_connection(self) -> "Connection":
         """
         Get a raw SQLAlchemy Core connection (supports .cursor() for psycopg2/pg8000).
         Must be used with try/finally or context manager.
@@ -40,3 +51,27 @@ class Database:
     def close(self):
         """Close the database engine."""
         self.engine.dispose()
+
+
+# Instance-wide database, shared by every repository call on a warm instance
+_database: Database | None = None
+_database_lock = threading.Lock()
+
+
+def get_database() -> Database:
+    """Return the shared Database, creating its engine and pool on first use.
+
+    SQLAlchemy engines are thread-safe, so concurrent requests on one instance
+    share the pool; the lock only guards the lazy creation.
+    """
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = Database(config)
+                logger.info(
+                    f"Created database pool: size={config.db_pool_size}, "
+                    f"max_overflow={config.db_max_overflow}, pre_ping={config.db_pool_pre_ping}, "
+                    f"recycle={config.db_pool_recycle_sec}s"
+                )
+    return _database
@@ -0,0 +1,148 @@
+"""Recently-seen message tracking so redelivered listings are processed once."""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+
+from .config import config
+from .log import get_logger
+from .repository import get_processed_activities, mark_listings_processed
+
+logger = get_logger()
+
+
+class MessageDeduper:
+    """Short-circuits Pub/Sub redeliveries before any alert load or DB write.
+
+    Keys are the CloudEvent id and the listing's activity_idx (the message's
+    ``external_id``). A bounded LRU on the warm instance answers most repeats;
+    otherwise the durable ``processed_messages`` table is checked with a
+    single primary-key lookup. Lookup failures fail open: the listing is
+    processed, and the unique key on ``alert_matches`` still keeps matches
+    from being recorded twice.
+
+    Shared by concurrent requests on an instance: the LRU is guarded by a
+    lock, while the database lookups and writes run outside it.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        lookup: Callable[[list[int]], set[int]] = get_processed_activities,
+        recorder: Callable[[dict[int, tuple[str, int]]], None] = mark_listings_processed,
+    ):
+        self.max_size = max_size
+        self._lookup = lookup
+        self._recorder = recorder
+        self._recent: OrderedDict[tuple[str, object], None] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.checks = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+
+    def seen(self, message_id: str, activity_idx: int) -> bool:
+        """Return True if this message or listing was already processed."""
+        return not self.unseen(message_id, [activity_idx])
+
+    def unseen(self, message_id: str, activity_idxs: list[int]) -> list[int]:
+        """Return the activity_idxs in a message that still need processing."""
+        with self._lock:
+            self.checks += len(activity_idxs)
+            if self._hit(("message", message_id)):
+                self.memory_hits += len(activity_idxs)
+                return []
+        return self._unseen_activities(activity_idxs)
+
+    def unseen_messages(self, messages: dict[str, int]) -> list[str]:
+        """Return the ids of single-listing messages that still need processing.
+
+        Args:
+            messages: The activity_idx of each message, keyed by message id.
+        """
+        with self._lock:
+            self.checks += len(messages)
+            candidates = {}
+            for message_id, activity_idx in messages.items():
+                if self._hit(("message", message_id)):
+                    self.memory_hits += 1
+                else:
+                    candidates[message_id] = activity_idx
+        # One lookup for the whole batch
+        pending = set(self._unseen_activities(list(candidates.values())))
+        return [message_id for message_id, activity_idx in candidates.items() if activity_idx in pending]
+
+    def mark(self, message_id: str, match_counts: dict[int, int]) -> None:
+        """Record a message's listings as processed, with their match counts."""
+        with self._lock:
+            self._remember(("message", message_id))
+        self.mark_listings({activity_idx: (message_id, count) for activity_idx, count in match_counts.items()})
+
+    def mark_listings(self, listings: dict[int, tuple[str, int]]) -> None:
+        """Record listings from any number of messages as processed.
+
+        Args:
+            listings: (message_id, match count) of each listing, keyed by activity_idx.
+        """
+        with self._lock:
+            for message_id, _ in listings.values():
+                self._remember(("message", message_id))
+            for activity_idx in listings:
+                self._remember(("activity", activity_idx))
+        try:
+            self._recorder(listings)
+        except Exception as e:
+            logger.warning(f"Failed to record {len(listings)} processed listings: {e}")
+
+    def _unseen_activities(self, activity_idxs: list[int]) -> list[int]:
+        """Filter out listings processed before, from the LRU and then the table."""
+        with self._lock:
+            pending = []
+            for activity_idx in activity_idxs:
+                if self._hit(("activity", activity_idx)):
+                    self.memory_hits += 1
+                else:
+                    pending.append(activity_idx)
+        if not pending:
+            return []
+
+        try:
+            processed = self._lookup(pending)
+        except Exception as e:
+            logger.warning(f"Processed-message lookup failed, processing anyway: {e}")
+            return pending
+
+        with self._lock:
+            self.db_hits += len(processed)
+            for activity_idx in processed:
+                self._remember(("activity", activity_idx))
+        return [activity_idx for activity_idx in pending if activity_idx not in processed]
+
+    def stats(self) -> dict:
+        """Return dedupe counters for logging."""
+        hits = self.memory_hits + self.db_hits
+        return {
+            "checks": self.checks,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "hit_rate": round(hits / self.checks, 4) if self.checks else 0.0,
+            "cached_keys": len(self._recent),
+        }
+
+    def _hit(self, key: tuple[str, object]) -> bool:
+        """Check the LRU for a key, refreshing it on a hit (caller holds the lock)."""
+        if key not in self._recent:
+            return False
+        self._recent.move_to_end(key)
+        return True
+
+    def _remember(self, key: tuple[str, object]) -> None:
+        """Add a key to the LRU, evicting the least recently used beyond max_size (caller holds the lock)."""
+        self._recent[key] = None
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_size:
+            self._recent.popitem(last=False)
+
+
+# Module-level instance so recently seen messages survive across invocations on a warm instance
+message_deduper = MessageDeduper(max_size=config.dedupe_cache_size)
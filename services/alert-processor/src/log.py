@@ -1,11 +1,10 @@
 import logging
 import os
 
-import google.cloud.logging
-
-# Initialize Cloud Logging client at module level (once per instance)
+# Cloud Logging client, set up on the first log record (once per instance)
 _client = None
 _initialized = False
+_deferred_handler = None
 
 
 def _initialize_cloud_logging():
@@ -23,6 +22,9 @@ def _initialize_cloud_logging():
             return
 
         try:
+            # Imported here so the client library stays off the cold-start import path
+            import google.cloud.logging
+
             _client = google.cloud.logging.Client()
             _client.setup_logging(log_level=logging.INFO)
             _initialized = True
@@ -36,6 +38,30 @@ def _initialize_cloud_logging():
             _initialized = True
 
 
+class _DeferredSetupHandler(logging.Handler):
+    """Root handler that sets up logging on the first record, then steps aside.
+
+    Importing google-cloud-logging and creating its client is one of the
+    slowest parts of a cold start, so get_logger() only installs this
+    handler; the real setup happens when something is first logged.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        root = logging.getLogger()
+        root.removeHandler(self)
+        _initialize_cloud_logging()
+        root.handle(record)
+
+
+def _install_deferred_setup():
+    """Install the deferred setup handler on the root logger (once)."""
+    global _deferred_handler
+    if _initialized or _deferred_handler is not None:
+        return
+    _deferred_handler = _DeferredSetupHandler()
+    logging.getLogger().addHandler(_deferred_handler)
+
+
 def get_logger(name: str = "alert-processor") -> logging.Logger:
     """
     Creates and configures a logger for GCP Cloud Functions.
@@ -49,8 +75,8 @@ def get_logger(name: str = "alert-processor") -> logging.Logger:
     Returns:
         logging.Logger: Configured logger instance.
     """
-    # Initialize Cloud Logging (only happens once)
-    _initialize_cloud_logging()
+    # Cloud Logging is initialized on the first record (only happens once)
+    _install_deferred_setup()
 
     # Return a named logger
     logger = logging.getLogger(name)
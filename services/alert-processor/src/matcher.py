@@ -1,59 +1,158 @@
 """Alert matching logic."""
 
+from typing import TYPE_CHECKING, Protocol
+
 from .models import Alert, Asset
 from .log import get_logger
+from .plan import PREDICATES
+
+if TYPE_CHECKING:
+    from .selectivity import PredicateOrdering
 
 logger = get_logger()
 
-def matches_alert(alert: Alert, asset: Asset) -> bool:
-    """Check if an asset matches an alert's criteria."""
-
-    # Check match strings (case-insensitive substring match)
-    if alert.match_strings:
-        name_lower = asset.name.lower()
-        required_terms = [s.strip().lower() for s in alert.match_strings if s and s.strip()]
-        if required_terms:
-            if alert.match_all:
-                # All terms must match
-                if not all(term in name_lower for term in required_terms):
-                    return False
-            else:
-                # Any one term matching is sufficient
-                if not any(term in name_lower for term in required_terms):
-                    return False
-
-    # Check max price
-    if alert.max_price is not None and asset.price is not None:
-        if asset.price > alert.max_price:
-            return False
+# Engines that match inside the calling process
+IN_PROCESS_ENGINES = ("linear", "index", "columnar")
 
-    # Check bottled year range
-    if alert.bottled_year_min is not None:
-        if asset.bottled_year is None:
-            return False
-        elif asset.bottled_year < alert.bottled_year_min:
-            return False
-    if alert.bottled_year_max is not None:
-        if asset.bottled_year is None:
-            return False
-        elif asset.bottled_year > alert.bottled_year_max:
-            return False
+# Engines selectable with MATCH_ENGINE / build_index
+MATCH_ENGINES = (*IN_PROCESS_ENGINES, "sharded")
+
+
+class AlertMatcher(Protocol):
+    """A compiled alert set that can match assets (see build_index)."""
+
+    alerts: list[Alert]
+
+    def match(self, asset: Asset) -> list[Alert]: ...
+
+    def match_batch(self, assets: list[Asset]) -> dict[int, list[Alert]]: ...
 
-    # Check age range
-    if alert.age_min is not None:
-        if asset.age is None:
-            return False
-        elif asset.age < alert.age_min:
-            return False
-    if alert.age_max is not None:
-        if asset.age is None:
-            return False
-        elif asset.age > alert.age_max:
-            return False
 
+def matches_terms(alert: Alert, name_normalized: str) -> bool:
+    """Check an alert's match strings against a normalized asset name."""
+    plan = alert.plan
+    if not plan.has_terms:
+        return True
+    return PREDICATES["terms"](plan, None, name_normalized)
+
+
+def matches_filters(alert: Alert, asset: Asset) -> bool:
+    """Check an alert's price, bottled year and age limits against an asset."""
+    plan = alert.plan
+    for name, step in zip(plan.checks, plan.steps):
+        if name != "terms" and not step(plan, asset, ""):
+            return False
     return True
 
 
-def find_matching_alerts(alerts: list[Alert], asset: Asset) -> list[Alert]:
-    """Find all alerts that match the given asset."""
-    return [alert for alert in alerts if matches_alert(alert, asset)]
+def matches_alert(alert: Alert, asset: Asset) -> bool:
+    """Check if an asset matches an alert's criteria.
+
+    Runs the alert's precompiled plan (see ``compile_plan``): terms are
+    already normalized and only the predicates the alert uses are evaluated.
+    """
+    return alert.plan.matches(asset, asset.name_normalized)
+
+
+def find_matching_alerts(alerts: list[Alert], asset: Asset, index: AlertMatcher | None = None) -> list[Alert]:
+    """Find all alerts that match the given asset.
+
+    When an engine built from the same alerts is given (see build_index), it
+    does the matching; otherwise every alert is scanned.
+    """
+    if index is not None:
+        return index.match(asset)
+    name_normalized = asset.name_normalized
+    return [alert for alert in alerts if alert.plan.matches(asset, name_normalized)]
+
+
+def match_batch(assets: list[Asset], alert_index: AlertMatcher) -> dict[int, list[Alert]]:
+    """Match a batch of assets against the alert set in one call.
+
+    Args:
+        assets: The assets to match.
+        alert_index: Index built from the current alert set.
+
+    Returns:
+        dict[int, list[Alert]]: Matching alerts keyed by asset_idx.
+    """
+    return alert_index.match_batch(assets)
+
+
+def unique_asset_chunks(assets: list[Asset]) -> list[list[Asset]]:
+    """Split assets into consecutive chunks with no repeated asset_idx.
+
+    match_batch keys results by asset_idx, so two listings of the same asset
+    (e.g. relisted at a new price) have to be matched in separate calls.
+    """
+    chunks: list[list[Asset]] = [[]]
+    seen: set[int] = set()
+    for asset in assets:
+        if asset.asset_idx in seen:
+            chunks.append([])
+            seen = set()
+        chunks[-1].append(asset)
+        seen.add(asset.asset_idx)
+    return [chunk for chunk in chunks if chunk]
+
+
+class LinearIndex:
+    """Engine that runs every alert's plan in turn (the reference behaviour).
+
+    With an ``ordering`` (see ``src.selectivity``) the plans' checks are
+    reordered as it learns which predicates reject cheapest.
+    """
+
+    def __init__(self, alerts: list[Alert], ordering: "PredicateOrdering | None" = None):
+        self.alerts = alerts
+        self.ordering = ordering
+        if ordering is not None:
+            ordering.apply(alerts)
+            self._version = ordering.version
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def match(self, asset: Asset) -> list[Alert]:
+        """Find all alerts that match the given asset."""
+        ordering = self.ordering
+        if ordering is not None:
+            from .selectivity import match_alerts
+            found = match_alerts(self.alerts, asset, ordering, self._version)
+            self._version = ordering.version
+            return found
+        name_normalized = asset.name_normalized
+        return [alert for alert in self.alerts if alert.plan.matches(asset, name_normalized)]
+
+    def match_batch(self, assets: list[Asset]) -> dict[int, list[Alert]]:
+        """Match each asset in turn, keyed by asset_idx."""
+        return {asset.asset_idx: self.match(asset) for asset in assets}
+
+
+def build_index(alerts: list[Alert], engine: str = "index") -> AlertMatcher:
+    """Compile an alert set into the named matching engine.
+
+    Args:
+        alerts: The alerts to compile.
+        engine: "index" (AlertIndex), "columnar" (NumPy ColumnarAlerts),
+            "linear" (LinearIndex, with adaptive predicate ordering) or "sharded" (ShardedMatcher over
+            MATCH_WORKERS processes, each running MATCH_SHARD_ENGINE).
+
+    Returns:
+        AlertMatcher: The compiled engine.
+    """
+    if engine == "index":
+        from .alert_index import AlertIndex
+        return AlertIndex(alerts)
+    if engine == "columnar":
+        # Imported here so NumPy is only loaded when the engine is selected
+        from .columnar import ColumnarAlerts
+        return ColumnarAlerts(alerts)
+    if engine == "linear":
+        from .selectivity import predicate_ordering
+        return LinearIndex(alerts, predicate_ordering)
+    if engine == "sharded":
+        from .config import config
+        from .parallel import ShardedMatcher, default_workers
+        return ShardedMatcher(alerts, config.match_workers or default_workers(), config.match_shard_engine)
+    raise ValueError(f"Unknown match engine {engine!r}, expected one of {MATCH_ENGINES}")
@@ -1,11 +1,13 @@
 """Data models for Alert Processor."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
 from .config import config
 from .log import get_logger
+from .normalize import name_cache
+from .plan import AlertPlan, compile_plan
 
 logger = get_logger()
 
@@ -46,9 +48,15 @@ def _fmt_int(i):
     return str(i) if i is not None else "—"
 
 
-@dataclass
+@dataclass(slots=True)
 class Alert:
-    """User alert configuration."""
+    """User alert configuration.
+
+    ``plan`` is compiled from the other fields on construction (see
+    ``compile_plan``) unless an already compiled one is passed in, as the
+    snapshot loader does; call ``compile()`` again after changing fields.
+    Slotted, so an alert carries no per-instance ``__dict__``.
+    """
 
     id: int
     user_id: int
@@ -61,22 +69,27 @@ class Alert:
     bottled_year_max: int | None
     age_min: int | None
     age_max: int | None
+    plan: AlertPlan | None = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.plan is None:
+            self.compile()
+
+    def compile(self) -> AlertPlan:
+        """(Re)compile the alert's match plan from its current fields."""
+        self.plan = compile_plan(self)
+        return self.plan
 
     @classmethod
     def from_row(cls, row: tuple, columns: list[str]) -> "Alert":
         """Create Alert from database row."""
         data = dict(zip(columns, row))
-        match_strings = data.get("match_strings")
-        clean_match_strings = list()
-        if match_strings:
-            for each in match_strings:
-                clean_match_strings.append(each.replace("'", ""))
         return cls(
             id=data["id"],
             user_id=data["user_id"],
             user_email=data["user_email"],
             name=data["name"],
-            match_strings=clean_match_strings,
+            match_strings=list(data.get("match_strings") or []),
             match_all=data.get("match_all", False),
             max_price=data.get("max_price"),
             bottled_year_min=data.get("bottled_year_min"),
@@ -88,7 +101,14 @@ class Alert:
 
 @dataclass
 class Asset:
-    """Asset/listing data from Pub/Sub message."""
+    """Asset/listing data from Pub/Sub message.
+
+    ``name`` is the display name; ``name_normalized`` (see ``normalize_text``)
+    is what the matchers compare against. When it is not given it is looked
+    up in ``name_cache`` by asset_idx. Values that are given (read from the
+    database, or from the payload by ``get_asset``, which caches those) are
+    used as-is, so bulk loads do not churn the cache.
+    """
 
     asset_idx: int
     activity_idx: int | None
@@ -99,6 +119,11 @@ class Asset:
     url: str | None
     asset_id: str | None = None
     asset_json: dict[str, Any] | None = None
+    name_normalized: str | None = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.name_normalized is None:
+            self.name_normalized = name_cache.get(self.asset_idx, self.name)
 
     def __str__(self):
         name_display = self.name
@@ -124,14 +149,13 @@ class Asset:
 
 @dataclass
 class AlertMatch:
-    """A match between an alert and an asset."""
+    """A match between an alert and an asset (a row of alert_matches)."""
 
-    id: int | None
     alert_id: int
-    user_id: int
     listing_source: str
-    record_id: int | None
-    asset_id: str
+    activity_idx: int | None
+    asset_idx: int
+    match_idx: int | None = None
 
 
 def _parse_int(key_name: str, value_raw=None) -> int:
@@ -221,7 +245,16 @@ def _parse_datetime(key_name: str = None, value_raw=None) -> datetime:
     return value
 
 
-def get_asset(asset_idx, name, price, bottled_year, age, activity_idx: int) -> Asset:
+def asset_url(asset_idx: int) -> str:
+    """Return the BaxPro page of an asset for the current environment."""
+    if config.environment == "dev":
+        return f"https://dev.baxpro.xyz/asset/{asset_idx}"
+    return f"https://baxpro.xyz/asset/{asset_idx}"
+
+
+def get_asset(
+    asset_idx, name, price, bottled_year, age, activity_idx: int, name_normalized: str | None = None
+) -> Asset:
     """Create an Asset object from provided listing data.
 
     Parses and validates input values, generating appropriate URL based
@@ -234,6 +267,7 @@ def get_asset(asset_idx, name, price, bottled_year, age, activity_idx: int) -> A
         bottled_year: The year the spirit was bottled.
         age: The age of the spirit in years.
         activity_idx: The associated activity feed index.
+        name_normalized: The name as normalized by baxus-monitor, if the payload has it.
 
     Returns:
         Asset: A fully populated Asset dataclass instance.
@@ -244,12 +278,11 @@ def get_asset(asset_idx, name, price, bottled_year, age, activity_idx: int) -> A
     bottled_year = _parse_int(key_name='bottled_year', value_raw=bottled_year)
     age = _parse_int(key_name="age", value_raw=age)
 
+    # Display name as published in match events and email subjects (matching uses name_normalized)
     name = name.replace("'", "")
 
-    if config.environment == "dev":
-        url = f"https://dev.baxpro.xyz/asset/{asset_idx}"
-    else:
-        url = f"https://baxpro.xyz/asset/{asset_idx}"
+    if name_normalized:
+        name_cache.put(asset_idx, name, name_normalized)
 
     return Asset(asset_idx=asset_idx,
                  activity_idx=activity_idx,
@@ -257,5 +290,27 @@ def get_asset(asset_idx, name, price, bottled_year, age, activity_idx: int) -> A
                  price=price,
                  bottled_year=bottled_year,
                  age=age,
-                 url=url
+                 url=asset_url(asset_idx),
+                 name_normalized=name_normalized or None,
                  )
+
+
+def asset_from_payload(payload: dict, activity_idx: int) -> Asset:
+    """Create an Asset from a listing payload as baxus-monitor publishes it (see ``get_asset``).
+
+    Args:
+        payload: The listing fields (asset_idx, name, price, bottled_year, age, optional name_normalized).
+        activity_idx: The associated activity feed index.
+
+    Returns:
+        Asset: The parsed asset.
+    """
+    return get_asset(
+        asset_idx=payload.get("asset_idx", 0),
+        name=payload.get("name", ""),
+        price=payload.get("price", 0.0),
+        bottled_year=payload.get("bottled_year", None),
+        age=payload.get("age", None),
+        activity_idx=activity_idx,
+        name_normalized=payload.get("name_normalized"),
+    )
@@ -0,0 +1,88 @@
+"""Text normalization shared by listing names and alert match strings.
+
+``normalize_text`` is the one definition of how names and terms are
+compared: case folding, accent folding (NFKD without the combining
+diacritical marks U+0300-U+036F), apostrophes dropped ("Blanton's" ->
+"blantons"), every other run of punctuation or whitespace collapsed to
+one space, and the ends stripped.
+A term matches a listing when its normalized form is a substring of the
+listing's normalized name.
+
+baxus-monitor persists the same normalization on ``baxus.assets.name_normalized``
+(``src/utils/normalize.py`` there) and sends it as ``name_normalized`` in the
+listing payload, and migration 0020 defines it in SQL as ``normalize_name()``
+(redefined in 0023 to case-fold like ``str.casefold``); keep all three in sync.
+``tests/test_normalize.py`` checks that the two Python copies are identical.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from .config import config
+
+# Combining diacritical marks left behind by NFKD ("é" -> "e" + U+0301)
+_MARKS = re.compile("[\u0300-\u036f]+")
+
+# Straight and typographic apostrophes / single quotes, removed without a space
+_APOSTROPHES = str.maketrans("", "", "'‘’`´ʼ")
+
+# Runs of anything but letters and digits (``\W`` keeps ``_``, so it is listed too)
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize_text(value: str | None) -> str:
+    """Normalize a listing name or match string for substring matching."""
+    if not value:
+        return ""
+    text = value.casefold()
+    if not text.isascii():
+        text = _MARKS.sub("", unicodedata.normalize("NFKD", text))
+    text = text.translate(_APOSTROPHES)
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+class NormalizedNameCache:
+    """LRU of normalized listing names keyed by asset_idx.
+
+    The raw name is stored alongside, so a renamed asset is normalized again
+    instead of returning a stale value.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[int, tuple[str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, asset_idx: int, name: str) -> str:
+        """Return the normalized form of an asset's name, computing it on a miss."""
+        with self._lock:
+            entry = self._entries.get(asset_idx)
+            if entry is not None and entry[0] == name:
+                self._entries.move_to_end(asset_idx)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        normalized = normalize_text(name)
+        self.put(asset_idx, name, normalized)
+        return normalized
+
+    def put(self, asset_idx: int, name: str, normalized: str) -> None:
+        """Remember a normalized name (e.g. one precomputed by baxus-monitor)."""
+        with self._lock:
+            self._entries[asset_idx] = (name, normalized)
+            self._entries.move_to_end(asset_idx)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for logging."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "cached": len(self._entries)}
+
+
+# Shared instance for the entry points
+name_cache = NormalizedNameCache(max_size=config.name_cache_size)
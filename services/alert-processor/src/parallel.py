@@ -0,0 +1,217 @@
+"""Multi-process sharded matching (MATCH_ENGINE=sharded).
+
+The alert set is split into shards by a stable hash of the alert id and
+each shard is compiled into its own engine (``build_index``) inside a
+dedicated worker process, so large alert sets and burst backfills are
+matched on every core instead of one.
+
+The alerts reach the workers once, through shared memory: the parent
+encodes every shard as an alert snapshot (see ``src.snapshot``) into one
+``multiprocessing.shared_memory`` block, and each worker decodes only its
+own slice and builds its engine from it. Nothing about the alert set is
+pickled per task; a task carries the assets' matching columns and the
+workers answer with alert positions, which the parent maps back to its
+own ``Alert`` objects.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+import zlib
+from array import array
+from itertools import chain
+from multiprocessing import shared_memory
+
+from .log import get_logger
+from .models import Alert, Asset
+
+logger = get_logger()
+
+# Seconds to wait for a worker to exit before it is terminated
+_SHUTDOWN_TIMEOUT_SEC = 5.0
+
+
+def shard_of(alert_id, shards: int) -> int:
+    """Shard of an alert id; crc32, unlike hash(), is the same in every process."""
+    return zlib.crc32(str(alert_id).encode()) % shards
+
+
+def _asset_row(asset: Asset) -> tuple:
+    """The asset values the engines read, as a small picklable tuple."""
+    return (asset.asset_idx, asset.name_normalized, asset.price, asset.bottled_year, asset.age)
+
+
+def _worker_main(conn, shm_name: str, offset: int, size: int, engine: str, shard_positions: array) -> None:
+    """Worker process: build the shard's engine from shared memory, then serve match requests.
+
+    Requests are lists of asset rows (see ``_asset_row``); replies map
+    asset_idx to the positions of the matching alerts in the full alert set,
+    ascending, as compact ``array`` objects. ``None`` stops the worker.
+    """
+    from .matcher import build_index
+    from .snapshot import decode_snapshot
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    view = shm.buf[offset:offset + size]
+    try:
+        alerts, _ = decode_snapshot(view)
+    finally:
+        view.release()
+        shm.close()
+    index = build_index(alerts, engine)
+    positions = {id(alert): position for alert, position in zip(alerts, shard_positions)}
+    conn.send(len(alerts))
+
+    while True:
+        rows = conn.recv()
+        if rows is None:
+            break
+        assets = [
+            Asset(asset_idx, None, name_normalized, price, bottled_year, age, None, name_normalized=name_normalized)
+            for asset_idx, name_normalized, price, bottled_year, age in rows
+        ]
+        matches = index.match_batch(assets)
+        conn.send({
+            asset_idx: array("I", [positions[id(alert)] for alert in found]) for asset_idx, found in matches.items()
+        })
+    conn.close()
+
+
+def _shutdown(processes: list, conns: list) -> None:
+    """Stop the workers (also run by the finalizer when a matcher is dropped)."""
+    for conn in conns:
+        try:
+            conn.send(None)
+            conn.close()
+        except (OSError, ValueError):
+            pass
+    deadline = time.monotonic() + _SHUTDOWN_TIMEOUT_SEC
+    for process in processes:
+        process.join(max(0.0, deadline - time.monotonic()))
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+
+class ShardedMatcher:
+    """Alert set sharded across worker processes, each running its own engine.
+
+    ``match`` and ``match_batch`` send the assets to every worker and merge
+    the per-shard matches in alert order, so results are identical to a
+    single-process engine built from the same alerts. Calls are serialized;
+    one call keeps all workers busy.
+
+    Workers are stopped by ``close()``, or when the matcher is garbage
+    collected (e.g. after the alert cache replaced it).
+    """
+
+    def __init__(self, alerts: list[Alert], workers: int, engine: str = "index", start_method: str = "spawn"):
+        # Imported here so the snapshot codec is only loaded with this engine
+        from .snapshot import encode_snapshot
+
+        from .matcher import IN_PROCESS_ENGINES
+
+        if engine not in IN_PROCESS_ENGINES:
+            raise ValueError(f"Unknown shard engine {engine!r}, expected one of {IN_PROCESS_ENGINES}")
+        start = time.perf_counter()
+        self.alerts = alerts
+        self.workers = max(1, workers)
+        self.engine = engine
+
+        # Global positions of each shard's alerts, in alert order
+        self._shard_positions: list[array] = [array("I") for _ in range(self.workers)]
+        for position, alert in enumerate(alerts):
+            self._shard_positions[shard_of(alert.id, self.workers)].append(position)
+
+        blobs = [encode_snapshot([alerts[p] for p in positions], 0) for positions in self._shard_positions]
+        shm = shared_memory.SharedMemory(create=True, size=max(1, sum(len(blob) for blob in blobs)))
+        context = multiprocessing.get_context(start_method)
+        self._processes = []
+        self._conns = []
+        try:
+            offset = 0
+            for blob, positions in zip(blobs, self._shard_positions):
+                shm.buf[offset:offset + len(blob)] = blob
+                parent_conn, child_conn = context.Pipe()
+                process = context.Process(
+                    target=_worker_main,
+                    args=(child_conn, shm.name, offset, len(blob), engine, positions),
+                    name=f"alert-shard-{len(self._processes)}",
+                    daemon=True,
+                )
+                process.start()
+                child_conn.close()
+                self._processes.append(process)
+                self._conns.append(parent_conn)
+                offset += len(blob)
+            # Workers have decoded their shard once they report its size
+            for conn, positions in zip(self._conns, self._shard_positions):
+                if conn.recv() != len(positions):
+                    raise RuntimeError("Alert shard worker decoded the wrong number of alerts")
+        except BaseException:
+            _shutdown(self._processes, self._conns)
+            raise
+        finally:
+            shm.close()
+            shm.unlink()
+
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _shutdown, self._processes, self._conns)
+        logger.info(
+            f"Built sharded alerts: alerts={len(alerts)}, workers={self.workers}, engine={engine}, "
+            f"shared_bytes={offset}, took={(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def match(self, asset: Asset) -> list[Alert]:
+        """Find all alerts that match the given asset."""
+        return self.match_batch([asset]).get(asset.asset_idx, [])
+
+    def match_batch(self, assets: list[Asset]) -> dict[int, list[Alert]]:
+        """Match many assets on every shard at once and merge the results.
+
+        Returns:
+            dict[int, list[Alert]]: Matching alerts keyed by asset_idx. If an
+            asset_idx appears more than once, the last occurrence wins.
+
+        Raises:
+            RuntimeError: If a worker has died or the matcher is closed.
+        """
+        if not assets:
+            return {}
+        rows = [_asset_row(asset) for asset in assets]
+        with self._lock:
+            if not self._finalizer.alive:
+                raise RuntimeError("Sharded matcher is closed")
+            try:
+                for conn in self._conns:
+                    conn.send(rows)
+                replies = [conn.recv() for conn in self._conns]
+            except (EOFError, OSError) as e:
+                raise RuntimeError(f"Alert shard worker failed: {e}") from e
+
+        # Each shard's positions are ascending, so one shard needs no merge
+        lookup = self.alerts.__getitem__
+        results: dict[int, list[Alert]] = {}
+        for asset_idx, *_ in rows:
+            parts = [reply[asset_idx] for reply in replies]
+            positions = parts[0] if len(parts) == 1 else sorted(chain.from_iterable(parts))
+            results[asset_idx] = list(map(lookup, positions))
+        return results
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        with self._lock:
+            self._finalizer()
+
+
+def default_workers() -> int:
+    """Worker count when MATCH_WORKERS is 0: the CPUs this process may use."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
@@ -0,0 +1,192 @@
+"""Match plans compiled from alerts at load time."""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .normalize import normalize_text
+
+if TYPE_CHECKING:
+    from .models import Alert, Asset
+
+
+def _check_price(plan: "AlertPlan", asset: "Asset", name_normalized: str) -> bool:
+    """A missing asset price passes; otherwise it must not exceed max_price."""
+    return asset.price is None or not asset.price > plan.max_price
+
+
+def _check_bottled_year(plan: "AlertPlan", asset: "Asset", name_normalized: str) -> bool:
+    """The asset needs a bottled year inside the alert's range."""
+    year = asset.bottled_year
+    if year is None:
+        return False
+    if plan.bottled_year_min is not None and year < plan.bottled_year_min:
+        return False
+    if plan.bottled_year_max is not None and year > plan.bottled_year_max:
+        return False
+    return True
+
+
+def _check_age(plan: "AlertPlan", asset: "Asset", name_normalized: str) -> bool:
+    """The asset needs an age inside the alert's range."""
+    age = asset.age
+    if age is None:
+        return False
+    if plan.age_min is not None and age < plan.age_min:
+        return False
+    if plan.age_max is not None and age > plan.age_max:
+        return False
+    return True
+
+
+def _check_terms(plan: "AlertPlan", asset: "Asset", name_normalized: str) -> bool:
+    """All terms (match_all) or any one term must occur in the normalized name."""
+    if plan.match_all:
+        return all(term in name_normalized for term in plan.terms)
+    return any(term in name_normalized for term in plan.terms)
+
+
+# Predicate name -> check, in the default evaluation order (cheap comparisons first)
+PREDICATES: dict[str, Callable[["AlertPlan", "Asset", str], bool]] = {
+    "price": _check_price,
+    "bottled_year": _check_bottled_year,
+    "age": _check_age,
+    "terms": _check_terms,
+}
+
+
+# Stands in for match strings that normalize to nothing (e.g. "!!!"). Normalized names
+# hold only letters, digits and single spaces, so no listing contains it.
+UNMATCHABLE_TERM = "\x00"
+
+
+def normalize_terms(match_strings: list[str] | None) -> tuple[str, ...]:
+    """Normalize match strings (``normalize_text``), keeping the first of any duplicates.
+
+    Blank strings are ignored. Strings made only of punctuation normalize to
+    nothing and are dropped too. If they were all the alert had, the terms
+    become ``(UNMATCHABLE_TERM,)``, so the alert matches no listing rather
+    than every listing as an alert without match strings would.
+    """
+    given = [s for s in match_strings or () if s and s.strip()]
+    if not given:
+        return ()
+    terms = tuple(term for term in dict.fromkeys(normalize_text(s) for s in given) if term)
+    return terms or (UNMATCHABLE_TERM,)
+
+
+@dataclass(frozen=True, slots=True)
+class AlertPlan:
+    """Immutable match plan compiled once per alert.
+
+    Holds the pre-normalized terms and numeric limits plus ``checks``, the
+    names of the predicates that apply to this alert in evaluation order.
+    Predicates that can never reject (no terms, no limit) are left out, so an
+    alert without match strings never runs the text stage.
+    """
+
+    terms: tuple[str, ...]
+    match_all: bool
+    max_price: float | None
+    bottled_year_min: int | None
+    bottled_year_max: int | None
+    age_min: int | None
+    age_max: int | None
+    checks: tuple[str, ...]
+    steps: tuple[Callable[["AlertPlan", "Asset", str], bool], ...] = field(repr=False, compare=False)
+
+    @property
+    def has_terms(self) -> bool:
+        """Whether the alert has a text stage at all."""
+        return bool(self.terms)
+
+    def matches(self, asset: "Asset", name_normalized: str) -> bool:
+        """Run the plan's checks in order against an asset and its normalized name."""
+        for step in self.steps:
+            if not step(self, asset, name_normalized):
+                return False
+        return True
+
+    def reordered(self, order: list[str] | tuple[str, ...]) -> "AlertPlan":
+        """Return a copy of the plan with its checks evaluated in the given order.
+
+        Predicates missing from ``order`` keep their relative position at the end.
+        """
+        rank = {name: i for i, name in enumerate(order)}
+        checks = tuple(sorted(self.checks, key=lambda name: rank.get(name, len(rank))))
+        return AlertPlan(
+            terms=self.terms,
+            match_all=self.match_all,
+            max_price=self.max_price,
+            bottled_year_min=self.bottled_year_min,
+            bottled_year_max=self.bottled_year_max,
+            age_min=self.age_min,
+            age_max=self.age_max,
+            checks=checks,
+            steps=_steps(checks),
+        )
+
+
+# Steps tuples by checks tuple, shared by every plan with the same checks
+_STEPS: dict[tuple[str, ...], tuple] = {}
+
+
+def _steps(checks: tuple[str, ...]) -> tuple:
+    """Return the (shared) predicate functions for a checks tuple."""
+    steps = _STEPS.get(checks)
+    if steps is None:
+        steps = _STEPS[checks] = tuple(PREDICATES[name] for name in checks)
+    return steps
+
+
+def make_plan(
+    terms: tuple[str, ...],
+    match_all: bool,
+    max_price: float | None,
+    bottled_year_min: int | None,
+    bottled_year_max: int | None,
+    age_min: int | None,
+    age_max: int | None,
+) -> AlertPlan:
+    """Build a plan from already normalized terms and an alert's limits."""
+    checks = []
+    if max_price is not None:
+        checks.append("price")
+    if bottled_year_min is not None or bottled_year_max is not None:
+        checks.append("bottled_year")
+    if age_min is not None or age_max is not None:
+        checks.append("age")
+    if terms:
+        checks.append("terms")
+    checks = tuple(checks)
+    return AlertPlan(
+        terms=terms,
+        match_all=bool(match_all),
+        max_price=max_price,
+        bottled_year_min=bottled_year_min,
+        bottled_year_max=bottled_year_max,
+        age_min=age_min,
+        age_max=age_max,
+        checks=checks,
+        steps=_steps(checks),
+    )
+
+
+def compile_plan(alert: "Alert") -> AlertPlan:
+    """Compile an alert into its match plan.
+
+    Args:
+        alert: The alert to compile.
+
+    Returns:
+        AlertPlan: The plan with normalized terms and the applicable checks.
+    """
+    return make_plan(
+        normalize_terms(alert.match_strings),
+        alert.match_all,
+        alert.max_price,
+        alert.bottled_year_min,
+        alert.bottled_year_max,
+        alert.age_min,
+        alert.age_max,
+    )
@@ -1,26 +1,68 @@
-"""Pub/Sub publishing for alert matches."""
+"""Pub/Sub publishing for alert matches, and the subscriber behind the streaming-pull worker."""
 
 import json
-
-from google.cloud import pubsub_v1
+import threading
+from collections.abc import Hashable
+from concurrent import futures
+from typing import TYPE_CHECKING
 
 from .config import config
 from .log import get_logger
-from .models import Asset
+from .models import Alert, Asset, asset_url
+
+if TYPE_CHECKING:
+    from google.cloud import pubsub_v1
 
 logger = get_logger()
 
+# Shared publisher, created on first use and reused across warm invocations
+_publisher = None
+_publisher_lock = threading.Lock()
+_subscriber = None
+_subscriber_lock = threading.Lock()
+
+
+def get_publisher() -> "pubsub_v1.PublisherClient":
+    """Return the shared PublisherClient, creating it with batch settings on first use."""
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                # Imported here so the client library stays off the cold-start import path
+                from google.cloud import pubsub_v1
+
+                batch_settings = pubsub_v1.types.BatchSettings(
+                    max_messages=config.pubsub_batch_max_messages,
+                    max_bytes=config.pubsub_batch_max_bytes,
+                    max_latency=config.pubsub_batch_max_latency_sec,
+                )
+                _publisher = pubsub_v1.PublisherClient(batch_settings=batch_settings)
+                logger.info(
+                    f"Created Pub/Sub publisher: max_messages={config.pubsub_batch_max_messages}, "
+                    f"max_bytes={config.pubsub_batch_max_bytes}, "
+                    f"max_latency={config.pubsub_batch_max_latency_sec}s"
+                )
+    return _publisher
 
-def publish_match(alert_id: int, user_id: int, asset: Asset, match_idx: int, alert_name: str, user_email: str) -> None:
-    """Publish a match to the alert-matches topic."""
-    if not config.gcp_project_id:
-        logger.warning("No GCP_PROJECT_ID configured, skipping publish")
-        return
 
-    publisher = pubsub_v1.PublisherClient()
-    topic_path = publisher.topic_path(
-        config.gcp_project_id, config.pubsub_topic)
+def get_subscriber() -> "pubsub_v1.SubscriberClient":
+    """Return the shared SubscriberClient used by the streaming-pull worker, creating it on first use.
 
+    Like the publisher, it talks to the emulator when ``PUBSUB_EMULATOR_HOST`` is set.
+    """
+    global _subscriber
+    if _subscriber is None:
+        with _subscriber_lock:
+            if _subscriber is None:
+                from google.cloud import pubsub_v1
+
+                _subscriber = pubsub_v1.SubscriberClient()
+    return _subscriber
+
+
+def _encode_match(alert_id: int, user_id: int, asset: Asset, match_idx: int, alert_name: str,
+                  user_email: str) -> bytes:
+    """Build the JSON body of an alert-match message."""
     message = {
         "match_idx": match_idx,
         "alert_id": alert_id,
@@ -32,12 +74,167 @@ def publish_match(alert_id: int, user_id: int, asset: Asset, match_idx: int, ale
         "alert_name": alert_name,
         "user_email": user_email
     }
+    return json.dumps(message).encode("utf-8")
+
+
+def wait_for_publishes(pending: dict[futures.Future, Hashable]) -> dict[Hashable, Exception]:
+    """Wait for publish futures together, up to PUBSUB_PUBLISH_TIMEOUT_SEC.
+
+    Args:
+        pending: Publish futures, each mapped to the key its error is reported under.
+
+    Returns:
+        dict: The error of each key whose publish failed or did not complete in time.
+    """
+    errors: dict[Hashable, Exception] = {}
+    if not pending:
+        return errors
+    done, not_done = futures.wait(pending, timeout=config.pubsub_publish_timeout_sec)
+    for future in not_done:
+        errors[pending[future]] = TimeoutError("publish did not complete in time")
+    for future in done:
+        error = future.exception()
+        if error is not None:
+            errors[pending[future]] = error
+    return errors
+
+
+def submit_matches(
+    asset: Asset, matches: list[tuple[Alert, int]], publisher, topic_path: str
+) -> tuple[dict[futures.Future, int], dict[int, Exception]]:
+    """Hand every match to the publisher without waiting for any of them.
+
+    Returns:
+        tuple: The pending futures mapped to their alert id, and the error for
+        each alert whose message could not even be queued.
+    """
+    pending: dict[futures.Future, int] = {}
+    errors: dict[int, Exception] = {}
+    for alert, match_idx in matches:
+        try:
+            data = _encode_match(alert.id, alert.user_id, asset, match_idx, alert.name, alert.user_email)
+            future = publisher.publish(topic_path, data, event_type="baxus_listing_alert")
+            pending[future] = alert.id
+        except Exception as e:
+            errors[alert.id] = e
+    return pending, errors
+
+
+def publish_matches(asset: Asset, matches: list[tuple[Alert, int]], publisher=None) -> dict[int, Exception]:
+    """Publish all matches for an asset concurrently and wait for them together.
+
+    Every message is handed to the batching publisher first; the futures are
+    then gathered once, so fan-out latency is roughly one batch round trip
+    rather than one round trip per match.
+
+    Args:
+        asset: The matched asset.
+        matches: (alert, match_idx) pairs to publish.
+        publisher: Publisher to use instead of the shared client (e.g. LocalPublisher).
+
+    Returns:
+        dict[int, Exception]: The error for each alert whose message failed to publish.
+    """
+    if not matches:
+        return {}
+    if not config.gcp_project_id:
+        logger.warning("No GCP_PROJECT_ID configured, skipping publish")
+        return {}
+
+    publisher = publisher or get_publisher()
+    topic_path = publisher.topic_path(config.gcp_project_id, config.pubsub_topic)
 
-    data = json.dumps(message).encode("utf-8")
-    future = publisher.publish(
-        topic_path, data, event_type="baxus_listing_alert")
-    future.result()  # Wait for publish to complete
+    pending, errors = submit_matches(asset, matches, publisher, topic_path)
 
+    errors.update(wait_for_publishes(pending))
+
+    for alert_id, error in errors.items():
+        logger.warning(f"Failed to publish match for alert={alert_id}, asset_idx={asset.asset_idx}: {error}")
+    logger.info(
+        f"Published {len(matches) - len(errors)} of {len(matches)} matches to {config.pubsub_topic} "
+        f"for asset_idx={asset.asset_idx}"
+    )
+    return errors
+
+
+def publish_match_batch(
+    items: list[tuple[Asset, list[tuple[Alert, int]]]], publisher=None
+) -> dict[tuple[int, int], Exception]:
+    """Publish the matches of several assets and wait for all of them together.
+
+    Args:
+        items: (asset, [(alert, match_idx), ...]) pairs to publish.
+        publisher: Publisher to use instead of the shared client (e.g. LocalPublisher).
+
+    Returns:
+        dict[tuple[int, int], Exception]: The error for each match whose
+        message failed to publish, keyed by (alert_id, asset_idx).
+    """
+    total = sum(len(matches) for _, matches in items)
+    if not total:
+        return {}
+    if not config.gcp_project_id:
+        logger.warning("No GCP_PROJECT_ID configured, skipping publish")
+        return {}
+
+    publisher = publisher or get_publisher()
+    topic_path = publisher.topic_path(config.gcp_project_id, config.pubsub_topic)
+
+    pending: dict[futures.Future, tuple[int, int]] = {}
+    errors: dict[tuple[int, int], Exception] = {}
+    for asset, matches in items:
+        asset_pending, asset_errors = submit_matches(asset, matches, publisher, topic_path)
+        pending.update((future, (alert_id, asset.asset_idx)) for future, alert_id in asset_pending.items())
+        errors.update(((alert_id, asset.asset_idx), error) for alert_id, error in asset_errors.items())
+
+    errors.update(wait_for_publishes(pending))
+
+    for (alert_id, asset_idx), error in errors.items():
+        logger.warning(f"Failed to publish match for alert={alert_id}, asset_idx={asset_idx}: {error}")
     logger.info(
-        f"Published match to {config.pubsub_topic}: alert={alert_id}, asset_idx={asset.asset_idx}"
+        f"Published {total - len(errors)} of {total} matches to {config.pubsub_topic} across {len(items)} assets"
     )
+    return errors
+
+
+def _encode_digest(digest: dict) -> bytes:
+    """Build the JSON body of a digest message (several held-back matches of one user)."""
+    message = {
+        "digest_idx": digest["digest_idx"],
+        "user_id": digest["user_id"],
+        "user_email": digest["user_email"],
+        "match_count": digest["match_count"],
+        "matches": [{**match, "asset_url": asset_url(match["asset_idx"])} for match in digest["matches"]],
+    }
+    return json.dumps(message).encode("utf-8")
+
+
+def publish_digests(digests: list[dict], publisher=None) -> dict[int, Exception]:
+    """Publish claimed digests (see ``claim_due_digests``) and wait for them together.
+
+    Returns:
+        dict[int, Exception]: The error for each digest_idx whose message failed to publish.
+    """
+    if not digests:
+        return {}
+    if not config.gcp_project_id:
+        logger.warning("No GCP_PROJECT_ID configured, skipping publish")
+        return {}
+    publisher = publisher or get_publisher()
+    topic_path = publisher.topic_path(config.gcp_project_id, config.pubsub_topic)
+
+    pending: dict[futures.Future, int] = {}
+    errors: dict[int, Exception] = {}
+    for digest in digests:
+        try:
+            future = publisher.publish(topic_path, _encode_digest(digest), event_type="baxus_listing_digest")
+            pending[future] = digest["digest_idx"]
+        except Exception as e:
+            errors[digest["digest_idx"]] = e
+
+    errors.update(wait_for_publishes(pending))
+
+    for digest_idx, error in errors.items():
+        logger.warning(f"Failed to publish digest_idx={digest_idx}: {error}")
+    logger.info(f"Published {len(digests) - len(errors)} of {len(digests)} digests to {config.pubsub_topic}")
+    return errors
@@ -0,0 +1,114 @@
+"""Sorted-array index over alert price, bottled year and age limits."""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+
+from .models import Alert
+
+
+class _SortedBound:
+    """One numeric bound of every alert, sorted by value.
+
+    ``positions`` lists the alerts that set the bound in ascending bound order,
+    and ``ranks`` maps an alert position back to its index in that order (-1
+    when the alert leaves the bound unset). Alerts rejected by a given asset
+    value are always one contiguous rank range, found with a single bisect.
+    """
+
+    def __init__(self, values: list[float | int | None], upper: bool):
+        bounded = sorted((value, position) for position, value in enumerate(values) if value is not None)
+        self.upper = upper
+        self.values = [value for value, _ in bounded]
+        self.positions = [position for _, position in bounded]
+        self.ranks = [-1] * len(values)
+        for rank, position in enumerate(self.positions):
+            self.ranks[position] = rank
+
+    def rejected(self, value: float | int | None, none_passes: bool) -> tuple[int, int]:
+        """Return the rank range [start, end) of alerts this asset value fails."""
+        if value is None:
+            return (0, 0) if none_passes else (0, len(self.positions))
+        if self.upper:
+            # Fails when value > bound: every bound strictly below the value
+            return 0, bisect_left(self.values, value)
+        # Fails when value < bound: every bound strictly above the value
+        return bisect_right(self.values, value), len(self.positions)
+
+
+class RangeIndex:
+    """Index answering "which alerts accept this price, bottled year and age".
+
+    Keeps the None handling of ``matches_filters``: a missing asset price passes
+    ``max_price``, while an alert with a bottled year or age bound rejects an
+    asset that has no value for it.
+    """
+
+    def __init__(self, alerts: list[Alert]):
+        self.size = len(alerts)
+        self._max_price = _SortedBound([a.max_price for a in alerts], upper=True)
+        self._year_min = _SortedBound([a.bottled_year_min for a in alerts], upper=False)
+        self._year_max = _SortedBound([a.bottled_year_max for a in alerts], upper=True)
+        self._age_min = _SortedBound([a.age_min for a in alerts], upper=False)
+        self._age_max = _SortedBound([a.age_max for a in alerts], upper=True)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def rejected_ranges(
+        self,
+        price: float | None,
+        bottled_year: int | None,
+        age: int | None,
+    ) -> list[tuple[_SortedBound, int, int]]:
+        """Return, per bound, the rank range of alerts the asset values fail.
+
+        Only depends on the three values; ``apply`` removes the ranges from a
+        set of candidates.
+        """
+        checks = (
+            (self._max_price, price, True),
+            (self._year_min, bottled_year, False),
+            (self._year_max, bottled_year, False),
+            (self._age_min, age, False),
+            (self._age_max, age, False),
+        )
+        ranges = []
+        for bound, value, none_passes in checks:
+            start, end = bound.rejected(value, none_passes)
+            if start < end:
+                ranges.append((bound, start, end))
+        return ranges
+
+    def apply(self, ranges: list[tuple[_SortedBound, int, int]], candidates: Iterable[int] | None = None) -> set[int]:
+        """Remove the alerts in the given rejected ranges from the candidates (default: all)."""
+        result = set(range(self.size)) if candidates is None else set(candidates)
+        for bound, start, end in ranges:
+            if not result:
+                break
+            if end - start <= len(result):
+                result.difference_update(bound.positions[start:end])
+            else:
+                ranks = bound.ranks
+                result = {p for p in result if not start <= ranks[p] < end}
+        return result
+
+    def matching(
+        self,
+        price: float | None,
+        bottled_year: int | None,
+        age: int | None,
+        candidates: Iterable[int] | None = None,
+    ) -> set[int]:
+        """Return positions of alerts whose numeric limits pass for the asset values.
+
+        Args:
+            price: The asset price (None passes every max_price).
+            bottled_year: The asset bottled year.
+            age: The asset age.
+            candidates: Optional positions to restrict the answer to, e.g. the
+                text-match survivors. Avoids building a set of every alert.
+
+        Returns:
+            set[int]: Alert positions that pass every numeric check.
+        """
+        return self.apply(self.rejected_ranges(price, bottled_year, age), candidates)
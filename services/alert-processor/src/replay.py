@@ -0,0 +1,311 @@
+"""Replay listing history through the matcher.
+
+Answers "what would these alerts have fired on over the last N days", and
+how a matcher change or an edited alert definition would change that.
+NEW_LISTING rows from ``baxus.activity_feed`` (joined to ``baxus.assets``)
+are streamed in column chunks through a server-side cursor
+(``iter_listing_history``) and batch matched chunk by chunk.
+
+Two sides are replayed over the same rows: side A is the alerts as stored
+with ``--engine``; side B uses ``--compare-engine`` and/or the alert
+definitions from ``--definitions``. The report lists per-alert hit counts
+on both sides and the listings only one side matched.
+
+With the columnar engine (the default) a chunk is matched as columns by
+``ColumnarAlerts.match_pairs``: the text stage runs once per distinct name
+for the whole replay and the numeric limits are checked for all candidate
+(listing, alert) pairs in one vectorized pass. The other engines go
+through ``match_batch``, once per distinct (name, price, bottled year,
+age) in a chunk, which is much slower; use them to check an engine change.
+
+Run offline from the alert-processor directory:
+
+    python -m src.replay --days 90 --alert-id 9f1c...
+    python -m src.replay --days 90 --engine index --compare-engine columnar
+    python -m src.replay --days 30 --definitions edited_alerts.json --json
+
+``--definitions`` is a JSON list of alert fields keyed by ``id``, e.g.
+``[{"id": "9f1c...", "match_strings": ["weller", "12"], "match_all": true}]``;
+unknown ids are replayed as new alerts.
+"""
+
+import argparse
+import dataclasses
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from .columnar import ColumnarAlerts
+from .log import get_logger
+from .matcher import IN_PROCESS_ENGINES, AlertMatcher, build_index
+from .models import Alert, Asset
+from .repository import get_alerts, get_alerts_by_id, iter_listing_history
+
+logger = get_logger()
+
+# Listings kept per alert and side as examples in the report
+DEFAULT_EXAMPLES = 5
+
+
+@dataclass
+class AlertReplay:
+    """Replay results of one alert on both sides."""
+
+    alert_id: str
+    name: str
+    hits_a: int = 0
+    hits_b: int = 0
+    only_a: int = 0
+    only_b: int = 0
+    examples_only_a: list[int] = field(default_factory=list)
+    examples_only_b: list[int] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        """Whether the two sides disagree on any listing."""
+        return bool(self.only_a or self.only_b)
+
+
+@dataclass
+class ReplayReport:
+    """Totals and per-alert results of a replay."""
+
+    since: datetime
+    until: datetime
+    rows: int = 0
+    elapsed_sec: float = 0.0
+    alerts: list[AlertReplay] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """JSON-ready report, changed alerts first, then by hit count."""
+        return {
+            "since": self.since.isoformat(),
+            "until": self.until.isoformat(),
+            "rows": self.rows,
+            "elapsed_sec": round(self.elapsed_sec, 3),
+            "rows_per_sec": round(self.rows / self.elapsed_sec, 1) if self.elapsed_sec else None,
+            "alerts": [dataclasses.asdict(alert) for alert in self.ranked()],
+        }
+
+    def ranked(self) -> list[AlertReplay]:
+        """Changed alerts first (most differences first), then by hit count."""
+        return sorted(
+            self.alerts,
+            key=lambda a: (not a.changed, -(a.only_a + a.only_b), -max(a.hits_a, a.hits_b), a.alert_id),
+        )
+
+
+def apply_definitions(alerts: list[Alert], definitions: list[dict]) -> list[Alert]:
+    """Return the alert set with edited definitions applied (plans recompiled).
+
+    Alerts keep their positions; alerts with unknown ids are appended.
+
+    Args:
+        alerts: The alerts as stored.
+        definitions: Alert fields keyed by ``id``.
+
+    Returns:
+        list[Alert]: New alert objects; the input alerts are left untouched.
+    """
+    by_id = {str(d["id"]): d for d in definitions}
+    edited = []
+    for alert in alerts:
+        changes = by_id.pop(str(alert.id), None)
+        if changes:
+            alert = dataclasses.replace(alert, **{k: v for k, v in changes.items() if k != "id"}, plan=None)
+        edited.append(alert)
+    for alert_id, changes in by_id.items():
+        fields = {
+            "user_id": None, "user_email": None, "name": alert_id, "match_strings": [], "match_all": False,
+            "max_price": None, "bottled_year_min": None, "bottled_year_max": None, "age_min": None, "age_max": None,
+        }
+        fields.update({k: v for k, v in changes.items() if k != "id"})
+        edited.append(Alert(id=alert_id, **fields))
+    return edited
+
+
+class _Side:
+    """One side of a replay: an alert set compiled into an engine."""
+
+    def __init__(self, alerts: list[Alert], engine: str):
+        self.engine = engine
+        self.index: AlertMatcher = build_index(alerts, engine)
+        self._positions = {id(alert): position for position, alert in enumerate(alerts)}
+        self._text_cache: dict[str, np.ndarray] = {}
+
+    def match_chunk(
+        self, names: list[str], prices: list, bottled_years: list, ages: list
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return the (row, alert position) pairs matched in a chunk, ordered by row."""
+        if isinstance(self.index, ColumnarAlerts):
+            columns = ColumnarAlerts.asset_columns(prices, bottled_years, ages)
+            return self.index.match_pairs(names, *columns, text_cache=self._text_cache)
+
+        # One asset per distinct matching input; asset_idx is only the result key here
+        keys: dict[tuple, int] = {}
+        row_keys = [keys.setdefault(key, len(keys)) for key in zip(names, prices, bottled_years, ages)]
+        assets = [
+            Asset(key_id, None, name, price, bottled_year, age, None, name_normalized=name)
+            for key_id, (name, price, bottled_year, age) in enumerate(keys)
+        ]
+        matches = self.index.match_batch(assets)
+        positions = self._positions
+        by_key = [sorted(positions[id(alert)] for alert in matches[key_id]) for key_id in range(len(assets))]
+        rows = [row for row, key_id in enumerate(row_keys) for _ in by_key[key_id]]
+        found = [position for key_id in row_keys for position in by_key[key_id]]
+        return np.array(rows, dtype=np.int64), np.array(found, dtype=np.int64)
+
+
+def _add_examples(examples: list[list[int]], limit: int, positions: np.ndarray, activity_idxs: np.ndarray) -> None:
+    """Append up to ``limit`` activity_idx examples per alert position."""
+    for position in np.unique(positions):
+        missing = limit - len(examples[position])
+        if missing > 0:
+            examples[position].extend(activity_idxs[positions == position][:missing].tolist())
+
+
+def replay(
+    alerts_a: list[Alert],
+    alerts_b: list[Alert],
+    since: datetime,
+    until: datetime,
+    engine_a: str = "columnar",
+    engine_b: str = "columnar",
+    chunk_size: int = 50_000,
+    examples: int = DEFAULT_EXAMPLES,
+) -> ReplayReport:
+    """Replay the listings between since and until against two alert sets.
+
+    Args:
+        alerts_a: Alerts of side A.
+        alerts_b: Alerts of side B: the same list, or ``apply_definitions(alerts_a, ...)``
+            (alerts at the same positions, new ones appended).
+        since: Earliest listing date (inclusive).
+        until: Latest listing date (exclusive).
+        engine_a: Matching engine of side A.
+        engine_b: Matching engine of side B.
+        chunk_size: Rows per server-side cursor chunk.
+        examples: activity_idx examples kept per alert for listings only one side matched.
+
+    Returns:
+        ReplayReport: Per-alert hit counts and differences.
+    """
+    start = time.perf_counter()
+    size = len(alerts_b)
+    side_a = _Side(alerts_a, engine_a)
+    # One pass suffices when both sides are identical
+    side_b = side_a if alerts_b is alerts_a and engine_b == engine_a else _Side(alerts_b, engine_b)
+
+    hits_a = np.zeros(size, dtype=np.int64)
+    hits_b = np.zeros(size, dtype=np.int64)
+    only_a = np.zeros(size, dtype=np.int64)
+    only_b = np.zeros(size, dtype=np.int64)
+    examples_a: list[list[int]] = [[] for _ in range(size)]
+    examples_b: list[list[int]] = [[] for _ in range(size)]
+    rows = 0
+
+    for activity_idxs, _, names, prices, bottled_years, ages in iter_listing_history(since, until, chunk_size):
+        rows += len(activity_idxs)
+        rows_a, positions_a = side_a.match_chunk(names, prices, bottled_years, ages)
+        hits_a += np.bincount(positions_a, minlength=size)
+        if side_b is side_a:
+            continue
+
+        rows_b, positions_b = side_b.match_chunk(names, prices, bottled_years, ages)
+        hits_b += np.bincount(positions_b, minlength=size)
+        # Compare the sides pair by pair, each (row, alert) encoded as one integer
+        pairs_a = rows_a * size + positions_a
+        pairs_b = rows_b * size + positions_b
+        diff_a = np.setdiff1d(pairs_a, pairs_b, assume_unique=True)
+        diff_b = np.setdiff1d(pairs_b, pairs_a, assume_unique=True)
+        if len(diff_a) or len(diff_b):
+            activity_column = np.asarray(activity_idxs, dtype=np.int64)
+            only_a += np.bincount(diff_a % size, minlength=size)
+            only_b += np.bincount(diff_b % size, minlength=size)
+            _add_examples(examples_a, examples, diff_a % size, activity_column[diff_a // size])
+            _add_examples(examples_b, examples, diff_b % size, activity_column[diff_b // size])
+
+    if side_b is side_a:
+        hits_b = hits_a
+    report = ReplayReport(since=since, until=until, rows=rows, elapsed_sec=time.perf_counter() - start)
+    report.alerts = [
+        AlertReplay(
+            alert_id=str(alert.id), name=alert.name,
+            hits_a=int(hits_a[position]) if position < len(alerts_a) else 0, hits_b=int(hits_b[position]),
+            only_a=int(only_a[position]), only_b=int(only_b[position]),
+            examples_only_a=examples_a[position], examples_only_b=examples_b[position],
+        )
+        for position, alert in enumerate(alerts_b)
+    ]
+    logger.info(
+        f"Replayed {rows} listings against {len(alerts_a)}/{len(alerts_b)} alerts "
+        f"({engine_a}/{engine_b}), took={report.elapsed_sec:.2f}s"
+    )
+    return report
+
+
+def _print_report(report: ReplayReport, label_a: str, label_b: str, top: int) -> None:
+    rate = report.rows / report.elapsed_sec if report.elapsed_sec else 0.0
+    print(
+        f"Replayed {report.rows} NEW_LISTING rows from {report.since:%Y-%m-%d} to {report.until:%Y-%m-%d} "
+        f"in {report.elapsed_sec:.2f}s ({rate:,.0f} rows/s)"
+    )
+    print(f"A = {label_a}, B = {label_b}")
+    ranked = report.ranked()
+    print(f"{sum(1 for a in ranked if a.changed)} of {len(ranked)} alerts differ")
+    print(f"{'alert_id':<38} {'hits A':>8} {'hits B':>8} {'only A':>8} {'only B':>8}  name")
+    for result in ranked[:top]:
+        print(
+            f"{result.alert_id:<38} {result.hits_a:>8} {result.hits_b:>8} {result.only_a:>8} {result.only_b:>8}  "
+            f"{result.name[:40]}"
+        )
+        if result.examples_only_a:
+            print(f"{'':<38} only A: activity_idx {result.examples_only_a}")
+        if result.examples_only_b:
+            print(f"{'':<38} only B: activity_idx {result.examples_only_b}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=float, default=90, help="replay this many days back from --until")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None,
+                        help="end of the window (default now, UTC)")
+    parser.add_argument("--alert-id", action="append", default=[], help="replay only these alerts (repeatable)")
+    parser.add_argument("--engine", default="columnar", choices=IN_PROCESS_ENGINES, help="engine of side A")
+    parser.add_argument("--compare-engine", default=None, choices=IN_PROCESS_ENGINES, help="engine of side B")
+    parser.add_argument("--definitions", default=None, help="JSON file of edited alert definitions for side B")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--examples", type=int, default=DEFAULT_EXAMPLES)
+    parser.add_argument("--top", type=int, default=50, help="alerts listed in the text report")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    definitions = []
+    if args.definitions:
+        with open(args.definitions) as f:
+            definitions = json.load(f)
+    alert_ids = args.alert_id + [str(d["id"]) for d in definitions] if args.alert_id else []
+    # Without ids, the alerts that currently send emails
+    alerts_a = get_alerts_by_id(alert_ids) if alert_ids else get_alerts()
+    alerts_b = apply_definitions(alerts_a, definitions) if definitions else alerts_a
+
+    until = args.until or datetime.now(timezone.utc).replace(tzinfo=None)
+    since = until - timedelta(days=args.days)
+    engine_b = args.compare_engine or args.engine
+    report = replay(
+        alerts_a, alerts_b, since, until, engine_a=args.engine, engine_b=engine_b,
+        chunk_size=args.chunk_size, examples=args.examples,
+    )
+
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+        return
+    label_b = f"{engine_b} engine" + (f", definitions from {args.definitions}" if definitions else ", stored alerts")
+    _print_report(report, f"{args.engine} engine, stored alerts", label_b, args.top)
+
+
+if __name__ == "__main__":
+    main()
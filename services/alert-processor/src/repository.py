@@ -1,13 +1,13 @@
 """Database repository for alerts and matches."""
-from sqlalchemy import text
+from collections.abc import Iterator
 
-from .config import config
-from .db import Database
+from .db import get_database
 from .log import get_logger
-from .models import Alert
+from .models import Alert, AlertMatch, Asset
 
 logger = get_logger()
 
+
 # Column names for alerts query
 ALERT_COLUMNS = [
     "id",
@@ -26,8 +26,9 @@ ALERT_COLUMNS = [
 
 def get_alerts() -> list[Alert]:
     """Fetch all active alerts from the database."""
-    db = Database(config=config)
-    conn = db.get_connection()
+    from sqlalchemy import text
+
+    conn = get_database().get_connection()
     try:
         result = conn.execute(
             text("""
@@ -41,7 +42,248 @@ def get_alerts() -> list[Alert]:
         return [Alert.from_row(row, ALERT_COLUMNS) for row in rows]
     finally:
         conn.close()
-        db.close()
+
+
+def get_candidate_alerts(asset: Asset) -> list[Alert]:
+    """Fetch the alerts that can match an asset, filtered in Postgres.
+
+    Terms are looked up in ``alert_terms`` by their 3-character prefix
+    (one index probe per short substring of the name) and confirmed with
+    ``strpos``; match_all alerts need every term. Price, bottled year and age limits and email consent are
+    applied to those candidates. Callers still run ``matches_alert`` on the
+    result, which stays the definition of a match.
+    """
+    from sqlalchemy import text
+
+    conn = get_database().get_connection()
+    try:
+        result = conn.execute(
+            text("""
+            WITH hits AS (
+                SELECT t.alert_id, count(*) AS hit_count, max(t.term_count) AS term_count
+                FROM alert_terms t
+                WHERE t.gram = ANY(alert_name_grams(:name_normalized))
+                  AND strpos(:name_normalized, t.term) > 0
+                GROUP BY t.alert_id
+            )
+            SELECT a.id, a.user_id, a.name, a.match_strings, a.match_all, a.max_price,
+                   a.bottled_year_min, a.bottled_year_max, a.age_min, a.age_max,
+                   a.user_email
+            FROM hits h
+            JOIN alerts_with_email_consent a ON a.id = h.alert_id
+            WHERE (NOT a.match_all OR h.hit_count >= h.term_count)
+              AND (CAST(:price AS double precision) IS NULL
+                   OR a.max_price IS NULL OR :price <= a.max_price)
+              AND ((a.bottled_year_min IS NULL AND a.bottled_year_max IS NULL)
+                   OR (CAST(:bottled_year AS integer) IS NOT NULL
+                       AND (a.bottled_year_min IS NULL OR a.bottled_year_min <= :bottled_year)
+                       AND (a.bottled_year_max IS NULL OR a.bottled_year_max >= :bottled_year)))
+              AND ((a.age_min IS NULL AND a.age_max IS NULL)
+                   OR (CAST(:age AS integer) IS NOT NULL
+                       AND (a.age_min IS NULL OR a.age_min <= :age)
+                       AND (a.age_max IS NULL OR a.age_max >= :age)))
+        """),
+            {
+                "name_normalized": asset.name_normalized,
+                "price": asset.price,
+                "bottled_year": asset.bottled_year,
+                "age": asset.age,
+            },
+        )
+        return [Alert.from_row(row, ALERT_COLUMNS) for row in result.fetchall()]
+    finally:
+        conn.close()
+
+
+def get_alerts_by_id(alert_ids: list[str]) -> list[Alert]:
+    """Fetch the given alerts, whether or not their owners consented to emails."""
+    from sqlalchemy import text
+
+    if not alert_ids:
+        return []
+
+    conn = get_database().get_connection()
+    try:
+        result = conn.execute(
+            text("""
+            SELECT a.id, a.user_id, a.name, a.match_strings, a.match_all, a.max_price,
+                   a.bottled_year_min, a.bottled_year_max, a.age_min, a.age_max,
+                   u.email AS user_email
+            FROM alerts a
+            JOIN users u ON u.id = a.user_id
+            WHERE a.id = ANY(CAST(:alert_ids AS varchar[]))
+        """),
+            {"alert_ids": list(alert_ids)},
+        )
+        return [Alert.from_row(row, ALERT_COLUMNS) for row in result.fetchall()]
+    finally:
+        conn.close()
+
+
+def iter_listed_assets(batch_size: int) -> Iterator[list[Asset]]:
+    """Stream the currently listed assets in batches through a server-side cursor.
+
+    Each asset carries its latest NEW_LISTING activity (the key of
+    ``alert_assets``) and its current price. Only one batch of rows is held
+    in memory at a time.
+
+    Args:
+        batch_size: Rows fetched from the cursor per batch.
+
+    Yields:
+        list[Asset]: The next batch of listed assets, one per asset_idx.
+    """
+    from sqlalchemy import text
+
+    conn = get_database().get_connection()
+    try:
+        result = conn.execution_options(yield_per=batch_size).execute(
+            text("""
+            SELECT a.asset_idx, l.activity_idx, a.name, a.price, a.bottled_year, a.age,
+                   coalesce(a.name_normalized, normalize_name(a.name)) AS name_normalized
+            FROM baxus.assets a
+            JOIN LATERAL (
+                SELECT af.activity_idx
+                FROM baxus.activity_feed af
+                JOIN baxus.dim_activity_types dat ON dat.activity_type_idx = af.activity_type_idx
+                WHERE af.asset_idx = a.asset_idx
+                  AND dat.activity_type_code = 'NEW_LISTING'
+                ORDER BY af.activity_idx DESC
+                LIMIT 1
+            ) l ON true
+            WHERE a.is_listed
+        """)
+        )
+        for rows in result.partitions(batch_size):
+            yield [
+                Asset(
+                    asset_idx=asset_idx, activity_idx=activity_idx, name=name, price=price,
+                    bottled_year=bottled_year, age=age, url=None, name_normalized=name_normalized,
+                )
+                for asset_idx, activity_idx, name, price, bottled_year, age, name_normalized in rows
+            ]
+    finally:
+        conn.close()
+
+
+def iter_listing_history(since, until, chunk_size: int) -> Iterator[tuple[list, ...]]:
+    """Stream NEW_LISTING activities in column chunks through a server-side cursor.
+
+    Each listing is joined to its asset for the name, bottled year and age,
+    and carries the price it was listed at.
+
+    Args:
+        since: Earliest activity_date (inclusive).
+        until: Latest activity_date (exclusive).
+        chunk_size: Rows fetched from the cursor per chunk.
+
+    Yields:
+        tuple[list, ...]: Columns activity_idx, asset_idx, name_normalized,
+        price, bottled_year and age of the next chunk, in activity order.
+    """
+    from sqlalchemy import text
+
+    conn = get_database().get_connection()
+    try:
+        result = conn.execution_options(yield_per=chunk_size).execute(
+            text("""
+            SELECT af.activity_idx, af.asset_idx,
+                   coalesce(a.name_normalized, normalize_name(a.name)) AS name_normalized,
+                   af.price, a.bottled_year, a.age
+            FROM baxus.activity_feed af
+            JOIN baxus.dim_activity_types dat ON dat.activity_type_idx = af.activity_type_idx
+            JOIN baxus.assets a ON a.asset_idx = af.asset_idx
+            WHERE dat.activity_type_code = 'NEW_LISTING'
+              AND af.activity_date >= :since
+              AND af.activity_date < :until
+            ORDER BY af.activity_idx
+        """),
+            {"since": since, "until": until},
+        )
+        for rows in result.partitions(chunk_size):
+            yield tuple(map(list, zip(*rows)))
+    finally:
+        conn.close()
+
+
+def replace_alert_assets(alert_ids: list[str], activity_idxs: dict[str, list[int]], summaries: dict[str, str]) -> int:
+    """Replace the stored listing matches of alerts in one transaction.
+
+    Deletes the alerts' ``alert_assets`` rows, bulk inserts the new ones and
+    sets ``matching_assets_string`` / ``matching_assets_last_updated``.
+
+    Args:
+        alert_ids: The alerts whose matches are replaced.
+        activity_idxs: Matching activity indexes, keyed by alert id.
+        summaries: New matching_assets_string of each alert, keyed by alert id.
+
+    Returns:
+        int: Number of alert_assets rows inserted.
+    """
+    from sqlalchemy import text
+
+    if not alert_ids:
+        return 0
+
+    pairs = [(alert_id, activity_idx) for alert_id in alert_ids for activity_idx in activity_idxs.get(alert_id, ())]
+    conn = get_database().get_connection()
+    try:
+        conn.execute(
+            text("DELETE FROM alert_assets WHERE alert_id = ANY(CAST(:alert_ids AS varchar[]))"),
+            {"alert_ids": list(alert_ids)},
+        )
+        inserted = 0
+        if pairs:
+            result = conn.execute(
+                text("""
+                    INSERT INTO alert_assets (alert_id, activity_idx)
+                    SELECT *
+                    FROM unnest(
+                        CAST(:alert_ids AS varchar[]),
+                        CAST(:activity_idxs AS integer[])
+                    )
+                    ON CONFLICT DO NOTHING
+                """),
+                {
+                    "alert_ids": [alert_id for alert_id, _ in pairs],
+                    "activity_idxs": [activity_idx for _, activity_idx in pairs],
+                },
+            )
+            inserted = result.rowcount
+        conn.execute(
+            text("""
+                UPDATE alerts a
+                SET matching_assets_string = s.summary,
+                    matching_assets_last_updated = now()
+                FROM unnest(
+                    CAST(:alert_ids AS varchar[]),
+                    CAST(:summaries AS varchar[])
+                ) AS s(alert_id, summary)
+                WHERE a.id = s.alert_id
+            """),
+            {
+                "alert_ids": list(alert_ids),
+                "summaries": [summaries[alert_id][:200] for alert_id in alert_ids],
+            },
+        )
+        conn.commit()
+        return inserted
+    finally:
+        conn.close()
+
+
+def get_alert_set_version() -> int | None:
+    """Return the alert set version bumped by triggers on alerts and users."""
+    from sqlalchemy import text
+
+    conn = get_database().get_connection()
+    try:
+        result = conn.execute(
+            text("SELECT version FROM alert_set_version WHERE id = 1")
+        )
+        return result.scalar()
+    finally:
+        conn.close()
 
 
 def insert_alert_match(
@@ -50,9 +292,13 @@ def insert_alert_match(
     activity_idx: int | None,
     asset_idx: int,
 ) -> int | None:
-    """Insert a match into the alert_matches table and return the new row id."""
-    db = Database(config=config)
-    conn = db.get_connection()
+    """Insert a match into the alert_matches table and return the new row id.
+
+    Returns None when the match was already recorded for this activity.
+    """
+    from sqlalchemy import text
+
+    conn = get_database().get_connection()
     try:
         result = conn.execute(
             text("""
@@ -60,6 +306,7 @@ def insert_alert_match(
                     (alert_id, listing_source, activity_idx, asset_idx)
                 VALUES 
                     (:alert_id, :listing_source, :activity_idx, :asset_idx)
+                ON CONFLICT (alert_id, activity_idx) DO NOTHING
                 RETURNING match_idx
             """),
             {
@@ -74,4 +321,300 @@ def insert_alert_match(
         return match_idx
     finally:
         conn.close()
-        db.close()
+
+
+def insert_alert_matches(matches: list[AlertMatch]) -> dict[str, int]:
+    """Insert all matches for an asset in one statement.
+
+    Matches already recorded for the same (alert_id, activity_idx), e.g. from a
+    Pub/Sub redelivery, are skipped by the unique key.
+
+    Args:
+        matches: The matches to insert.
+
+    Returns:
+        dict[str, int]: match_idx of each newly inserted row, keyed by alert_id (as stored, a string).
+    """
+    return {alert_id: match_idx for (alert_id, _), match_idx in insert_listing_matches(matches).items()}
+
+
+def insert_listing_matches(matches: list[AlertMatch]) -> dict[tuple[str, int], int]:
+    """Insert the matches of any number of listings in one statement.
+
+    Redelivered matches are skipped by the unique key, as in ``insert_alert_matches``.
+
+    Args:
+        matches: The matches to insert.
+
+    Returns:
+        dict[tuple[str, int], int]: match_idx of each newly inserted row, keyed by (alert_id, activity_idx).
+    """
+    from sqlalchemy import text
+
+    if not matches:
+        return {}
+
+    conn = get_database().get_connection()
+    try:
+        result = conn.execute(
+            text("""
+                INSERT INTO alert_matches
+                    (alert_id, listing_source, activity_idx, asset_idx)
+                SELECT *
+                FROM unnest(
+                    CAST(:alert_ids AS varchar[]),
+                    CAST(:listing_sources AS varchar[]),
+                    CAST(:activity_idxs AS integer[]),
+                    CAST(:asset_idxs AS integer[])
+                )
+                ON CONFLICT (alert_id, activity_idx) DO NOTHING
+                RETURNING alert_id, activity_idx, match_idx
+            """),
+            {
+                "alert_ids": [str(m.alert_id) for m in matches],
+                "listing_sources": [m.listing_source for m in matches],
+                "activity_idxs": [m.activity_idx for m in matches],
+                "asset_idxs": [m.asset_idx for m in matches],
+            },
+        )
+        inserted = {(alert_id, activity_idx): match_idx for alert_id, activity_idx, match_idx in result.fetchall()}
+        conn.commit()
+        return inserted
+    finally:
+        conn.close()
+
+
+def get_processed_activities(activity_idxs: list[int]) -> set[int]:
+    """Return the subset of activity_idxs that were already processed."""
+    from sqlalchemy import text
+
+    if not activity_idxs:
+        return set()
+
+    conn = get_database().get_connection()
+    try:
+        result = conn.execute(
+            text("""
+                SELECT activity_idx FROM processed_messages
+                WHERE activity_idx = ANY(CAST(:activity_idxs AS integer[]))
+            """),
+            {"activity_idxs": list(activity_idxs)},
+        )
+        return {row[0] for row in result.fetchall()}
+    finally:
+        conn.close()
+
+
+def mark_listings_processed(listings: dict[int, tuple[str, int]]) -> None:
+    """Record listings as processed, in one statement for any number of messages.
+
+    Args:
+        listings: (message_id, match count) of each listing, keyed by activity_idx.
+    """
+    from sqlalchemy import text
+
+    if not listings:
+        return
+
+    conn = get_database().get_connection()
+    try:
+        conn.execute(
+            text("""
+                INSERT INTO processed_messages (activity_idx, message_id, match_count)
+                SELECT *
+                FROM unnest(
+                    CAST(:activity_idxs AS integer[]),
+                    CAST(:message_ids AS varchar[]),
+                    CAST(:match_counts AS integer[])
+                )
+                ON CONFLICT (activity_idx) DO NOTHING
+            """),
+            {
+                "activity_idxs": list(listings),
+                "message_ids": [message_id for message_id, _ in listings.values()],
+                "match_counts": [count for _, count in listings.values()],
+            },
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def take_notification_tokens(requested: dict[str, int], burst: float, refill_per_sec: float) -> dict[str, int]:
+    """Take notification tokens from the users' buckets (see ``take_notification_tokens`` in SQL).
+
+    Args:
+        requested: Tokens wanted, keyed by user_id.
+        burst: Bucket capacity; new users start full.
+        refill_per_sec: Tokens added back per second.
+
+    Returns:
+        dict[str, int]: Tokens granted (0 up to the request), keyed by user_id.
+    """
+    from sqlalchemy import text
+
+    if not requested:
+        return {}
+
+    conn = get_database().get_connection()
+    try:
+        result = conn.execute(
+            text("""
+                SELECT user_id, granted
+                FROM take_notification_tokens(
+                    CAST(:user_ids AS varchar[]), CAST(:requested AS integer[]), :burst, :refill_per_sec
+                )
+            """),
+            {
+                "user_ids": [str(user_id) for user_id in requested],
+                "requested": list(requested.values()),
+                "burst": burst,
+                "refill_per_sec": refill_per_sec,
+            },
+        )
+        granted = {user_id: count for user_id, count in result.fetchall()}
+        conn.commit()
+        return granted
+    finally:
+        conn.close()
+
+
+def append_to_digests(entries: list[tuple[str, str | None, int]]) -> None:
+    """Add matches to their users' pending digests, creating the digests as needed.
+
+    Args:
+        entries: (user_id, user_email, match_idx) of each match held back.
+    """
+    from sqlalchemy import text
+
+    if not entries:
+        return
+
+    conn = get_database().get_connection()
+    try:
+        conn.execute(
+            text("""
+                INSERT INTO notification_digests AS d (user_id, user_email, match_idxs, match_count)
+                SELECT user_id, max(user_email), array_agg(match_idx ORDER BY match_idx), count(*)
+                FROM unnest(
+                    CAST(:user_ids AS varchar[]),
+                    CAST(:user_emails AS varchar[]),
+                    CAST(:match_idxs AS integer[])
+                ) AS t(user_id, user_email, match_idx)
+                GROUP BY user_id
+                ON CONFLICT (user_id) WHERE sent_at IS NULL DO UPDATE
+                SET match_idxs = d.match_idxs || excluded.match_idxs,
+                    match_count = d.match_count + excluded.match_count,
+                    user_email = coalesce(excluded.user_email, d.user_email),
+                    last_match_at = now()
+            """),
+            {
+                "user_ids": [str(user_id) for user_id, _, _ in entries],
+                "user_emails": [user_email for _, user_email, _ in entries],
+                "match_idxs": [match_idx for _, _, match_idx in entries],
+            },
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def claim_due_digests(window_sec: float, limit: int, max_items: int) -> list[dict]:
+    """Mark pending digests older than the coalescing window as sent and return them.
+
+    Digests are claimed with ``FOR UPDATE SKIP LOCKED``, so concurrent
+    instances never claim the same one. Each digest carries the details of its
+    ``max_items`` most recent matches (alert name, asset name and price).
+
+    Args:
+        window_sec: Coalescing window; a digest is due once its first match is this old.
+        limit: Most digests claimed at once.
+        max_items: Most matches detailed per digest.
+
+    Returns:
+        list[dict]: digest_idx, user_id, user_email, match_count and ``matches``.
+    """
+    from sqlalchemy import text
+
+    conn = get_database().get_connection()
+    try:
+        result = conn.execute(
+            text("""
+                UPDATE notification_digests d
+                SET sent_at = now()
+                WHERE d.digest_idx IN (
+                    SELECT digest_idx FROM notification_digests
+                    WHERE sent_at IS NULL AND first_match_at <= now() - make_interval(secs => :window_sec)
+                    ORDER BY first_match_at
+                    LIMIT :limit
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING d.digest_idx, d.user_id, d.user_email, d.match_count,
+                          d.match_idxs[greatest(1, cardinality(d.match_idxs) - :max_items + 1):]
+            """),
+            {"window_sec": window_sec, "limit": limit, "max_items": max_items},
+        )
+        digests = [
+            {"digest_idx": digest_idx, "user_id": user_id, "user_email": user_email,
+             "match_count": match_count, "match_idxs": match_idxs, "matches": []}
+            for digest_idx, user_id, user_email, match_count, match_idxs in result.fetchall()
+        ]
+        match_idxs = [match_idx for digest in digests for match_idx in digest["match_idxs"]]
+        details = {}
+        if match_idxs:
+            result = conn.execute(
+                text("""
+                    SELECT am.match_idx, al.name, am.asset_idx, ba.name, ba.price
+                    FROM alert_matches am
+                    JOIN alerts al ON al.id = am.alert_id
+                    JOIN baxus.assets ba ON ba.asset_idx = am.asset_idx
+                    WHERE am.match_idx = ANY(CAST(:match_idxs AS integer[]))
+                """),
+                {"match_idxs": match_idxs},
+            )
+            details = {row[0]: row for row in result.fetchall()}
+        for digest in digests:
+            # Newest first; matches whose alert or asset is gone are left out
+            for match_idx in reversed(digest.pop("match_idxs")):
+                row = details.get(match_idx)
+                if row is not None:
+                    _, alert_name, asset_idx, asset_name, price = row
+                    digest["matches"].append({
+                        "match_idx": match_idx, "alert_name": alert_name, "asset_idx": asset_idx,
+                        "asset_name": asset_name, "asset_price": float(price) if price is not None else None,
+                    })
+        conn.commit()
+        return digests
+    finally:
+        conn.close()
+
+
+def release_digests(digest_idxs: list[int]) -> None:
+    """Return claimed digests to pending (e.g. after a failed publish).
+
+    A digest stays sent if its user already has a new pending digest, so the
+    one-pending-digest-per-user rule holds; its matches are still recorded in
+    ``alert_matches``.
+    """
+    from sqlalchemy import text
+
+    if not digest_idxs:
+        return
+
+    conn = get_database().get_connection()
+    try:
+        conn.execute(
+            text("""
+                UPDATE notification_digests d
+                SET sent_at = NULL
+                WHERE d.digest_idx = ANY(CAST(:digest_idxs AS integer[]))
+                  AND NOT EXISTS (
+                      SELECT 1 FROM notification_digests p
+                      WHERE p.user_id = d.user_id AND p.sent_at IS NULL
+                  )
+            """),
+            {"digest_idxs": list(digest_idxs)},
+        )
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,229 @@
+"""Adaptive predicate ordering for alert plans.
+
+``AlertPlan.matches`` stops at the first predicate that rejects, so the
+order of its checks decides how much work a non-matching alert costs. The
+best order puts first the predicates that are cheap and reject often, i.e.
+ascending ``cost / rejection rate``.
+
+``PredicateOrdering`` learns both per predicate while matching runs. One
+asset in ``sample_every`` is evaluated with every check of every alert,
+without short-circuiting, timing each check. Because every check sees every
+sampled asset, the rejection rates are not skewed by the current order.
+Every ``adapt_every`` samples the order is recomputed from the counters,
+which are then halved so they follow drift in the listings. A changed order
+bumps ``version``; the engines then apply it to their alerts' plans
+(``apply``, through ``AlertPlan.reordered``). The order never changes which
+alerts match, only how fast the non-matching ones are rejected.
+
+Only code that runs plans uses the learned order: the ``linear`` engine
+(``LinearIndex``) and the confirmation of Postgres candidates
+(``ALERT_SOURCE=postgres``, ``match_alerts``). The ``index`` and
+``columnar`` engines match through their own term and bound structures and
+ignore it. So does ``sharded`` unless its shards run ``linear``, in which
+case each worker process learns its own order.
+
+The counters are shared by the concurrent events of an instance (see
+"Concurrency" in the README), so they are only updated under a lock. A sampled plan is
+timed first and its counts are then merged under the lock in one step.
+"""
+
+import itertools
+import math
+import threading
+import time
+
+from .config import config
+from .log import get_logger
+from .models import Alert, Asset
+from .plan import PREDICATES, AlertPlan
+
+logger = get_logger()
+
+# The order compile_plan gives new plans
+_DEFAULT_ORDER = tuple(PREDICATES)
+
+
+def _clock_overhead_ns(rounds: int = 2000) -> float:
+    """Median cost of one timed empty interval, subtracted from predicate timings."""
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(rounds):
+        start = clock()
+        samples.append(clock() - start)
+    samples.sort()
+    return float(samples[len(samples) // 2])
+
+
+class PredicateOrdering:
+    """Sampled per-predicate rejection counters and the order derived from them.
+
+    Args:
+        sample_every: Evaluate one asset in this many with full counting (0 disables sampling).
+        adapt_every: Sampled assets between order recomputations.
+    """
+
+    def __init__(self, sample_every: int = 100, adapt_every: int = 50):
+        self.sample_every = max(0, sample_every)
+        self.adapt_every = max(1, adapt_every)
+        # Start from the plans' default order (cheap comparisons first)
+        self.order: tuple[str, ...] = _DEFAULT_ORDER
+        self.version = 0
+        self.adaptations = 0
+
+        # Predicate -> [evaluated, rejected, nanoseconds], decayed on every adaptation
+        self._counters: dict[str, list[float]] = {name: [0.0, 0.0, 0.0] for name in PREDICATES}
+        # next() on a count is atomic, so concurrent callers never skip or repeat a sample
+        self._calls = itertools.count(1)
+        self._samples = 0
+        # Plan checks -> the same checks in the current order
+        self._ordered: dict[tuple[str, ...], tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        # Measured on first use rather than when the module instance is created at import
+        self._overhead_ns: float | None = None
+
+    def should_sample(self) -> bool:
+        """Count one matched asset and tell whether to evaluate it with ``evaluate``."""
+        if not self.sample_every:
+            return False
+        return next(self._calls) % self.sample_every == 0
+
+    def evaluate(self, plan: AlertPlan, asset: Asset, name_normalized: str) -> bool:
+        """Run every check of a plan, recording rejections and time; same result as ``plan.matches``."""
+        clock = time.perf_counter_ns
+        timings = []
+        for name, step in zip(plan.checks, plan.steps):
+            start = clock()
+            ok = step(plan, asset, name_normalized)
+            timings.append((name, ok, clock() - start))
+        passed = True
+        with self._lock:
+            for name, ok, elapsed in timings:
+                counter = self._counters[name]
+                counter[0] += 1
+                counter[2] += elapsed
+                if not ok:
+                    counter[1] += 1
+                    passed = False
+        return passed
+
+    def sampled(self) -> bool:
+        """Record a finished sampled asset; recompute the order when due.
+
+        Returns:
+            bool: Whether the order changed.
+        """
+        with self._lock:
+            self._samples += 1
+            due = self._samples % self.adapt_every == 0
+        return self.adapt() if due else False
+
+    def adapt(self) -> bool:
+        """Recompute the order from the counters and decay them.
+
+        Predicates are ranked by mean cost per evaluation over rejection
+        rate. Predicates that never rejected (or were never evaluated) go
+        last, in their default order.
+
+        Returns:
+            bool: Whether the order changed.
+        """
+        with self._lock:
+            default = {name: position for position, name in enumerate(PREDICATES)}
+
+            def rank(name: str) -> tuple[float, int]:
+                evaluated, rejected, nanoseconds = self._counters[name]
+                if not rejected:
+                    return math.inf, default[name]
+                return self._mean_ns(evaluated, nanoseconds) / (rejected / evaluated), default[name]
+
+            order = tuple(sorted(PREDICATES, key=rank))
+            for counter in self._counters.values():
+                for i in range(len(counter)):
+                    counter[i] /= 2
+            self.adaptations += 1
+            if order == self.order:
+                return False
+            previous, self.order = self.order, order
+            self._ordered = {}
+            self.version += 1
+        logger.info(f"Predicate order changed: {' > '.join(previous)} -> {' > '.join(order)}, stats={self.stats()}")
+        return True
+
+    def apply(self, alerts: list[Alert]) -> int:
+        """Reorder the alerts' plans to the current order.
+
+        Returns:
+            int: Number of plans replaced.
+        """
+        order = self.order
+        ordered = self._ordered
+        replaced = 0
+        for alert in alerts:
+            plan = alert.plan
+            checks = ordered.get(plan.checks)
+            if checks is None:
+                rank = {name: position for position, name in enumerate(order)}
+                checks = ordered[plan.checks] = tuple(sorted(plan.checks, key=rank.__getitem__))
+            if checks != plan.checks:
+                alert.plan = plan.reordered(order)
+                replaced += 1
+        return replaced
+
+    def _mean_ns(self, evaluated: float, nanoseconds: float) -> float:
+        """Mean time of one evaluation of a predicate, net of the clock overhead (at least 1ns)."""
+        if self._overhead_ns is None:
+            self._overhead_ns = _clock_overhead_ns()
+        return max(1.0, nanoseconds / evaluated - self._overhead_ns)
+
+    def stats(self) -> dict:
+        """Return the current order and per-predicate counters for logging."""
+        with self._lock:
+            counters = {name: tuple(counter) for name, counter in self._counters.items()}
+        predicates = {}
+        for name, (evaluated, rejected, nanoseconds) in counters.items():
+            predicates[name] = {
+                "evaluated": round(evaluated),
+                "rejected": round(rejected),
+                "rejection_rate": round(rejected / evaluated, 4) if evaluated else None,
+                "mean_ns": round(self._mean_ns(evaluated, nanoseconds), 1) if evaluated else None,
+            }
+        return {
+            "order": list(self.order),
+            "version": self.version,
+            "sampled_assets": self._samples,
+            "adaptations": self.adaptations,
+            "predicates": predicates,
+        }
+
+
+def match_alerts(
+    alerts: list[Alert], asset: Asset, ordering: PredicateOrdering, version: int | None = None
+) -> list[Alert]:
+    """Return the alerts whose plans match an asset, feeding ``ordering``.
+
+    Sampled assets are evaluated with full counting; the rest run the plans
+    as they are. Plans are brought to the current order first unless the
+    caller already applied ``version``. Without a ``version`` (freshly
+    compiled plans, e.g. Postgres candidates) they are in the default order,
+    so they are only reordered once the learned order differs from it.
+    """
+    if version is None:
+        if ordering.order != _DEFAULT_ORDER:
+            ordering.apply(alerts)
+    elif version != ordering.version:
+        ordering.apply(alerts)
+    name_normalized = asset.name_normalized
+    if not ordering.should_sample():
+        return [alert for alert in alerts if alert.plan.matches(asset, name_normalized)]
+    evaluate = ordering.evaluate
+    found = [alert for alert in alerts if evaluate(alert.plan, asset, name_normalized)]
+    if ordering.sampled():
+        ordering.apply(alerts)
+    return found
+
+
+# Module-level instance shared by the linear engine and ALERT_SOURCE=postgres confirmation
+predicate_ordering = PredicateOrdering(
+    sample_every=config.predicate_sample_every,
+    adapt_every=config.predicate_adapt_every,
+)
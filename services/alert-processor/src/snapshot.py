@@ -0,0 +1,210 @@
+"""Compact alert set snapshots for fast cold starts.
+
+A snapshot is one msgpack document holding the alert set column by column
+(one list per ``Alert`` field, plus the normalized match terms of each
+compiled plan) and the ``alert_set_version`` it was read at.
+It lives at a local path or a ``gs://bucket/object`` URI (ALERT_SNAPSHOT_URI),
+is written by the first instance that loads alerts from the database (or by
+running this module as a refresh job), and is only used when its version
+matches the database's current version.
+
+Run as a refresh job from the alert-processor directory:
+
+    python -m src.snapshot --uri gs://bucket/alert-snapshot.msgpack
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from dataclasses import fields
+
+import msgpack
+
+from .log import get_logger
+from .models import Alert
+from .plan import make_plan
+
+logger = get_logger()
+
+# Bumped whenever the stored columns or term normalization change
+SNAPSHOT_FORMAT = 3
+
+# Data fields of Alert, in constructor order; each becomes one snapshot column
+SNAPSHOT_FIELDS = tuple(f.name for f in fields(Alert) if f.name != "plan")
+
+# Fields make_plan needs besides the terms, in its argument order
+_PLAN_FIELDS = ("match_all", "max_price", "bottled_year_min", "bottled_year_max", "age_min", "age_max")
+
+
+def encode_snapshot(alerts: list[Alert], version: int) -> bytes:
+    """Serialize alerts column by column, stamped with the alert set version."""
+    columns = {name: [getattr(alert, name) for alert in alerts] for name in SNAPSHOT_FIELDS}
+    return msgpack.packb(
+        {
+            "format": SNAPSHOT_FORMAT,
+            "version": version,
+            "created_at": time.time(),
+            "count": len(alerts),
+            "fields": list(SNAPSHOT_FIELDS),
+            "columns": [columns[name] for name in SNAPSHOT_FIELDS],
+            "terms": [list(alert.plan.terms) for alert in alerts],
+        },
+        use_bin_type=True,
+    )
+
+
+def decode_snapshot(data: bytes) -> tuple[list[Alert], int]:
+    """Rebuild alerts from a snapshot.
+
+    Rows come from ``zip(*columns)`` straight into the slotted ``Alert``
+    constructor, so no per-alert dict is created, and plans are rebuilt from
+    the stored terms without normalizing the match strings again.
+
+    Returns:
+        tuple[list[Alert], int]: The alerts and the version they were read at.
+
+    Raises:
+        ValueError: If the snapshot has an unknown format or different fields.
+    """
+    document = msgpack.unpackb(data, raw=False)
+    if document.get("format") != SNAPSHOT_FORMAT or tuple(document.get("fields", ())) != SNAPSHOT_FIELDS:
+        raise ValueError(f"Unsupported alert snapshot format {document.get('format')!r}")
+
+    columns = document["columns"]
+    limits = zip(*(columns[SNAPSHOT_FIELDS.index(name)] for name in _PLAN_FIELDS))
+    alerts = [
+        Alert(*row, plan=make_plan(tuple(terms), *limit))
+        for row, terms, limit in zip(zip(*columns), document["terms"], limits)
+    ]
+    if len(alerts) != document["count"]:
+        raise ValueError(f"Alert snapshot is truncated: {len(alerts)} of {document['count']} alerts")
+    return alerts, document["version"]
+
+
+def _split_gcs_uri(uri: str) -> tuple[str, str]:
+    """Split gs://bucket/object into (bucket, object)."""
+    bucket, _, name = uri[len("gs://"):].partition("/")
+    if not bucket or not name:
+        raise ValueError(f"Invalid GCS snapshot URI {uri!r}")
+    return bucket, name
+
+
+def _gcs_blob(uri: str):
+    """Return the storage blob for a gs:// URI."""
+    # Imported here so the storage client is only loaded when a gs:// snapshot is configured
+    from google.cloud import storage
+
+    bucket, name = _split_gcs_uri(uri)
+    return storage.Client().bucket(bucket).blob(name)
+
+
+def read_bytes(uri: str) -> bytes | None:
+    """Read a snapshot from a local path or gs:// URI, or None if it does not exist."""
+    if uri.startswith("gs://"):
+        from google.api_core.exceptions import NotFound
+
+        try:
+            return _gcs_blob(uri).download_as_bytes()
+        except NotFound:
+            return None
+    try:
+        with open(uri, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_bytes(uri: str, data: bytes) -> None:
+    """Write a snapshot to a local path (atomically) or gs:// URI."""
+    if uri.startswith("gs://"):
+        _gcs_blob(uri).upload_from_string(data, content_type="application/x-msgpack")
+        return
+    directory = os.path.dirname(os.path.abspath(uri))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, uri)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_snapshot(uri: str, expected_version: int) -> list[Alert] | None:
+    """Load the alert set from a snapshot if it matches the current version.
+
+    Args:
+        uri: Local path or gs:// URI of the snapshot.
+        expected_version: The alert set version currently in the database.
+
+    Returns:
+        list[Alert] | None: The alerts, or None if the snapshot is missing,
+        unreadable or stamped with another version.
+    """
+    start = time.perf_counter()
+    try:
+        data = read_bytes(uri)
+        if data is None:
+            logger.info(f"No alert snapshot at {uri}")
+            return None
+        alerts, version = decode_snapshot(data)
+    except Exception as e:
+        logger.warning(f"Failed to read alert snapshot {uri}: {e}")
+        return None
+
+    if version != expected_version:
+        logger.info(f"Alert snapshot {uri} is stale: version={version}, current={expected_version}")
+        return None
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(
+        f"Loaded alert snapshot {uri}: version={version}, alerts={len(alerts)}, "
+        f"bytes={len(data)}, took={elapsed_ms:.1f}ms"
+    )
+    return alerts
+
+
+def save_snapshot(uri: str, alerts: list[Alert], version: int) -> bool:
+    """Write the alert set as a snapshot; failures are logged, not raised.
+
+    Returns:
+        bool: True if the snapshot was written.
+    """
+    start = time.perf_counter()
+    try:
+        data = encode_snapshot(alerts, version)
+        write_bytes(uri, data)
+    except Exception as e:
+        logger.warning(f"Failed to write alert snapshot {uri}: {e}")
+        return False
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(
+        f"Wrote alert snapshot {uri}: version={version}, alerts={len(alerts)}, "
+        f"bytes={len(data)}, took={elapsed_ms:.1f}ms"
+    )
+    return True
+
+
+def main():
+    """Refresh job: write a snapshot of the current alert set from the database."""
+    from .config import config
+    from .repository import get_alert_set_version, get_alerts
+
+    parser = argparse.ArgumentParser(description="Write an alert set snapshot from the database.")
+    parser.add_argument("--uri", default=config.alert_snapshot_uri, help="local path or gs:// URI")
+    args = parser.parse_args()
+    if not args.uri:
+        parser.error("--uri or ALERT_SNAPSHOT_URI is required")
+
+    # Read the version first, so a change made mid-load leaves the snapshot stale, not wrong
+    version = get_alert_set_version()
+    if version is None:
+        raise SystemExit("alert_set_version is not available; run the migrations first")
+    if not save_snapshot(args.uri, get_alerts(), version):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Per-user notification throttling and digest coalescing.
+
+Every published match becomes one alert-sender email, so a user with broad
+alerts can get dozens of emails from one burst of listings. New matches
+therefore go through ``NotificationThrottle.admit`` before publishing: each
+user has a token bucket (``NOTIFY_BURST`` tokens, refilled at
+``NOTIFY_RATE_PER_HOUR``) and a match is published on its own only if a
+token can be taken. The rest are appended to the user's pending digest
+(``notification_digests``), and once its first match is
+``NOTIFY_DIGEST_WINDOW_SEC`` old the digest goes out as one message.
+
+The buckets live in ``notification_buckets`` and are taken from in one
+statement per asset (``take_notification_tokens``), so the budget holds
+across instances. Each warm instance also remembers which users it saw run
+dry and until when the next token can be due. Their matches go straight to
+the digest, with no database round trip, for the rest of a burst. Database
+failures fail open: the matches are published as before.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from .config import config
+from .log import get_logger
+from .models import Alert
+from .repository import append_to_digests, claim_due_digests, release_digests, take_notification_tokens
+
+logger = get_logger()
+
+# Most digests claimed and published per flush
+_FLUSH_LIMIT = 500
+
+
+class NotificationThrottle:
+    """Decides which new matches are published and folds the rest into digests."""
+
+    def __init__(
+        self,
+        burst: int,
+        rate_per_hour: float,
+        window_sec: float,
+        max_items: int,
+        cache_size: int,
+        take: Callable[[dict[str, int], float, float], dict[str, int]] = take_notification_tokens,
+        append: Callable[[list[tuple[str, str | None, int]]], None] = append_to_digests,
+        claim: Callable[[float, int, int], list[dict]] = claim_due_digests,
+        release: Callable[[list[int]], None] = release_digests,
+    ):
+        self.burst = max(1, burst)
+        self.refill_per_sec = max(rate_per_hour, 0.0) / 3600
+        self.window_sec = window_sec
+        self.max_items = max(1, max_items)
+        self.cache_size = cache_size
+        self._take = take
+        self._append = append
+        self._claim = claim
+        self._release = release
+
+        # user_id -> monotonic time before which the user's bucket is known to be empty
+        self._empty_until: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.published = 0
+        self.digested = 0
+        self.local_denials = 0
+        self.db_calls = 0
+        self.digests_sent = 0
+
+    def admit(self, matches: list[tuple[Alert, int]]) -> list[tuple[Alert, int]]:
+        """Return the matches to publish now; the others are added to their users' digests.
+
+        Args:
+            matches: (alert, match_idx) pairs of newly recorded matches.
+
+        Returns:
+            list[tuple[Alert, int]]: The matches within their users' budgets, in input order.
+        """
+        if not matches:
+            return []
+        by_user: dict[str, list[tuple[Alert, int]]] = {}
+        for alert, match_idx in matches:
+            by_user.setdefault(str(alert.user_id), []).append((alert, match_idx))
+
+        now = time.monotonic()
+        with self._lock:
+            dry = {user_id for user_id in by_user if self._empty_until.get(user_id, 0.0) > now}
+        requested = {user_id: len(user_matches) for user_id, user_matches in by_user.items() if user_id not in dry}
+
+        granted: dict[str, int] = {}
+        if requested:
+            try:
+                self.db_calls += 1
+                granted = self._take(requested, float(self.burst), self.refill_per_sec)
+            except Exception as e:
+                logger.warning(f"Notification token take failed, publishing without throttling: {e}")
+                return matches
+
+        admitted: set[int] = set()
+        held: list[tuple[str, str | None, int]] = []
+        exhausted = []
+        for user_id, user_matches in by_user.items():
+            allowed = granted.get(user_id, 0) if user_id in requested else 0
+            if user_id in requested and allowed < len(user_matches):
+                exhausted.append(user_id)
+            for alert, match_idx in user_matches[:allowed]:
+                admitted.add(match_idx)
+            for alert, match_idx in user_matches[allowed:]:
+                held.append((user_id, alert.user_email, match_idx))
+
+        if exhausted and self.refill_per_sec:
+            # Less than one token is left, so the next one is due within one refill interval
+            empty_until = now + 1 / self.refill_per_sec
+            with self._lock:
+                for user_id in exhausted:
+                    self._empty_until[user_id] = empty_until
+                    self._empty_until.move_to_end(user_id)
+                while len(self._empty_until) > self.cache_size:
+                    self._empty_until.popitem(last=False)
+
+        if held:
+            try:
+                self._append(held)
+            except Exception as e:
+                logger.warning(f"Failed to add {len(held)} matches to digests, publishing them instead: {e}")
+                return matches
+
+        self.local_denials += sum(len(by_user[user_id]) for user_id in dry)
+        self.published += len(admitted)
+        self.digested += len(held)
+        if held:
+            logger.info(
+                f"Throttled notifications: publishing {len(admitted)}, added {len(held)} to digests "
+                f"of {len({user_id for user_id, _, _ in held})} users"
+            )
+        return [(alert, match_idx) for alert, match_idx in matches if match_idx in admitted]
+
+    def flush(self, publish: Callable[[list[dict]], dict[int, Exception]]) -> int:
+        """Claim the digests whose window has passed and publish them.
+
+        Claims pages of up to ``_FLUSH_LIMIT`` digests until a short page comes
+        back. A page with failed publishes is the last one: its failed digests
+        are released for the next flush instead of being claimed again at once.
+
+        Args:
+            publish: Publishes digests, returning errors keyed by digest_idx (``publish_digests``).
+
+        Returns:
+            int: Number of digests published.
+        """
+        sent = 0
+        while True:
+            try:
+                digests = self._claim(self.window_sec, _FLUSH_LIMIT, self.max_items)
+            except Exception as e:
+                logger.warning(f"Failed to claim due digests: {e}")
+                break
+            if not digests:
+                break
+
+            errors = publish(digests)
+            if errors:
+                try:
+                    self._release(list(errors))
+                except Exception as e:
+                    logger.warning(f"Failed to release {len(errors)} unpublished digests: {e}")
+            sent += len(digests) - len(errors)
+            if errors or len(digests) < _FLUSH_LIMIT:
+                break
+        self.digests_sent += sent
+        return sent
+
+    def stats(self) -> dict:
+        """Return throttle counters for logging."""
+        return {
+            "published": self.published,
+            "digested": self.digested,
+            "local_denials": self.local_denials,
+            "db_calls": self.db_calls,
+            "digests_sent": self.digests_sent,
+            "dry_users": len(self._empty_until),
+        }
+
+
+# Module-level instance so the dry-user memory survives across invocations on a warm instance
+notification_throttle = NotificationThrottle(
+    burst=config.notify_burst,
+    rate_per_hour=config.notify_rate_per_hour,
+    window_sec=config.notify_digest_window_sec,
+    max_items=config.notify_digest_max_items,
+    cache_size=config.notify_cache_size,
+)
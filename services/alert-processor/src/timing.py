@@ -0,0 +1,48 @@
+"""Per-stage latency timers for the entry points.
+
+A ``StageTimer`` collects how long each stage of handling one message took
+and logs them as a single structured record. On Cloud Logging the fields
+land in ``jsonPayload`` (via ``extra={"json_fields": ...}``), so log-based
+metrics can be defined on e.g. ``jsonPayload.stages_ms.match`` filtered by
+``jsonPayload.event="stage_timings"``.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Accumulates wall-clock milliseconds per named stage."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages_ms: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block; repeated stages of the same name add up."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.stages_ms[name] = self.stages_ms.get(name, 0.0) + elapsed_ms
+
+    def emit(self, logger: logging.Logger, handler: str, **fields) -> None:
+        """Log one structured record with every stage duration and the given fields.
+
+        Args:
+            logger: Logger to write the record to.
+            handler: Entry point the message went through (e.g. "process_listing").
+            **fields: Extra values for the record (message id, alert / match counts, ...).
+        """
+        record = {
+            "event": "stage_timings",
+            "handler": handler,
+            **fields,
+            "stages_ms": {name: round(ms, 3) for name, ms in self.stages_ms.items()},
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+        }
+        logger.info(f"Stage timings: {json.dumps(record)}", extra={"json_fields": record})
@@ -0,0 +1,314 @@
+"""Long-running streaming-pull worker for new listings.
+
+The Cloud Function entry points handle one Pub/Sub push per listing, so
+every listing pays for an invocation, a decode, an alert cache check and a
+pooled connection checkout of its own. ``ListingWorker`` instead holds a
+streaming pull on a subscription to the same topic (``WORKER_SUBSCRIPTION``)
+and handles the listings in batches:
+
+1. The client leases messages up to the flow control limits
+   (``WORKER_MAX_MESSAGES`` / ``WORKER_MAX_BYTES``). The callback only
+   queues them; the worker thread takes up to ``WORKER_BATCH_SIZE`` at a
+   time, waiting at most ``WORKER_BATCH_LATENCY_SEC`` for a batch to fill.
+2. Each message is parsed with ``models.asset_from_payload`` (the same
+   payload and ``external_id`` attribute as ``process_listing``).
+   Redeliveries are dropped with one dedupe lookup for the whole batch.
+3. The batch is matched with one ``match_batch`` call per chunk of distinct
+   assets, and all of its matches are recorded in one insert.
+4. New matches go through the notification throttle and are published
+   together. The listings are marked processed, and then every message of
+   the batch is acked; the client sends the acks in bulk.
+
+If loading alerts or recording matches fails, the whole batch is nacked
+and redelivered; the dedupe table and the unique key on ``alert_matches``
+keep the retry from recording or publishing a match twice. Malformed
+messages are logged and acked, as they would fail on every delivery.
+
+Run from the alert-processor directory, with the service's environment:
+
+    python -m src.worker --subscription new-listings-worker
+
+With ``PUBSUB_EMULATOR_HOST`` set, the client talks to the Pub/Sub
+emulator. ``LocalSubscriber`` (``benchmarks/fakes.py``) is an in-process fake for
+tests and ``benchmarks/bench_worker.py``.
+"""
+
+import argparse
+import json
+import queue
+import signal
+import threading
+import time
+
+from .alert_cache import alert_cache
+from .config import config
+from .dedupe import message_deduper
+from .log import get_logger
+from .matcher import match_batch, unique_asset_chunks
+from .models import Alert, AlertMatch, Asset, asset_from_payload
+from .pubsub import get_subscriber, publish_match_batch
+from .repository import get_candidate_alerts, insert_listing_matches
+from .selectivity import match_alerts, predicate_ordering
+from .throttle import notification_throttle
+from .timing import StageTimer
+
+logger = get_logger()
+
+# How often an idle worker wakes up to check for shutdown and a failed stream
+_IDLE_POLL_SEC = 0.5
+
+
+class ListingWorker:
+    """Pulls new-listing messages from a subscription and processes them in batches.
+
+    Args:
+        subscriber: SubscriberClient (``get_subscriber()``) or a LocalSubscriber.
+        subscription: Fully qualified subscription path.
+        batch_size: Most messages processed together.
+        batch_latency_sec: Longest the first message of a batch waits for more.
+        max_messages: Flow control limit on leased, unacked messages.
+        max_bytes: Flow control limit on leased, unacked bytes.
+        publisher: Publisher to use instead of the shared client (e.g. LocalPublisher).
+    """
+
+    def __init__(
+        self,
+        subscriber,
+        subscription: str,
+        batch_size: int = config.worker_batch_size,
+        batch_latency_sec: float = config.worker_batch_latency_sec,
+        max_messages: int = config.worker_max_messages,
+        max_bytes: int = config.worker_max_bytes,
+        publisher=None,
+    ):
+        self.subscriber = subscriber
+        self.subscription = subscription
+        self.batch_size = max(1, batch_size)
+        self.batch_latency_sec = batch_latency_sec
+        # A batch can never be larger than what flow control lets the client lease
+        self.max_messages = max(self.batch_size, max_messages)
+        self.max_bytes = max_bytes
+        self._publisher = publisher
+        self._received: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+
+        self.batches = 0
+        self.messages = 0
+        self.duplicates = 0
+        self.malformed = 0
+        self.failed_batches = 0
+
+    def run(self) -> None:
+        """Pull and process messages until ``stop()`` is called or the stream fails."""
+        from google.cloud.pubsub_v1.types import FlowControl
+
+        flow_control = FlowControl(max_messages=self.max_messages, max_bytes=self.max_bytes)
+        pull = self.subscriber.subscribe(self.subscription, callback=self._received.put, flow_control=flow_control)
+        logger.info(
+            f"Pulling from {self.subscription}: batch_size={self.batch_size}, "
+            f"batch_latency={self.batch_latency_sec}s, max_messages={self.max_messages}, max_bytes={self.max_bytes}"
+        )
+        try:
+            while not self._stop.is_set():
+                if pull.done():
+                    # Raises the error that ended the stream
+                    pull.result()
+                    break
+                batch = self._next_batch()
+                if batch:
+                    self.process_batch(batch)
+        finally:
+            pull.cancel()
+            # Leased but not processed: hand back for redelivery
+            leftover = self._drain()
+            for message in leftover:
+                message.nack()
+            logger.info(
+                f"Stopped pulling from {self.subscription}, nacked {len(leftover)} unprocessed messages, "
+                f"stats={self.stats()}"
+            )
+
+    def stop(self) -> None:
+        """Finish the current batch and stop (safe from signal handlers and other threads)."""
+        self._stop.set()
+
+    def process_batch(self, messages: list) -> None:
+        """Match, record and publish one batch of listing messages, then ack or nack all of them."""
+        timer = StageTimer()
+        with timer.stage("decode"):
+            assets: dict[str, Asset] = {}
+            for message in messages:
+                try:
+                    payload = json.loads(message.data.decode("utf-8"))
+                    activity_idx = int(message.attributes.get("external_id"))
+                    assets[message.message_id] = asset_from_payload(payload, activity_idx)
+                except Exception as e:
+                    self.malformed += 1
+                    logger.warning(f"Dropping malformed message_id={message.message_id}: {e}")
+
+        with timer.stage("dedupe"):
+            unseen = message_deduper.unseen_messages(
+                {message_id: asset.activity_idx for message_id, asset in assets.items()}
+            )
+        # A listing redelivered while its first copy is in this batch is processed once
+        batch: dict[int, tuple[str, Asset]] = {}
+        for message_id in unseen:
+            asset = assets[message_id]
+            batch.setdefault(asset.activity_idx, (message_id, asset))
+        self.duplicates += len(assets) - len(batch)
+
+        try:
+            match_count, alert_count = self._process(batch, timer)
+        except Exception as e:
+            self.failed_batches += 1
+            logger.warning(f"Failed to process batch of {len(messages)} messages, nacking for redelivery: {e}")
+            for message in messages:
+                message.nack()
+            return
+
+        with timer.stage("ack"):
+            for message in messages:
+                message.ack()
+
+        self.batches += 1
+        self.messages += len(messages)
+        logger.info(
+            f"Done. Matched {match_count} alerts across {len(batch)} listings from {len(messages)} messages. "
+            f"dedupe={message_deduper.stats()}"
+        )
+        timer.emit(
+            logger, "worker_batch", message_count=len(messages), asset_count=len(batch),
+            skipped_count=len(messages) - len(batch), alert_source=config.alert_source, alert_count=alert_count,
+            match_count=match_count,
+        )
+
+    def _process(self, batch: dict[int, tuple[str, Asset]], timer: StageTimer) -> tuple[int, int]:
+        """Match and record the batch's listings, publish the new matches and mark them processed.
+
+        Returns:
+            tuple[int, int]: The number of matches and of alerts (or Postgres candidates) checked.
+        """
+        assets = [asset for _, asset in batch.values()]
+        if not assets:
+            return 0, 0
+        matched: list[tuple[Asset, list[Alert]]] = []
+        if config.alert_source == "postgres":
+            alert_count = 0
+            for asset in assets:
+                with timer.stage("alert_load"):
+                    candidates = get_candidate_alerts(asset)
+                with timer.stage("match"):
+                    matched.append((asset, match_alerts(candidates, asset, predicate_ordering)))
+                alert_count += len(candidates)
+        else:
+            with timer.stage("alert_load"):
+                alert_set = alert_cache.get()
+            with timer.stage("match"):
+                for chunk in unique_asset_chunks(assets):
+                    matches_by_asset = match_batch(chunk, alert_set.index)
+                    matched.extend((asset, matches_by_asset[asset.asset_idx]) for asset in chunk)
+            alert_count = len(alert_set.alerts)
+
+        # Every match of the batch in one statement; redelivered matches are skipped
+        rows = [
+            AlertMatch(
+                alert_id=alert.id,
+                listing_source="baxus",
+                activity_idx=asset.activity_idx,
+                asset_idx=asset.asset_idx,
+            )
+            for asset, alerts in matched
+            for alert in alerts
+        ]
+        with timer.stage("insert"):
+            match_ids = insert_listing_matches(rows)
+        logger.info(f"Inserted {len(match_ids)} of {len(rows)} matches")
+
+        new_matches: list[tuple[Alert, int]] = []
+        asset_of: dict[int, Asset] = {}
+        for asset, alerts in matched:
+            for alert in alerts:
+                match_idx = match_ids.get((str(alert.id), asset.activity_idx))
+                if match_idx:
+                    new_matches.append((alert, match_idx))
+                    asset_of[match_idx] = asset
+        if config.notify_throttle and new_matches:
+            # One bucket query for all users in the batch
+            with timer.stage("throttle"):
+                new_matches = notification_throttle.admit(new_matches)
+
+        by_asset: dict[int, tuple[Asset, list[tuple[Alert, int]]]] = {}
+        for alert, match_idx in new_matches:
+            asset = asset_of[match_idx]
+            by_asset.setdefault(asset.activity_idx, (asset, []))[1].append((alert, match_idx))
+        with timer.stage("publish"):
+            publish_match_batch(list(by_asset.values()), self._publisher)
+
+        match_counts = {asset.activity_idx: len(alerts) for asset, alerts in matched}
+        with timer.stage("dedupe"):
+            message_deduper.mark_listings({
+                activity_idx: (message_id, match_counts[activity_idx])
+                for activity_idx, (message_id, _) in batch.items()
+            })
+        return sum(match_counts.values()), alert_count
+
+    def _next_batch(self) -> list:
+        """Wait for a message, then collect more until the batch is full or its latency is up."""
+        try:
+            batch = [self._received.get(timeout=_IDLE_POLL_SEC)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_latency_sec
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._received.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self) -> list:
+        """Take every message still queued."""
+        messages = []
+        while True:
+            try:
+                messages.append(self._received.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def stats(self) -> dict:
+        """Return worker counters for logging."""
+        return {
+            "batches": self.batches,
+            "messages": self.messages,
+            "duplicates": self.duplicates,
+            "malformed": self.malformed,
+            "failed_batches": self.failed_batches,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process new listings from a Pub/Sub subscription in batches.")
+    parser.add_argument("--subscription", default=config.worker_subscription,
+                        help="subscription id or full path (default WORKER_SUBSCRIPTION)")
+    parser.add_argument("--batch-size", type=int, default=config.worker_batch_size)
+    parser.add_argument("--batch-latency", type=float, default=config.worker_batch_latency_sec)
+    args = parser.parse_args()
+    if not args.subscription:
+        parser.error("--subscription or WORKER_SUBSCRIPTION is required")
+
+    subscriber = get_subscriber()
+    subscription = args.subscription
+    if not subscription.startswith("projects/"):
+        subscription = subscriber.subscription_path(config.gcp_project_id, subscription)
+    worker = ListingWorker(subscriber, subscription, batch_size=args.batch_size, batch_latency_sec=args.batch_latency)
+    # Cloud Run and Kubernetes send SIGTERM before stopping the container
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""AlertCache: TTL hits, version probes, single-flight refreshes and the snapshot fallback."""
+
+import threading
+
+import pytest
+
+from src.alert_cache import AlertCache
+from src.snapshot import encode_snapshot
+
+from tests.test_alert_index import ALERTS
+
+
+class _Source:
+    """Stands in for get_alerts and get_alert_set_version, counting calls."""
+
+    def __init__(self, alerts=ALERTS, version=1):
+        self.alerts = alerts
+        self.version = version
+        self.loads = 0
+        self.probes = 0
+        self.probe_error = None
+        # Set to hold loads until released, for the concurrency tests
+        self.gate: threading.Event | None = None
+        self.loading = threading.Event()
+
+    def load(self):
+        self.loads += 1
+        self.loading.set()
+        if self.gate is not None:
+            assert self.gate.wait(timeout=10)
+        return list(self.alerts)
+
+    def probe(self):
+        self.probes += 1
+        if self.probe_error:
+            raise self.probe_error
+        return self.version
+
+
+def _cache(source, ttl_sec=0.0, snapshot_uri=None):
+    return AlertCache(
+        ttl_sec=ttl_sec, engine="linear", loader=source.load, version_probe=source.probe, snapshot_uri=snapshot_uri
+    )
+
+
+def test_ttl_serves_the_cached_set_without_probing():
+    source = _Source()
+    cache = _cache(source, ttl_sec=60)
+    first = cache.get()
+    assert cache.get() is first
+    assert source.loads == 1 and source.probes == 1
+    assert cache.hits == 1
+
+
+def test_unchanged_version_skips_the_reload():
+    source = _Source()
+    cache = _cache(source)
+    first = cache.get()
+    assert cache.get() is first
+    assert source.loads == 1 and source.probes == 2
+
+    source.version = 2
+    second = cache.get()
+    assert second is not first and second.version == 2
+    assert source.loads == 2
+
+
+def test_failed_probe_forces_a_reload():
+    source = _Source()
+    cache = _cache(source)
+    first = cache.get()
+    source.probe_error = RuntimeError("database unavailable")
+    second = cache.get()
+    assert second is not first and second.version is None
+    assert source.loads == 2
+
+
+def _get_concurrently(cache, count):
+    results = [None] * count
+
+    def get(i):
+        results[i] = cache.get()
+
+    threads = [threading.Thread(target=get, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_cold_cache_loads_once_for_concurrent_requests():
+    source = _Source()
+    source.gate = threading.Event()
+    cache = _cache(source, ttl_sec=60)
+
+    threads, results = _get_concurrently(cache, 8)
+    assert source.loading.wait(timeout=10)
+    source.gate.set()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert source.loads == 1
+    assert all(result is results[0] for result in results)
+    assert cache.coalesced == 7
+
+
+def test_warm_cache_serves_stale_set_while_one_request_refreshes():
+    source = _Source()
+    cache = _cache(source)
+    first = cache.get()
+
+    source.version = 2
+    source.gate = threading.Event()
+    source.loading.clear()
+    refresh, refreshed = _get_concurrently(cache, 1)
+    assert source.loading.wait(timeout=10)
+    # The set being refreshed is still served, without waiting for the reload
+    stale, served = _get_concurrently(cache, 5)
+    for thread in stale:
+        thread.join(timeout=10)
+    assert all(result is first for result in served)
+    assert cache.stale_hits == 5
+
+    source.gate.set()
+    refresh[0].join(timeout=10)
+    assert refreshed[0].version == 2
+    assert source.loads == 2
+
+
+def test_database_load_writes_a_snapshot_for_the_next_instance(tmp_path):
+    uri = str(tmp_path / "alerts.msgpack")
+    source = _Source()
+    _cache(source, snapshot_uri=uri).get()
+    assert source.loads == 1
+
+    cold = _cache(source, snapshot_uri=uri)
+    alert_set = cold.get()
+    assert source.loads == 1
+    assert cold.snapshot_loads == 1
+    assert [alert.id for alert in alert_set.alerts] == [alert.id for alert in ALERTS]
+    assert [alert.plan.terms for alert in alert_set.alerts] == [alert.plan.terms for alert in ALERTS]
+
+
+@pytest.mark.parametrize("contents", [b"not msgpack", encode_snapshot(ALERTS, 1)[:-10], None])
+def test_unreadable_or_missing_snapshot_falls_back_to_the_database(tmp_path, contents):
+    path = tmp_path / "alerts.msgpack"
+    if contents is not None:
+        path.write_bytes(contents)
+    source = _Source()
+    cache = _cache(source, snapshot_uri=str(path))
+
+    alert_set = cache.get()
+    assert source.loads == 1 and cache.snapshot_loads == 0
+    assert len(alert_set.alerts) == len(ALERTS)
+    # The fallback load rewrote the snapshot
+    rewarmed = _cache(_Source(), snapshot_uri=str(path))
+    rewarmed.get()
+    assert rewarmed.snapshot_loads == 1
+
+
+def test_snapshot_is_not_trusted_without_a_version(tmp_path):
+    uri = str(tmp_path / "alerts.msgpack")
+    source = _Source()
+    source.probe_error = RuntimeError("database unavailable")
+    cache = _cache(source, snapshot_uri=uri)
+    cache.get()
+    assert source.loads == 1 and cache.snapshot_loads == 0
+    assert not (tmp_path / "alerts.msgpack").exists()
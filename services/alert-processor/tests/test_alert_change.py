@@ -0,0 +1,96 @@
+"""process_alert_change: rematching edited alerts against the listed assets in batches."""
+
+import base64
+import dataclasses
+import json
+
+import pytest
+from cloudevents.http import CloudEvent
+
+import main
+from src.matcher import find_matching_alerts
+
+from tests.test_alert_index import ALERTS, ASSETS
+
+
+def _cloud_event(payload):
+    data = {"message": {"data": base64.b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")}}
+    attributes = {"type": "google.cloud.pubsub.topic.v1.messagePublished", "source": "test", "id": "m1"}
+    return CloudEvent(attributes, data)
+
+
+class _Listed:
+    """Stands in for the alert and listed-asset queries and ``replace_alert_assets``."""
+
+    def __init__(self, alerts, assets, batch_size):
+        self.alerts = {str(alert.id): alert for alert in alerts}
+        self.assets = assets
+        self.batch_size = batch_size
+        self.requested: list[list[str]] = []
+        self.replaced: list[tuple[list[str], dict[str, list[int]], dict[str, str]]] = []
+
+    def get_alerts_by_id(self, alert_ids):
+        self.requested.append(list(alert_ids))
+        return [self.alerts[alert_id] for alert_id in alert_ids if alert_id in self.alerts]
+
+    def iter_listed_assets(self, batch_size):
+        assert batch_size == self.batch_size
+        for start in range(0, len(self.assets), batch_size):
+            yield self.assets[start:start + batch_size]
+
+    def replace_alert_assets(self, alert_ids, activity_idxs, summaries):
+        self.replaced.append((alert_ids, activity_idxs, summaries))
+        return sum(len(found) for found in activity_idxs.values())
+
+
+@pytest.fixture
+def listed(monkeypatch):
+    listed = _Listed(ALERTS, ASSETS, batch_size=3)
+    monkeypatch.setattr(main, "config", dataclasses.replace(main.config, alert_change_batch_size=3))
+    for name in ("get_alerts_by_id", "iter_listed_assets", "replace_alert_assets"):
+        monkeypatch.setattr(main, name, getattr(listed, name))
+    return listed
+
+
+def test_alerts_are_matched_against_every_batch_and_replaced_together(listed):
+    changed = [alert for alert in ALERTS if alert.id in (1, 2, 4, 9)]
+    main.process_alert_change(_cloud_event({"event_type": "alert_changed", "alert_ids": [a.id for a in changed]}))
+
+    assert listed.requested == [[str(alert.id) for alert in changed]]
+    [(alert_ids, activity_idxs, summaries)] = listed.replaced
+    assert alert_ids == [str(alert.id) for alert in changed]
+    expected = {
+        str(alert.id): [asset.activity_idx for asset in ASSETS if find_matching_alerts([alert], asset)]
+        for alert in changed
+    }
+    assert activity_idxs == expected
+    assert any(len(found) > 1 for found in expected.values())
+    assert summaries == {alert_id: main._matching_assets_summary(len(found)) for alert_id, found in expected.items()}
+
+
+@pytest.mark.parametrize(
+    ("count", "summary"), [(0, "No matches"), (1, "1 match listed now"), (12, "12 matches listed now")]
+)
+def test_summary_counts_the_listings_available_now(count, summary):
+    assert main._matching_assets_summary(count) == summary
+
+
+def test_single_alert_id_is_accepted(listed):
+    main.process_alert_change(_cloud_event({"event_type": "alert_changed", "alert_id": "1"}))
+    assert listed.requested == [["1"]]
+    assert [alert_ids for alert_ids, _, _ in listed.replaced] == [["1"]]
+
+
+def test_deleted_alerts_are_not_replaced(listed):
+    main.process_alert_change(_cloud_event({"event_type": "alert_changed", "alert_ids": ["404"]}))
+    assert listed.requested == [["404"]]
+    assert listed.replaced == []
+
+
+def test_failed_replace_is_raised_for_redelivery(listed, monkeypatch):
+    def fail(alert_ids, activity_idxs, summaries):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(main, "replace_alert_assets", fail)
+    with pytest.raises(RuntimeError):
+        main.process_alert_change(_cloud_event({"event_type": "alert_changed", "alert_ids": ["1"]}))
@@ -0,0 +1,290 @@
+"""AlertIndex and TermAutomaton must return exactly what the linear matcher does."""
+
+import random
+
+import pytest
+
+from benchmarks import corpus
+from src.aho_corasick import TermAutomaton, ahocorasick
+from src.alert_index import AlertIndex
+from src.columnar import ColumnarAlerts
+from src.matcher import LinearIndex, find_matching_alerts
+from src.models import Alert, Asset
+from src.parallel import ShardedMatcher
+
+native_param = pytest.param(
+    True, marks=pytest.mark.skipif(ahocorasick is None, reason="pyahocorasick is not installed")
+)
+
+# Sharded engines started by a test, stopped after it
+_sharded: list[ShardedMatcher] = []
+
+
+def _sharded_engine(alerts, workers=2, engine="index"):
+    matcher = ShardedMatcher(alerts, workers, engine)
+    _sharded.append(matcher)
+    return matcher
+
+
+@pytest.fixture(autouse=True)
+def _close_sharded():
+    yield
+    while _sharded:
+        _sharded.pop().close()
+
+
+# Engines that must return exactly what LinearIndex does, in the same order
+ENGINES = [
+    pytest.param(lambda alerts: AlertIndex(alerts, native=False), id="index"),
+    pytest.param(
+        lambda alerts: AlertIndex(alerts, native=True), id="index-native",
+        marks=pytest.mark.skipif(ahocorasick is None, reason="pyahocorasick is not installed"),
+    ),
+    pytest.param(ColumnarAlerts, id="columnar"),
+    pytest.param(_sharded_engine, id="sharded"),
+]
+
+
+def _alert(alert_id, match_strings, match_all=False, max_price=None, year=(None, None), age=(None, None)):
+    return Alert(
+        id=alert_id, user_id=1, user_email="user@example.com", name=f"alert {alert_id}",
+        match_strings=match_strings, match_all=match_all, max_price=max_price,
+        bottled_year_min=year[0], bottled_year_max=year[1], age_min=age[0], age_max=age[1],
+    )
+
+
+def _asset(asset_idx, name, price=None, bottled_year=None, age=None):
+    return Asset(
+        asset_idx=asset_idx, activity_idx=asset_idx, name=name, price=price,
+        bottled_year=bottled_year, age=age, url=None,
+    )
+
+
+def _ids(alerts):
+    return [alert.id for alert in alerts]
+
+
+ALERTS = [
+    _alert(1, ["weller"]),
+    _alert(2, ["weller", "12"], match_all=True),
+    _alert(3, ["blanton", "stagg"]),
+    _alert(4, ["Blanton's", "gold"], match_all=True, max_price=200),
+    _alert(5, []),
+    _alert(6, ["", "   "]),
+    _alert(7, ["  eagle rare  ", ""], max_price=100),
+    _alert(8, ["year"], year=(2010, None)),
+    _alert(9, ["year"], year=(None, 2015), age=(10, None)),
+    _alert(10, ["year"], age=(None, 12)),
+    _alert(11, [], max_price=50, year=(2000, 2020), age=(8, 8)),
+    _alert(12, ["e.h. taylor", "small batch"], match_all=True),
+    _alert(13, ["weller", "weller"], match_all=True),
+    _alert(14, ["rare", "eagle rare", "eagle"], match_all=True),
+    _alert(15, ["!!!"]),
+    _alert(16, ["-", "weller"]),
+    _alert(17, ["'", "  "], match_all=True),
+]
+
+ASSETS = [
+    _asset(1, "Weller 12 Year", price=40.0, bottled_year=2019, age=12),
+    _asset(2, "W.L. Weller Special Reserve", price=None),
+    _asset(3, "Blanton's Gold Edition", price=150.0, bottled_year=2021),
+    _asset(4, "Blanton's Gold Edition", price=250.0),
+    _asset(5, "Eagle Rare 10 Year", price=35.0, bottled_year=2015, age=10),
+    _asset(6, "Eagle Rare 17 Year", price=None, bottled_year=None, age=None),
+    _asset(7, "E.H. Taylor Small Batch", price=45.0, bottled_year=2005, age=8),
+    _asset(8, "George T. Stagg", price=0.0, bottled_year=2010, age=15),
+    _asset(9, "", price=10.0),
+    _asset(10, "Stagg Jr", price=50.0, bottled_year=2000, age=8),
+]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_match_linear_scan(engine):
+    index = engine(ALERTS)
+    linear = LinearIndex(ALERTS)
+    for asset in ASSETS:
+        assert _ids(index.match(asset)) == _ids(linear.match(asset)), asset.name
+
+
+def test_edge_case_alerts():
+    index = AlertIndex(ALERTS, native=False)
+    # Blank match strings are ignored, so alerts 5 and 6 match on their (absent) limits alone
+    assert {5, 6} <= set(_ids(index.match(ASSETS[8])))
+    # A None price passes max_price; a None bottled year or age fails a range
+    assert 7 in _ids(index.match(ASSETS[5]))
+    assert 8 not in _ids(index.match(ASSETS[5]))
+    # match_all needs every distinct term
+    assert 2 in _ids(index.match(ASSETS[0]))
+    assert 2 not in _ids(index.match(ASSETS[1]))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_match_linear_scan_on_corpus(engine):
+    alerts = corpus.alerts(2000, seed=7)
+    assets = corpus.assets(500, seed=8)
+    index = engine(alerts)
+    linear = LinearIndex(alerts)
+    for asset in assets:
+        assert _ids(index.match(asset)) == _ids(linear.match(asset)), asset.name
+
+
+@pytest.mark.parametrize("engine", ENGINES + [pytest.param(LinearIndex, id="linear")])
+def test_match_batch_equals_match(engine):
+    alerts = ALERTS + corpus.alerts(500, seed=3)
+    # Repeated names and limits exercise the per-batch caches
+    generated = [
+        _asset(100 + i, a.name, a.price, a.bottled_year, a.age) for i, a in enumerate(corpus.assets(300, seed=4))
+    ]
+    copies = [_asset(1000 + i, a.name, a.price, a.bottled_year, a.age) for i, a in enumerate(ASSETS)]
+    assets = ASSETS + generated + copies
+    index = engine(alerts)
+    batch = index.match_batch(assets)
+    for asset in assets:
+        assert _ids(batch[asset.asset_idx]) == _ids(index.match(asset)), asset.name
+
+
+@pytest.mark.skipif(ahocorasick is None, reason="pyahocorasick is not installed")
+def test_native_automaton_matches_pure_python():
+    rng = random.Random(5)
+    alphabet = "abcde "
+    for _ in range(200):
+        terms = list(dict.fromkeys(
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 15))
+        ))
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        expected = {i for i, term in enumerate(terms) if term in text}
+        assert TermAutomaton(terms, native=True).find(text) == expected
+        assert TermAutomaton(terms, native=False).find(text) == expected
+
+
+@pytest.mark.parametrize("native", [False, native_param])
+def test_automaton_overlapping_terms(native):
+    automaton = TermAutomaton(["he", "she", "his", "hers", "s"], native=native)
+    assert automaton.find("ushers") == {0, 1, 3, 4}
+    assert automaton.find("") == set()
+    assert TermAutomaton([], native=native).find("anything") == set()
+
+
+@pytest.mark.parametrize("shard_engine", ["index", "columnar", "linear"])
+def test_sharded_results_are_merged_in_alert_order(shard_engine):
+    alerts = ALERTS + corpus.alerts(300, seed=9)
+    assets = ASSETS + corpus.assets(100, seed=10)
+    expected = LinearIndex(alerts).match_batch(assets)
+    for workers in (1, 3):
+        matcher = _sharded_engine(alerts, workers, shard_engine)
+        # Alert order regardless of how the alerts hash to shards, and the same on every call
+        for _ in range(2):
+            batch = matcher.match_batch(assets)
+            assert {idx: _ids(found) for idx, found in batch.items()} == {
+                idx: _ids(found) for idx, found in expected.items()
+            }
+        for asset in ASSETS:
+            positions = [alerts.index(alert) for alert in matcher.match(asset)]
+            assert positions == sorted(positions)
+
+
+def _reference_matches(alert, asset):
+    """``matches_alert`` as it was before compiled plans, normalization and the index."""
+    if alert.match_strings:
+        name_lower = asset.name.lower()
+        required_terms = [s.strip().lower() for s in alert.match_strings if s and s.strip()]
+        if required_terms:
+            if alert.match_all:
+                if not all(term in name_lower for term in required_terms):
+                    return False
+            else:
+                if not any(term in name_lower for term in required_terms):
+                    return False
+    if alert.max_price is not None and asset.price is not None:
+        if asset.price > alert.max_price:
+            return False
+    if alert.bottled_year_min is not None:
+        if asset.bottled_year is None or asset.bottled_year < alert.bottled_year_min:
+            return False
+    if alert.bottled_year_max is not None:
+        if asset.bottled_year is None or asset.bottled_year > alert.bottled_year_max:
+            return False
+    if alert.age_min is not None:
+        if asset.age is None or asset.age < alert.age_min:
+            return False
+    if alert.age_max is not None:
+        if asset.age is None or asset.age > alert.age_max:
+            return False
+    return True
+
+
+# Names of ASCII letters and digits with single spaces, which normalization leaves as
+# they are apart from case; on anything else the original matcher did not normalize
+_WORDS = ["weller", "Eagle", "RARE", "12", "year", "stagg", "jr", "blanton", "Gold", "10", "1", "ab", "b", "ba"]
+
+
+def _random_name(rng):
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(0, 5)))
+
+
+def _random_term(rng):
+    name = _random_name(rng).lower() or rng.choice(_WORDS)
+    if rng.random() < 0.5:
+        # A fragment of a name, which can start or end inside a word
+        start = rng.randrange(len(name))
+        name = name[start:rng.randint(start + 1, len(name))].strip() or name
+    term = name.upper() if rng.random() < 0.2 else name
+    return rng.choice(["", " ", "  "]) + term + rng.choice(["", " "])
+
+
+def _random_bounds(rng, low, high):
+    return tuple(rng.choice([None, rng.randint(low, high)]) for _ in range(2))
+
+
+def _random_corpus(seed):
+    rng = random.Random(seed)
+    alerts = [
+        _alert(
+            i,
+            [_random_term(rng) for _ in range(rng.randint(0, 3))] + rng.choice([[], [""], ["   "]]),
+            match_all=rng.random() < 0.4,
+            max_price=rng.choice([None, None, 0, rng.randint(10, 300)]),
+            year=_random_bounds(rng, 1990, 2025),
+            age=_random_bounds(rng, 4, 25),
+        )
+        for i in range(300)
+    ]
+    assets = [
+        _asset(
+            i,
+            rng.choice(["", _random_name(rng), _random_name(rng)]),
+            price=rng.choice([None, 0.0, float(rng.randint(1, 400))]),
+            bottled_year=rng.choice([None, rng.randint(1985, 2030)]),
+            age=rng.choice([None, rng.randint(2, 30)]),
+        )
+        for i in range(300)
+    ]
+    return alerts, assets
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("engine", ENGINES + [
+    pytest.param(LinearIndex, id="linear"),
+    pytest.param(lambda alerts: None, id="scan"),
+])
+def test_engines_match_the_original_matcher(engine, seed):
+    alerts, assets = _random_corpus(seed)
+    index = engine(alerts)
+    for asset in assets:
+        expected = {alert.id for alert in alerts if _reference_matches(alert, asset)}
+        assert set(_ids(find_matching_alerts(alerts, asset, index=index))) == expected, asset.name
+
+
+def test_random_corpus_covers_the_edge_cases():
+    alerts, assets = _random_corpus(1)
+    assert any(not asset.name for asset in assets)
+    assert any(asset.price is None for asset in assets) and any(asset.age is None for asset in assets)
+    assert any(alert.bottled_year_min is None and alert.bottled_year_max is not None for alert in alerts)
+    assert any(not alert.plan.terms for alert in alerts)
+    matched = sum(_reference_matches(alert, asset) for alert in alerts for asset in assets)
+    assert 0 < matched < len(alerts) * len(assets)
+
+
+def test_automaton_rejects_empty_terms():
+    with pytest.raises(ValueError):
+        TermAutomaton(["ok", ""])
@@ -0,0 +1,178 @@
+"""MessageDeduper: LRU hits, the processed_messages fallback, failing open, and where process_listing calls it."""
+
+import base64
+import dataclasses
+import json
+import logging
+
+import pytest
+from cloudevents.http import CloudEvent
+
+import main
+from src.alert_cache import AlertSet
+from src.alert_index import AlertIndex
+from src.dedupe import MessageDeduper
+
+from tests.test_alert_index import ALERTS, ASSETS
+
+
+class _Table:
+    """In-memory ``processed_messages``; lookups or writes raise while ``error`` is set."""
+
+    def __init__(self, processed=()):
+        self.processed: dict[int, tuple[str, int]] = {activity_idx: ("earlier", 0) for activity_idx in processed}
+        self.lookups: list[list[int]] = []
+        self.lookup_error = None
+        self.record_error = None
+
+    def lookup(self, activity_idxs):
+        self.lookups.append(list(activity_idxs))
+        if self.lookup_error:
+            raise self.lookup_error
+        return {activity_idx for activity_idx in activity_idxs if activity_idx in self.processed}
+
+    def record(self, listings):
+        if self.record_error:
+            raise self.record_error
+        self.processed.update(listings)
+
+
+def test_marked_message_is_answered_from_memory():
+    table = _Table()
+    deduper = MessageDeduper(100, table.lookup, table.record)
+    assert not deduper.seen("m1", 1)
+    deduper.mark("m1", {1: 2})
+
+    lookups = len(table.lookups)
+    assert deduper.seen("m1", 1)
+    # A new message for the same listing is a redelivery too
+    assert deduper.seen("m2", 1)
+    assert len(table.lookups) == lookups
+    assert deduper.memory_hits == 2 and deduper.db_hits == 0
+    assert table.processed == {1: ("m1", 2)}
+
+
+def test_listing_processed_by_another_instance_is_found_in_the_table():
+    table = _Table(processed=[7])
+    deduper = MessageDeduper(100, table.lookup, table.record)
+    assert deduper.unseen("m1", [7, 8]) == [8]
+    assert deduper.db_hits == 1
+
+    # Remembered afterwards, so the table is not asked again
+    assert deduper.seen("m2", 7)
+    assert table.lookups == [[7, 8]]
+    assert deduper.stats()["hit_rate"] == round(2 / 3, 4)
+
+
+def test_evicted_keys_fall_back_to_the_table():
+    table = _Table()
+    deduper = MessageDeduper(2, table.lookup, table.record)
+    deduper.mark("m1", {1: 0})
+    deduper.mark("m2", {2: 0})
+    assert deduper.seen("m3", 1)
+    assert deduper.db_hits == 1
+
+
+def test_unseen_messages_checks_a_batch_with_one_lookup():
+    table = _Table(processed=[3])
+    deduper = MessageDeduper(100, table.lookup, table.record)
+    deduper.mark_listings({1: ("m1", 0)})
+    assert deduper.unseen_messages({"m1": 1, "m2": 2, "m3": 3, "m4": 4}) == ["m2", "m4"]
+    assert table.lookups == [[2, 3, 4]]
+
+
+def test_failed_lookup_processes_the_listing():
+    table = _Table(processed=[1])
+    table.lookup_error = RuntimeError("database unavailable")
+    deduper = MessageDeduper(100, table.lookup, table.record)
+    assert deduper.unseen("m1", [1, 2]) == [1, 2]
+    assert not deduper.seen("m2", 1)
+    assert deduper.db_hits == 0
+
+
+def test_failed_record_is_logged_and_still_remembered(caplog):
+    table = _Table()
+    table.record_error = RuntimeError("database unavailable")
+    deduper = MessageDeduper(100, table.lookup, table.record)
+    with caplog.at_level(logging.WARNING):
+        deduper.mark("m1", {1: 0})
+    assert "Failed to record 1 processed listings" in caplog.text
+    assert deduper.seen("m1", 1)
+    assert table.processed == {}
+
+
+def _cloud_event(message_id, activity_idx, asset):
+    payload = {"asset_idx": asset.asset_idx, "name": asset.name, "price": asset.price}
+    data = {
+        "message": {
+            "data": base64.b64encode(json.dumps(payload).encode("utf-8")).decode("ascii"),
+            "attributes": {"event_type": "new_listing", "external_id": str(activity_idx)},
+        }
+    }
+    attributes = {"type": "google.cloud.pubsub.topic.v1.messagePublished", "source": "test", "id": message_id}
+    return CloudEvent(attributes, data)
+
+
+class _AlertCache:
+    def __init__(self, alerts):
+        self.alert_set = AlertSet(alerts=alerts, index=AlertIndex(alerts), version=None, loaded_at=0.0)
+
+    def get(self):
+        return self.alert_set
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Run process_listing against fakes, recording the dedupe, insert and publish calls in order."""
+    calls = []
+    table = _Table()
+
+    def lookup(activity_idxs):
+        calls.append(("lookup", tuple(activity_idxs)))
+        return table.lookup(activity_idxs)
+
+    def record(listings):
+        calls.append(("record", tuple(listings.items())))
+        table.record(listings)
+
+    def record_and_publish(asset, matching_alerts, timer):
+        calls.append(("publish", asset.activity_idx, len(matching_alerts)))
+
+    test_config = dataclasses.replace(main.config, alert_source="memory", notify_throttle=False)
+    monkeypatch.setattr(main, "config", test_config)
+    monkeypatch.setattr(main, "alert_cache", _AlertCache(ALERTS))
+    monkeypatch.setattr(main, "message_deduper", MessageDeduper(100, lookup, record))
+    monkeypatch.setattr(main, "_record_and_publish", record_and_publish)
+    return calls
+
+
+def test_process_listing_checks_before_matching_and_records_after_publishing(calls):
+    asset = ASSETS[0]
+    main.process_listing(_cloud_event("m1", 500, asset))
+    assert [call[0] for call in calls] == ["lookup", "publish", "record"]
+    assert calls[0] == ("lookup", (500,))
+    matched = calls[1][2]
+    assert matched > 0
+    assert calls[2] == ("record", ((500, ("m1", matched)),))
+
+    # The redelivery stops at the check
+    main.process_listing(_cloud_event("m1", 500, asset))
+    assert len(calls) == 3
+
+
+def test_failed_publish_leaves_the_listing_unrecorded(calls, monkeypatch):
+    def failing_publish(asset, matching_alerts, timer):
+        calls.append(("publish", asset.activity_idx, len(matching_alerts)))
+        raise RuntimeError("publish failed")
+
+    monkeypatch.setattr(main, "_record_and_publish", failing_publish)
+    with pytest.raises(RuntimeError):
+        main.process_listing(_cloud_event("m1", 500, ASSETS[0]))
+
+    # Pub/Sub redelivers, and the listing is processed again
+    with pytest.raises(RuntimeError):
+        main.process_listing(_cloud_event("m1", 500, ASSETS[0]))
+    assert [call[0] for call in calls] == ["lookup", "publish", "lookup", "publish"]
@@ -0,0 +1,73 @@
+"""normalize_text: the copy in baxus-monitor stays identical, and what case folding does to names."""
+
+import ast
+import importlib.util
+import unicodedata
+from pathlib import Path
+
+import pytest
+
+from src import normalize
+from src.normalize import normalize_text
+
+SERVICES = Path(__file__).resolve().parents[2]
+MONITOR_NORMALIZE = SERVICES / "baxus-monitor" / "src" / "utils" / "normalize.py"
+
+# Everything normalize_text depends on; the modules' docstrings and other contents differ
+SHARED = ("_MARKS", "_APOSTROPHES", "_SEPARATORS", "normalize_text")
+
+
+def _shared_definitions(path: Path) -> dict[str, str]:
+    """AST dumps of the shared definitions in a module, docstrings left out."""
+    definitions = {}
+    for node in ast.parse(path.read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.FunctionDef):
+            if ast.get_docstring(node) is not None:
+                node.body = node.body[1:]
+            definitions[node.name] = ast.dump(node)
+        elif isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+            definitions[node.targets[0].id] = ast.dump(node)
+    return {name: definitions.get(name) for name in SHARED}
+
+
+def _load_monitor_normalize():
+    spec = importlib.util.spec_from_file_location("baxus_monitor_normalize", MONITOR_NORMALIZE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_baxus_monitor_copy_is_identical():
+    ours = _shared_definitions(Path(normalize.__file__))
+    assert all(ours.values())
+    assert _shared_definitions(MONITOR_NORMALIZE) == ours
+
+
+def test_baxus_monitor_copy_normalizes_every_character_the_same():
+    monitor_normalize_text = _load_monitor_normalize().normalize_text
+    for code in range(0x20, 0x10000):
+        if unicodedata.category(chr(code)) in ("Cn", "Co", "Cs"):
+            continue
+        name = f"A{chr(code)}b"
+        assert monitor_normalize_text(name) == normalize_text(name), hex(code)
+
+
+@pytest.mark.parametrize(
+    ("name", "normalized"),
+    [
+        ("Blanton's Gold  Edition", "blantons gold edition"),
+        ("Crème de Cassis", "creme de cassis"),
+        ("Weißer Rum", "weisser rum"),
+        ("ﬁne ﬂask", "fine flask"),
+        ("İSTANBUL Dry Gin", "istanbul dry gin"),
+        ("ΣΊΣΥΦΟΣ", "σισυφοσ"),
+        ("ᾼ", "αι"),
+        ("Ｈｉｂｉｋｉ　１７", "hibiki 17"),
+        ("E.H. Taylor, Jr.", "e h taylor jr"),
+        ("", ""),
+        (None, ""),
+    ],
+)
+def test_names_are_case_and_accent_folded(name, normalized):
+    # Migration 0023 defines normalize_name() in SQL to give these same results
+    assert normalize_text(name) == normalized
@@ -0,0 +1,36 @@
+"""Match string normalization and the alerts it leaves without usable terms."""
+
+from src.matcher import matches_alert
+from src.models import get_asset
+from src.plan import UNMATCHABLE_TERM, normalize_terms
+
+from tests.test_alert_index import _alert, _asset
+
+
+def test_blank_match_strings_are_ignored():
+    assert normalize_terms(None) == ()
+    assert normalize_terms([]) == ()
+    assert normalize_terms(["", "   "]) == ()
+
+
+def test_terms_are_normalized_and_deduplicated():
+    assert normalize_terms(["E.H. Taylor", "e h  taylor", "12-Year"]) == ("e h taylor", "12 year")
+
+
+def test_punctuation_only_terms_are_dropped():
+    assert normalize_terms(["!!!", "Weller"]) == ("weller",)
+
+
+def test_alert_left_without_terms_matches_nothing():
+    assert normalize_terms(["!!!", "-", ""]) == (UNMATCHABLE_TERM,)
+    asset = _asset(1, "Weller 12 Year")
+    assert not matches_alert(_alert(1, ["!!!"]), asset)
+    assert not matches_alert(_alert(2, ["'"], match_all=True), asset)
+    # An alert with no match strings at all still matches on its other criteria
+    assert matches_alert(_alert(3, [""]), asset)
+
+
+def test_display_name_drops_apostrophes_only():
+    asset = get_asset(1, "Blanton's Gold  Edition", "10", None, None, activity_idx=2)
+    assert asset.name == "Blantons Gold  Edition"
+    assert asset.name_normalized == "blantons gold edition"
@@ -0,0 +1,114 @@
+"""Replay: edited alert definitions and the two-side diff over in-memory listing history."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src import replay as replay_module
+from src.matcher import LinearIndex
+from src.replay import apply_definitions, replay
+
+from tests.test_alert_index import ALERTS, ASSETS
+
+UNTIL = datetime(2026, 1, 1, tzinfo=timezone.utc)
+SINCE = UNTIL - timedelta(days=30)
+
+# Each asset listed twice, under its own activity_idx
+LISTINGS = [(1000 + row, asset) for row, asset in enumerate(ASSETS + ASSETS)]
+
+EDITS = [
+    {"id": 1, "match_strings": ["weller", "special"], "match_all": True},
+    {"id": "4", "max_price": 300},
+    {"id": 12, "name": "renamed"},
+    {"id": "new", "match_strings": ["stagg"]},
+]
+
+
+@pytest.fixture(autouse=True)
+def history(monkeypatch):
+    """Serve LISTINGS as iter_listing_history column chunks, recording the chunk sizes."""
+    chunks = []
+
+    def iter_listing_history(since, until, chunk_size):
+        assert (since, until) == (SINCE, UNTIL)
+        for start in range(0, len(LISTINGS), chunk_size):
+            rows = LISTINGS[start:start + chunk_size]
+            chunks.append(len(rows))
+            yield (
+                [activity_idx for activity_idx, _ in rows],
+                [asset.asset_idx for _, asset in rows],
+                [asset.name_normalized for _, asset in rows],
+                [asset.price for _, asset in rows],
+                [asset.bottled_year for _, asset in rows],
+                [asset.age for _, asset in rows],
+            )
+
+    monkeypatch.setattr(replay_module, "iter_listing_history", iter_listing_history)
+    return chunks
+
+
+def _hits(alerts):
+    """activity_idxs each alert matches, by the linear scan."""
+    index = LinearIndex(alerts)
+    hits = {str(alert.id): set() for alert in alerts}
+    for activity_idx, asset in LISTINGS:
+        for alert in index.match(asset):
+            hits[str(alert.id)].add(activity_idx)
+    return hits
+
+
+def test_definitions_replace_fields_and_recompile_plans():
+    edited = apply_definitions(ALERTS, EDITS)
+
+    assert [alert.id for alert in edited] == [alert.id for alert in ALERTS] + ["new"]
+    assert edited[0].match_strings == ["weller", "special"] and edited[0].match_all
+    assert edited[0].plan.terms == ("weller", "special")
+    assert edited[3].max_price == 300 and edited[3].plan.max_price == 300
+    assert edited[11].name == "renamed" and edited[11].plan == ALERTS[11].plan
+    assert edited[-1].match_strings == ["stagg"] and edited[-1].max_price is None
+    # Untouched alerts are shared; the stored ones are left as they were
+    assert all(edited[i] is ALERTS[i] for i in range(len(ALERTS)) if i not in (0, 3, 11))
+    assert ALERTS[0].match_strings == ["weller"] and ALERTS[0].plan.terms == ("weller",)
+
+
+@pytest.mark.parametrize("engine", ["columnar", "index", "linear"])
+def test_identical_sides_report_the_hits_once(engine, history):
+    report = replay(ALERTS, ALERTS, SINCE, UNTIL, engine_a=engine, engine_b=engine, chunk_size=7)
+
+    assert history == [7, 7, 6]
+    assert report.rows == len(LISTINGS)
+    expected = _hits(ALERTS)
+    assert {alert.alert_id: (alert.hits_a, alert.hits_b) for alert in report.alerts} == {
+        alert_id: (len(found), len(found)) for alert_id, found in expected.items()
+    }
+    assert not any(alert.changed for alert in report.alerts)
+
+
+def test_engine_change_with_the_same_alerts_has_no_differences():
+    report = replay(ALERTS, ALERTS, SINCE, UNTIL, engine_a="index", engine_b="columnar", chunk_size=4)
+    assert not any(alert.changed for alert in report.alerts)
+    assert [alert.hits_a for alert in report.alerts] == [alert.hits_b for alert in report.alerts]
+
+
+@pytest.mark.parametrize(
+    ("engine_a", "engine_b"), [("columnar", "columnar"), ("index", "columnar"), ("linear", "index")]
+)
+def test_edited_definitions_report_the_listings_only_one_side_matched(engine_a, engine_b):
+    edited = apply_definitions(ALERTS, EDITS)
+    report = replay(ALERTS, edited, SINCE, UNTIL, engine_a=engine_a, engine_b=engine_b, chunk_size=6, examples=2)
+
+    before, after = _hits(ALERTS), _hits(edited)
+    by_id = {alert.alert_id: alert for alert in report.alerts}
+    assert list(by_id) == [str(alert.id) for alert in edited]
+    for alert_id, result in by_id.items():
+        found_a, found_b = before.get(alert_id, set()), after[alert_id]
+        assert (result.hits_a, result.hits_b) == (len(found_a), len(found_b)), alert_id
+        assert (result.only_a, result.only_b) == (len(found_a - found_b), len(found_b - found_a)), alert_id
+        assert result.examples_only_a == sorted(found_a - found_b)[:2]
+        assert result.examples_only_b == sorted(found_b - found_a)[:2]
+
+    changed = {alert.alert_id for alert in report.alerts if alert.changed}
+    assert changed == {"1", "4", "new"}
+    assert by_id["new"].hits_a == 0 and by_id["new"].hits_b > 0
+    # Changed alerts come first in the report
+    assert {alert["alert_id"] for alert in report.to_dict()["alerts"][:len(changed)]} == changed
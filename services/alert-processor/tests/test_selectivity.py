@@ -0,0 +1,98 @@
+"""Learned predicate orders must never change which alerts match."""
+
+import itertools
+import threading
+
+import pytest
+
+from benchmarks import corpus
+from src.matcher import LinearIndex
+from src.plan import PREDICATES
+from src.selectivity import PredicateOrdering, match_alerts
+
+from tests.test_alert_index import ALERTS, ASSETS, _ids
+
+CORPUS_ALERTS = corpus.alerts(500, seed=11)
+CORPUS_ASSETS = corpus.assets(200, seed=12)
+
+
+@pytest.mark.parametrize("order", list(itertools.permutations(PREDICATES)))
+def test_reordered_plans_accept_and_reject_the_same(order):
+    for alert in ALERTS + CORPUS_ALERTS:
+        plan = alert.plan
+        reordered = plan.reordered(order)
+        assert sorted(reordered.checks) == sorted(plan.checks)
+        for asset in ASSETS + CORPUS_ASSETS:
+            name_normalized = asset.name_normalized
+            assert reordered.matches(asset, name_normalized) == plan.matches(asset, name_normalized), (
+                alert.id, asset.name
+            )
+
+
+def test_evaluate_matches_plan():
+    ordering = PredicateOrdering(sample_every=1)
+    for alert in ALERTS + CORPUS_ALERTS[:100]:
+        for asset in ASSETS:
+            expected = alert.plan.matches(asset, asset.name_normalized)
+            assert ordering.evaluate(alert.plan, asset, asset.name_normalized) == expected
+
+
+def test_adaptive_matching_equals_default_order():
+    # Sample and adapt on every asset so the plans are reordered as often as possible
+    ordering = PredicateOrdering(sample_every=1, adapt_every=1)
+    alerts = corpus.alerts(500, seed=11)
+    expected = LinearIndex(CORPUS_ALERTS)
+    for asset in ASSETS + CORPUS_ASSETS:
+        assert _ids(match_alerts(alerts, asset, ordering)) == _ids(expected.match(asset)), asset.name
+    assert ordering.adaptations == len(ASSETS + CORPUS_ASSETS)
+
+
+def test_counters_are_consistent_across_threads():
+    ordering = PredicateOrdering(sample_every=7, adapt_every=1000)
+    plan = ALERTS[8].plan
+    asset = ASSETS[0]
+    threads, calls, evaluations = 8, 7000, 500
+    sampled = [0] * threads
+
+    def run(thread):
+        for _ in range(calls):
+            sampled[thread] += ordering.should_sample()
+        for _ in range(evaluations):
+            ordering.evaluate(plan, asset, asset.name_normalized)
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sum(sampled) == threads * calls // 7
+    predicates = ordering.stats()["predicates"]
+    for name in plan.checks:
+        assert predicates[name]["evaluated"] == threads * evaluations
+
+
+def test_clock_overhead_is_measured_lazily():
+    ordering = PredicateOrdering()
+    assert ordering._overhead_ns is None
+    ordering.evaluate(ALERTS[0].plan, ASSETS[0], ASSETS[0].name_normalized)
+    ordering.stats()
+    assert ordering._overhead_ns is not None
+
+
+def test_fresh_plans_are_only_reordered_when_the_order_changed(monkeypatch):
+    ordering = PredicateOrdering(sample_every=0)
+    applied = []
+    apply = ordering.apply
+    monkeypatch.setattr(ordering, "apply", lambda alerts: applied.append(len(alerts)) or apply(alerts))
+    alerts = corpus.alerts(50, seed=13)
+
+    # Postgres candidates (no version) already run in the default order
+    for asset in ASSETS:
+        match_alerts(alerts, asset, ordering)
+    assert applied == []
+
+    ordering.order = tuple(reversed(PREDICATES))
+    found = match_alerts(alerts, ASSETS[0], ordering)
+    assert applied == [len(alerts)]
+    assert _ids(found) == _ids(LinearIndex(corpus.alerts(50, seed=13)).match(ASSETS[0]))
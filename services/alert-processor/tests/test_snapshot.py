@@ -0,0 +1,61 @@
+"""Alert snapshots: round trips, version checks, and AlertCache reloading past a stale snapshot."""
+
+import msgpack
+import pytest
+
+from src.snapshot import decode_snapshot, encode_snapshot, load_snapshot, save_snapshot
+
+from tests.test_alert_cache import _cache, _Source
+from tests.test_alert_index import ALERTS
+
+
+def test_snapshot_round_trips_alerts_and_plans():
+    alerts, version = decode_snapshot(encode_snapshot(ALERTS, 42))
+    assert version == 42
+    assert alerts == ALERTS
+    assert [alert.plan for alert in alerts] == [alert.plan for alert in ALERTS]
+
+
+def test_snapshot_from_another_format_is_rejected():
+    document = msgpack.unpackb(encode_snapshot(ALERTS, 1), raw=False)
+    document["format"] -= 1
+    with pytest.raises(ValueError, match="Unsupported alert snapshot format"):
+        decode_snapshot(msgpack.packb(document, use_bin_type=True))
+
+
+def test_snapshot_is_only_loaded_at_its_version(tmp_path):
+    uri = str(tmp_path / "alerts.msgpack")
+    assert load_snapshot(uri, 1) is None
+    assert save_snapshot(uri, ALERTS, 1)
+    assert load_snapshot(uri, 1) == ALERTS
+    assert load_snapshot(uri, 2) is None
+
+
+def test_failed_save_is_reported(tmp_path):
+    assert not save_snapshot(str(tmp_path), ALERTS, 1)
+
+
+def test_stale_snapshot_is_replaced_by_a_database_load(tmp_path):
+    uri = str(tmp_path / "alerts.msgpack")
+    save_snapshot(uri, ALERTS[:3], 1)
+    source = _Source(version=2)
+
+    cache = _cache(source, snapshot_uri=uri)
+    alert_set = cache.get()
+    assert source.loads == 1 and cache.snapshot_loads == 0
+    assert alert_set.version == 2 and len(alert_set.alerts) == len(ALERTS)
+    assert load_snapshot(uri, 2) == ALERTS
+
+
+def test_version_change_reloads_from_the_newer_snapshot(tmp_path):
+    uri = str(tmp_path / "alerts.msgpack")
+    source = _Source(version=1)
+    cache = _cache(source, snapshot_uri=uri)
+    cache.get()
+
+    # Another instance loaded version 2 and wrote its snapshot
+    save_snapshot(uri, ALERTS[:5], 2)
+    source.version = 2
+    alert_set = cache.get()
+    assert alert_set.version == 2 and alert_set.alerts == ALERTS[:5]
+    assert source.loads == 1 and cache.snapshot_loads == 1
@@ -0,0 +1,188 @@
+"""NotificationThrottle: per-user budgets, failing open, and flushing digests, over in-memory tables."""
+
+import base64
+
+import pytest
+from cloudevents.http import CloudEvent
+
+import main
+from src import throttle as throttle_module
+from src.models import Alert
+from src.throttle import NotificationThrottle
+
+
+def _alert(alert_id, user_id):
+    return Alert(
+        id=alert_id, user_id=user_id, user_email=f"user{user_id}@example.com", name=f"alert {alert_id}",
+        match_strings=["weller"], match_all=False, max_price=None, bottled_year_min=None,
+        bottled_year_max=None, age_min=None, age_max=None,
+    )
+
+
+class _Tables:
+    """Stands in for ``notification_buckets`` and ``notification_digests``."""
+
+    def __init__(self, tokens=None, pages=()):
+        self.tokens = dict(tokens or {})
+        self.pages = [list(page) for page in pages]
+        self.takes: list[dict[str, int]] = []
+        self.appended: list[tuple[str, str | None, int]] = []
+        self.claims = 0
+        self.released: list[list[int]] = []
+        self.take_error = self.append_error = self.claim_error = self.release_error = None
+
+    def take(self, requested, burst, refill_per_sec):
+        self.takes.append(dict(requested))
+        if self.take_error:
+            raise self.take_error
+        granted = {}
+        for user_id, count in requested.items():
+            granted[user_id] = min(count, self.tokens.get(user_id, burst))
+            self.tokens[user_id] = self.tokens.get(user_id, burst) - granted[user_id]
+        return granted
+
+    def append(self, held):
+        if self.append_error:
+            raise self.append_error
+        self.appended.extend(held)
+
+    def claim(self, window_sec, limit, max_items):
+        self.claims += 1
+        if self.claim_error:
+            raise self.claim_error
+        return self.pages.pop(0) if self.pages else []
+
+    def release(self, digest_idxs):
+        self.released.append(digest_idxs)
+        if self.release_error:
+            raise self.release_error
+
+    def throttle(self, burst=5, rate_per_hour=12.0):
+        return NotificationThrottle(
+            burst=burst, rate_per_hour=rate_per_hour, window_sec=900, max_items=25, cache_size=100,
+            take=self.take, append=self.append, claim=self.claim, release=self.release,
+        )
+
+
+def _digests(*digest_idxs):
+    return [{"digest_idx": digest_idx, "user_id": "1", "match_count": 2} for digest_idx in digest_idxs]
+
+
+class _Publish:
+    """Records published digests and fails the ones listed in ``fail``."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.published: list[int] = []
+
+    def __call__(self, digests):
+        self.published.extend(digest["digest_idx"] for digest in digests)
+        failed = [digest["digest_idx"] for digest in digests if digest["digest_idx"] in self.fail]
+        return {digest_idx: RuntimeError("publish failed") for digest_idx in failed}
+
+
+def test_matches_over_budget_go_to_the_digest():
+    tables = _Tables(tokens={"1": 3, "2": 10})
+    throttle = tables.throttle()
+    matches = [(_alert(10, 1), 100 + i) for i in range(5)] + [(_alert(20, 2), 200 + i) for i in range(2)]
+
+    admitted = throttle.admit(matches)
+
+    assert tables.takes == [{"1": 5, "2": 2}]
+    assert [match_idx for _, match_idx in admitted] == [100, 101, 102, 200, 201]
+    assert tables.appended == [("1", "user1@example.com", 103), ("1", "user1@example.com", 104)]
+    assert throttle.stats() == {
+        "published": 5, "digested": 2, "local_denials": 0, "db_calls": 1, "digests_sent": 0, "dry_users": 1,
+    }
+
+
+def test_dry_users_are_held_back_without_a_database_call():
+    tables = _Tables(tokens={"1": 1})
+    throttle = tables.throttle()
+    throttle.admit([(_alert(10, 1), 100), (_alert(11, 1), 101)])
+
+    # User 1 ran dry; only user 2 is asked for tokens
+    admitted = throttle.admit([(_alert(10, 1), 102), (_alert(20, 2), 200)])
+
+    assert tables.takes == [{"1": 2}, {"2": 1}]
+    assert [match_idx for _, match_idx in admitted] == [200]
+    assert [match_idx for _, _, match_idx in tables.appended] == [101, 102]
+    assert throttle.stats()["local_denials"] == 1
+
+
+def test_without_a_refill_rate_dry_users_are_not_remembered():
+    tables = _Tables(tokens={"1": 0})
+    throttle = tables.throttle(rate_per_hour=0)
+    throttle.admit([(_alert(10, 1), 100)])
+    throttle.admit([(_alert(10, 1), 101)])
+
+    assert tables.takes == [{"1": 1}, {"1": 1}]
+    assert throttle.stats()["dry_users"] == 0
+
+
+@pytest.mark.parametrize("failing", ["take_error", "append_error"])
+def test_database_errors_publish_every_match(failing):
+    tables = _Tables(tokens={"1": 0})
+    setattr(tables, failing, RuntimeError("database unavailable"))
+    throttle = tables.throttle()
+    matches = [(_alert(10, 1), 100), (_alert(11, 1), 101)]
+
+    assert throttle.admit(matches) == matches
+    assert tables.appended == []
+    assert throttle.stats()["digested"] == 0
+
+
+def test_flush_claims_pages_until_a_short_one(monkeypatch):
+    monkeypatch.setattr(throttle_module, "_FLUSH_LIMIT", 2)
+    tables = _Tables(pages=[_digests(1, 2), _digests(3, 4), _digests(5)])
+    throttle = tables.throttle()
+    publish = _Publish()
+
+    assert throttle.flush(publish) == 5
+    assert publish.published == [1, 2, 3, 4, 5]
+    assert tables.claims == 3
+    assert tables.released == []
+    assert throttle.stats()["digests_sent"] == 5
+
+
+def test_unpublished_digests_are_released_for_the_next_flush(monkeypatch):
+    monkeypatch.setattr(throttle_module, "_FLUSH_LIMIT", 2)
+    tables = _Tables(pages=[_digests(1, 2), _digests(3)])
+    throttle = tables.throttle()
+
+    # A full page with a failure is the last one this flush claims
+    assert throttle.flush(_Publish(fail={2})) == 1
+    assert tables.released == [[2]]
+    assert tables.claims == 1
+
+
+def test_failed_release_is_logged_and_the_sent_digests_counted():
+    tables = _Tables(pages=[_digests(1, 2, 3)])
+    tables.release_error = RuntimeError("database unavailable")
+    throttle = tables.throttle()
+
+    assert throttle.flush(_Publish(fail={1, 3})) == 1
+    assert tables.released == [[1, 3]]
+
+
+def test_failed_claim_publishes_nothing():
+    tables = _Tables(pages=[_digests(1)])
+    tables.claim_error = RuntimeError("database unavailable")
+    publish = _Publish()
+
+    assert tables.throttle().flush(publish) == 0
+    assert publish.published == []
+
+
+def test_scheduled_entry_point_flushes_the_due_digests(monkeypatch):
+    tables = _Tables(pages=[_digests(1, 2)])
+    publish = _Publish()
+    monkeypatch.setattr(main, "notification_throttle", tables.throttle())
+    monkeypatch.setattr(main, "publish_digests", publish)
+
+    data = {"message": {"data": base64.b64encode(b"{}").decode("ascii")}}
+    attributes = {"type": "google.cloud.pubsub.topic.v1.messagePublished", "source": "test", "id": "f1"}
+    main.flush_digests(CloudEvent(attributes, data))
+
+    assert publish.published == [1, 2]
+    assert tables.claims == 1
@@ -0,0 +1,192 @@
+"""ListingWorker acks, nacks and dedupes the messages it pulls from a LocalSubscriber."""
+
+import dataclasses
+import json
+import threading
+
+import pytest
+
+from benchmarks.fakes import LocalPublisher, LocalSubscriber
+from src import worker as worker_module
+from src.alert_cache import AlertSet
+from src.alert_index import AlertIndex
+from src.config import config
+from src.dedupe import MessageDeduper
+from src.matcher import LinearIndex
+from src.worker import ListingWorker
+
+from tests.test_alert_index import ALERTS, ASSETS
+
+SUBSCRIPTION = "projects/test-project/subscriptions/new-listings-worker"
+FIRST_ACTIVITY = 5000
+
+
+class _Store:
+    """In-memory ``alert_matches`` and ``processed_messages``; insert calls in ``fail_on`` raise."""
+
+    def __init__(self, fail_on=()):
+        self.matches: dict[tuple[str, int], int] = {}
+        self.processed: dict[int, tuple[str, int]] = {}
+        self.insert_calls = 0
+        self.fail_on = set(fail_on)
+
+    def insert_listing_matches(self, rows):
+        self.insert_calls += 1
+        if self.insert_calls in self.fail_on:
+            raise RuntimeError("database unavailable")
+        inserted = {}
+        for row in rows:
+            key = (str(row.alert_id), row.activity_idx)
+            if key not in self.matches:
+                self.matches[key] = inserted[key] = len(self.matches) + 1
+        return inserted
+
+    def lookup(self, activity_idxs):
+        return {activity_idx for activity_idx in activity_idxs if activity_idx in self.processed}
+
+    def record(self, listings):
+        self.processed.update(listings)
+
+
+class _AlertCache:
+    def __init__(self, alerts):
+        self.alert_set = AlertSet(alerts=alerts, index=AlertIndex(alerts), version=None, loaded_at=0.0)
+
+    def get(self):
+        return self.alert_set
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = _Store()
+    worker_config = dataclasses.replace(config, alert_source="memory", notify_throttle=False)
+    monkeypatch.setattr(worker_module, "config", worker_config)
+    monkeypatch.setattr(worker_module, "alert_cache", _AlertCache(ALERTS))
+    monkeypatch.setattr(worker_module, "message_deduper", MessageDeduper(1000, store.lookup, store.record))
+    monkeypatch.setattr(worker_module, "insert_listing_matches", store.insert_listing_matches)
+    return store
+
+
+def _payload(asset) -> bytes:
+    return json.dumps({
+        "asset_idx": asset.asset_idx, "name": asset.name, "price": asset.price,
+        "bottled_year": asset.bottled_year, "age": asset.age,
+    }).encode("utf-8")
+
+
+def _put_listings(subscriber: LocalSubscriber) -> list[str]:
+    return [
+        subscriber.put(_payload(asset), external_id=str(FIRST_ACTIVITY + i)) for i, asset in enumerate(ASSETS)
+    ]
+
+
+def _expected_matches() -> set[tuple[str, int]]:
+    linear = LinearIndex(ALERTS)
+    return {
+        (str(alert.id), FIRST_ACTIVITY + i) for i, asset in enumerate(ASSETS) for alert in linear.match(asset)
+    }
+
+
+def _run(subscriber: LocalSubscriber, publisher: LocalPublisher, batch_size: int = 4) -> ListingWorker:
+    """Run a worker until every message is acked."""
+    worker = ListingWorker(
+        subscriber, SUBSCRIPTION, batch_size=batch_size, batch_latency_sec=0.05,
+        max_messages=batch_size, max_bytes=10**6, publisher=publisher,
+    )
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    try:
+        assert subscriber.wait_drained(timeout=10)
+    finally:
+        worker.stop()
+        thread.join(timeout=10)
+    return worker
+
+
+@pytest.fixture
+def publisher():
+    return LocalPublisher(round_trip_sec=0, max_latency=0.001)
+
+
+def test_batches_are_matched_published_and_acked(store, publisher):
+    subscriber = LocalSubscriber()
+    message_ids = _put_listings(subscriber)
+
+    worker = _run(subscriber, publisher)
+
+    assert sorted(subscriber.acked) == sorted(message_ids)
+    assert subscriber.nacked == 0
+    assert subscriber.max_outstanding <= 4
+    assert set(store.matches) == _expected_matches()
+    assert len(publisher.published) == len(store.matches)
+    assert set(store.processed) == {FIRST_ACTIVITY + i for i in range(len(ASSETS))}
+    assert worker.stats()["messages"] == len(ASSETS)
+
+
+def test_failed_batch_is_nacked_and_redelivered(store, publisher):
+    store.fail_on = {2}
+    subscriber = LocalSubscriber()
+    message_ids = _put_listings(subscriber)
+
+    worker = _run(subscriber, publisher)
+
+    # The second batch failed as a whole and every message of it came back
+    assert worker.failed_batches == 1
+    assert 0 < subscriber.nacked <= 4
+    assert sorted(subscriber.acked) == sorted(message_ids)
+    # The retry recorded and published each match once
+    assert set(store.matches) == _expected_matches()
+    assert len(publisher.published) == len(store.matches)
+
+
+def test_malformed_messages_are_acked_and_dropped(store, publisher):
+    subscriber = LocalSubscriber()
+    malformed = [
+        subscriber.put(b"not json", external_id=str(FIRST_ACTIVITY)),
+        subscriber.put(_payload(ASSETS[0])),
+        subscriber.put(_payload(ASSETS[0]), external_id="not a number"),
+        subscriber.put(b"[1, 2]", external_id=str(FIRST_ACTIVITY)),
+    ]
+    valid = subscriber.put(_payload(ASSETS[0]), external_id=str(FIRST_ACTIVITY + 1))
+
+    worker = _run(subscriber, publisher)
+
+    assert sorted(subscriber.acked) == sorted(malformed + [valid])
+    assert subscriber.nacked == 0
+    assert worker.malformed == len(malformed)
+    assert {activity_idx for _, activity_idx in store.matches} == {FIRST_ACTIVITY + 1}
+
+
+def test_redelivered_messages_are_processed_once(store, publisher):
+    subscriber = LocalSubscriber()
+    message_ids = _put_listings(subscriber)
+    _run(subscriber, publisher)
+    published = len(publisher.published)
+    assert published == len(_expected_matches())
+
+    # The same message ids again (acks lost), plus a second copy of one listing under a new id
+    for i, (message_id, asset) in enumerate(zip(message_ids, ASSETS)):
+        subscriber.put(_payload(asset), message_id=message_id, external_id=str(FIRST_ACTIVITY + i))
+    subscriber.put(_payload(ASSETS[0]), external_id=str(FIRST_ACTIVITY))
+    insert_calls = store.insert_calls
+
+    worker = _run(subscriber, publisher)
+
+    assert worker.duplicates == len(ASSETS) + 1
+    assert len(subscriber.acked) == 2 * len(ASSETS) + 1
+    assert store.insert_calls == insert_calls
+    assert len(publisher.published) == published
+
+
+def test_listing_delivered_twice_in_one_batch_is_processed_once(store, publisher):
+    subscriber = LocalSubscriber()
+    first = subscriber.put(_payload(ASSETS[0]), external_id=str(FIRST_ACTIVITY))
+    second = subscriber.put(_payload(ASSETS[0]), external_id=str(FIRST_ACTIVITY))
+
+    worker = _run(subscriber, publisher, batch_size=2)
+
+    assert sorted(subscriber.acked) == sorted([first, second])
+    assert worker.duplicates == 1
+    assert set(store.matches) == {key for key in _expected_matches() if key[1] == FIRST_ACTIVITY}
+    assert len(publisher.published) == len(store.matches)
+    assert list(store.processed) == [FIRST_ACTIVITY]
@@ -11,23 +11,40 @@ specifying a subdirectory for the entry module. All implementation code
 lives in src/ - this file is just a thin entry point that imports from there.
 """
 
+# Installed before anything else so IMPORT_PROFILE=1 sees every import
+from src import import_profile
+
+if import_profile.enabled():
+    import_profile.install()
+
 import base64
 import json
 from typing import Optional
 
 import functions_framework
 from cloudevents.http import CloudEvent
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-from sqlalchemy import text
 
 from src.config import config
-from src.db import Database
+from src.db import get_database
 from src.log import get_logger
 
 logger = get_logger()
 
-db = Database(config)
+# SendGrid, SQLAlchemy and Cloud Logging are imported on first use, so they
+# show up in the first message's import profile
+import_profile.report("startup", logger)
+
+_sendgrid = None
+
+
+def _get_sendgrid():
+    """Return the SendGrid client, created on first use and reused by warm instances."""
+    global _sendgrid
+    if _sendgrid is None:
+        from sendgrid import SendGridAPIClient
+
+        _sendgrid = SendGridAPIClient(config.sendgrid_api_key)
+    return _sendgrid
 
 
 def log_email(
@@ -42,8 +59,10 @@ def log_email(
     """
     Log an email to the email_logs table.
     """
+    from sqlalchemy import text
+
     try:
-        with db.get_session() as session:
+        with get_database().get_session() as session:
             session.execute(
                 text(
                     """
@@ -70,12 +89,118 @@ def log_email(
         logger.error(f"Failed to log email: {e}")
 
 
+def _settings_links(user_id: str) -> tuple[str, str]:
+    """Return the unsubscribe and notification settings links for the environment."""
+    if config.environment == "dev":
+        return f"https://dev.baxpro.xyz/unsubscribe?uid={user_id}", "https://dev.baxpro.xyz/notification-settings"
+    return f"https://baxpro.xyz/unsubscribe?uid={user_id}", "https://baxpro.xyz/notification-settings"
+
+
+def _price_display(price) -> str:
+    """Format a listing price for an email."""
+    return f"${price:,.2f}" if price else "Price not available"
+
+
+def _send_email(to_email: str, subject: str, html_content: str) -> int | None:
+    """Send one email through SendGrid and return the response status code."""
+    from sendgrid.helpers.mail import Mail
+
+    message = Mail(
+        from_email="alerts@baxpro.xyz",
+        to_emails=to_email,
+        subject=subject,
+        html_content=html_content,
+    )
+    response = _get_sendgrid().send(message)
+    return response.status_code
+
+
+def _digest_row(match: dict) -> str:
+    """One listing row of the digest email table."""
+    asset_url = match.get("asset_url", "https://baxpro.xyz/dashboard")
+    asset_name = match.get("asset_name", "Unknown Product")
+    alert_name = match.get("alert_name", "Your Alert")
+    price = _price_display(match.get("asset_price"))
+    return f"""
+            <tr>
+                <td style="padding: 8px 0;"><a href="{asset_url}">{asset_name}</a><br>
+                <span style="color: #666; font-size: 13px;">{alert_name}</span></td>
+                <td style="padding: 8px 0; text-align: right; color: #2563eb;"><strong>{price}</strong></td>
+            </tr>"""
+
+
+def send_digest(payload: dict) -> None:
+    """Send one email listing the matches held back by alert-processor's throttling.
+
+    Expected message format for baxus_listing_digest:
+    {
+        "digest_idx": int,
+        "user_id": "uuid-string",
+        "user_email": "string",
+        "match_count": int,  # all held-back matches; "matches" lists the newest ones
+        "matches": [{"match_idx": int, "alert_name": "string", "asset_idx": int,
+                     "asset_name": "string", "asset_price": 18.18, "asset_url": "string"}]
+    }
+    """
+    to_email = payload.get("user_email")
+    user_id = payload.get("user_id")
+    digest_idx = payload.get("digest_idx")
+    matches = payload.get("matches", [])
+    match_count = payload.get("match_count", len(matches))
+    logger.info(
+        f"Processing: event_type=baxus_listing_digest, digest_idx={digest_idx}, user_id={user_id}, "
+        f"matches={match_count}"
+    )
+
+    if not to_email:
+        logger.info(f"User {user_id} has no email or email_consent=false, skipping digest")
+        return
+    if not matches:
+        logger.warning(f"Digest {digest_idx} lists no matches, skipping")
+        return
+
+    # email_logs has one match_idx/asset_idx per email: a digest logs its first (newest) match
+    first_match_idx, first_asset_idx = matches[0].get("match_idx"), matches[0].get("asset_idx")
+    unsubscribe_link, notification_link = _settings_links(user_id)
+    rows = "".join(_digest_row(match) for match in matches)
+    more = match_count - len(matches)
+    more_line = f'<p style="color: #666;">…and {more} more on your BaxPro dashboard.</p>' if more > 0 else ""
+
+    subject = f"BaxPro Alerts: {match_count} new matches"
+    html_content = f"""
+    <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+        <h2 style="color: #333;">{match_count} New Matches for Your Alerts</h2>
+        <p>Your alerts matched several new listings, so we bundled them into one email:</p>
+
+        <table style="width: 100%; border-collapse: collapse; background-color: #f5f5f5; padding: 20px;
+                      border-radius: 8px; margin: 20px 0;">{rows}
+        </table>
+        {more_line}
+
+        <p style="color: #666; font-size: 14px;">
+            You're receiving this because you have alerts set up on BaxPro.xyz<br>
+            <a href="{notification_link}">Manage your notification preferences</a> | 
+            <a href="{unsubscribe_link}">Unsubscribe</a>
+        </p>
+    </div>
+    """
+
+    try:
+        response_code = _send_email(to_email, subject, html_content)
+        logger.info(f"Digest sent successfully: digest_idx={digest_idx}, status_code={response_code}")
+    except Exception as e:
+        logger.error(f"Failed to send digest to {to_email}: {e}")
+        log_email(first_match_idx, user_id, first_asset_idx, to_email, subject, html_content, None)
+        raise
+    log_email(first_match_idx, user_id, first_asset_idx, to_email, subject, html_content, response_code)
+
+
 @functions_framework.cloud_event
 def send_alert(cloud_event: CloudEvent):
     """
     Process a Pub/Sub CloudEvent from alert-processor.
 
-    event_types = "baxus_listing_alert" OR "user_example"
+    event_types = "baxus_listing_alert", "baxus_listing_digest" (see send_digest) OR "user_example"
     Expected message format for baxus_listing_alert:
     {
         "match_idx": int,
@@ -111,6 +236,11 @@ def send_alert(cloud_event: CloudEvent):
     attributes = pubsub_message.get("attributes", {})
     event_type = attributes.get("event_type", "alert_match")
 
+    if event_type == "baxus_listing_digest":
+        send_digest(payload)
+        import_profile.report("send_alert", logger)
+        return
+
     # Extract payload data
     to_email = payload.get("user_email", None)
     user_id = payload.get("user_id")
@@ -153,14 +283,9 @@ def send_alert(cloud_event: CloudEvent):
     logger.info(f"Sending alert email to {to_email} for match_idx={match_idx}")
 
     # Format price for display
-    price_display = f"${price:,.2f}" if price else "Price not available"
+    price_display = _price_display(price)
 
-    if config.environment == "dev":
-        unsubscribe_link = f"https://dev.baxpro.xyz/unsubscribe?uid={user_id}"
-        notification_link = "https://dev.baxpro.xyz/notification-settings"
-    else:
-        unsubscribe_link = f"https://baxpro.xyz/unsubscribe?uid={user_id}"
-        notification_link = "https://baxpro.xyz/notification-settings"
+    unsubscribe_link, notification_link = _settings_links(user_id)
 
     # Build email content
     subject = f"BaxPro Alert: {alert_name}"
@@ -183,18 +308,9 @@ def send_alert(cloud_event: CloudEvent):
     </div>
     """
 
-    message = Mail(
-        from_email="alerts@baxpro.xyz",
-        to_emails=to_email,
-        subject=subject,
-        html_content=html_content,
-    )
-
     response_code = None
     try:
-        sg = SendGridAPIClient(config.sendgrid_api_key)
-        response = sg.send(message)
-        response_code = response.status_code
+        response_code = _send_email(to_email, subject, html_content)
         logger.info(f"Email sent successfully: status_code={response_code}")
     except Exception as e:
         logger.error(f"Failed to send email to {to_email}: {e}")
@@ -220,5 +336,6 @@ def send_alert(cloud_event: CloudEvent):
         body=html_content,
         response_code=response_code,
     )
+    import_profile.report("send_alert", logger)
 
     return
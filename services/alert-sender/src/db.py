@@ -1,19 +1,30 @@
 """Database connection and session management."""
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import QueuePool
-from sqlalchemy.engine import Connection
+import threading
+from typing import TYPE_CHECKING
+
 from .config import Config, config
 from .log import get_logger
 
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection
+    from sqlalchemy.orm import Session
+
 logger = get_logger()
 
+# Shared instance, created on first use so SQLAlchemy stays off the cold-start import path
+_database = None
+_database_lock = threading.Lock()
+
 
 class Database:
     """Database connection manager."""
 
     def __init__(self, config: Config):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import QueuePool
+
         self.config = config
         self.engine = create_engine(
             config.get_db_connection_string(),
@@ -25,11 +36,11 @@ class Database:
         )
         self.SessionLocal = sessionmaker(bind=self.engine)
 
-    def get_session(self) -> Session:
+    def get_session(self) -> "Session":
         """Get a new database session."""
         return self.SessionLocal()
 
-    def get_connection(self) -> Connection:
+    def get_connection(self) -> "Connection":
         """
         Get a raw SQLAlchemy Core connection (supports .cursor() for psycopg2/pg8000).
         Must be used with try/finally or context manager.
@@ -41,7 +52,20 @@ class Database:
         self.engine.dispose()
 
 
+def get_database() -> Database:
+    """Return the shared Database instance (created on first call)."""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = Database(config)
+                logger.info("Database engine created")
+    return _database
+
+
 if __name__ == "__main__":
+    from sqlalchemy import text
+
     print("Testing database connection...")
     db = Database(config)
 
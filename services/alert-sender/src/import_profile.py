@@ -0,0 +1,129 @@
+"""In-process import-time profiler (like ``python -X importtime``, but logged).
+
+Enabled by setting IMPORT_PROFILE=1; main.py installs it before its own
+imports. Every module executed afterwards is timed, and ``report()`` logs a
+per-module breakdown of what was imported since the previous report, so the
+cold-start import cost and the imports deferred to the first message show
+up separately.
+"""
+
+import importlib.abc
+import os
+import sys
+import threading
+import time
+
+_finder = None
+
+
+class _TimedLoader:
+    """Wraps a module's loader to time its execution; everything else is delegated."""
+
+    def __init__(self, loader, finder: "_TimingFinder"):
+        self._loader = loader
+        self._finder = finder
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Hand the real loader back to the module before running it
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        module.__loader__ = self._loader
+        self._finder.start(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._finder.stop(module.__name__)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """First entry on sys.meta_path: finds specs with the other finders and times their loading."""
+
+    def __init__(self):
+        self.records: list[tuple[str, float, float]] = []  # (module, self_us, cumulative_us)
+        self._reported = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._local.finding = False
+
+    def start(self, name: str) -> None:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        self._local.stack.append([name, time.perf_counter(), 0.0])
+
+    def stop(self, name: str) -> None:
+        stack = self._local.stack
+        _, started, children = stack.pop()
+        cumulative = time.perf_counter() - started
+        if stack:
+            stack[-1][2] += cumulative
+        with self._lock:
+            self.records.append((name, (cumulative - children) * 1e6, cumulative * 1e6))
+
+    def take_new(self) -> list[tuple[str, float, float]]:
+        """Return the records added since the last call."""
+        with self._lock:
+            new = self.records[self._reported:]
+            self._reported = len(self.records)
+        return new
+
+
+def enabled() -> bool:
+    """Whether import profiling was requested with IMPORT_PROFILE."""
+    return os.environ.get("IMPORT_PROFILE", "").strip().lower() in ("1", "true", "yes")
+
+
+def install() -> None:
+    """Start timing imports (idempotent)."""
+    global _finder
+    if _finder is None:
+        _finder = _TimingFinder()
+        sys.meta_path.insert(0, _finder)
+
+
+def report(phase: str, logger, top: int | None = None) -> None:
+    """Log the per-module breakdown of imports since the previous report.
+
+    Args:
+        phase: Label for this group of imports (e.g. "startup", "first_message").
+        logger: Logger to write the breakdown to.
+        top: Number of modules to list, by cumulative time (IMPORT_PROFILE_TOP, default 40).
+    """
+    if _finder is None:
+        return
+    records = _finder.take_new()
+    if not records:
+        return
+    if top is None:
+        top = int(os.environ.get("IMPORT_PROFILE_TOP", "40"))
+
+    # Self times add up to the total time spent importing
+    total_us = sum(self_us for _, self_us, _ in records)
+    lines = [
+        f"Import profile [{phase}]: {len(records)} modules, {total_us / 1000:.1f}ms",
+        f"{'self_us':>10} | {'cumulative_us':>13} | module",
+    ]
+    for name, self_us, cumulative_us in sorted(records, key=lambda r: r[2], reverse=True)[:top]:
+        lines.append(f"{self_us:10.0f} | {cumulative_us:13.0f} | {name}")
+    logger.info("\n".join(lines))
@@ -0,0 +1,119 @@
+"""Digest emails are sent once per digest and logged to email_logs."""
+
+import base64
+import json
+
+import pytest
+from cloudevents.http import CloudEvent
+
+import main
+
+DIGEST = {
+    "digest_idx": 7,
+    "user_id": "user-1",
+    "user_email": "user@example.com",
+    "match_count": 5,
+    "matches": [
+        {"match_idx": 31, "alert_name": "Weller", "asset_idx": 501, "asset_name": "Weller 12 Year",
+         "asset_price": 40.0, "asset_url": "https://dev.baxpro.xyz/asset/501"},
+        {"match_idx": 30, "alert_name": "Stagg", "asset_idx": 502, "asset_name": "Stagg Jr",
+         "asset_price": None, "asset_url": "https://dev.baxpro.xyz/asset/502"},
+    ],
+}
+
+
+class _Session:
+    """Records the statements executed by ``log_email``."""
+
+    def __init__(self, executed: list):
+        self.executed = executed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params):
+        self.executed.append((str(statement), params))
+
+    def commit(self):
+        pass
+
+
+class _Database:
+    def __init__(self):
+        self.executed = []
+
+    def get_session(self):
+        return _Session(self.executed)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = _Database()
+    monkeypatch.setattr(main, "get_database", lambda: database)
+    return database
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    sent = []
+
+    def send_email(to_email, subject, html_content):
+        sent.append((to_email, subject, html_content))
+        return 202
+
+    monkeypatch.setattr(main, "_send_email", send_email)
+    return sent
+
+
+def _event(payload: dict) -> CloudEvent:
+    data = base64.b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+    return CloudEvent(
+        {"id": "digest-1", "type": "google.cloud.pubsub.topic.v1.messagePublished", "source": "test"},
+        {"message": {"data": data, "attributes": {"event_type": "baxus_listing_digest"}}},
+    )
+
+
+def _logged(database: _Database) -> list[dict]:
+    return [params for statement, params in database.executed if "INSERT INTO email_logs" in statement]
+
+
+def test_digest_is_sent_and_logged_with_its_first_match(database, sent):
+    main.send_alert(_event(DIGEST))
+
+    assert len(sent) == 1
+    to_email, subject, html_content = sent[0]
+    assert to_email == "user@example.com"
+    assert subject == "BaxPro Alerts: 5 new matches"
+    assert "Weller 12 Year" in html_content and "Stagg Jr" in html_content
+    assert "and 3 more" in html_content
+
+    [logged] = _logged(database)
+    # email_logs.asset_idx is NOT NULL
+    assert logged["asset_idx"] == 501
+    assert logged["match_idx"] == 31
+    assert logged["user_id"] == "user-1"
+    assert logged["response_code"] == 202
+
+
+def test_failed_digest_is_logged_and_raised(database, monkeypatch):
+    def send_email(to_email, subject, html_content):
+        raise RuntimeError("SendGrid unavailable")
+
+    monkeypatch.setattr(main, "_send_email", send_email)
+    with pytest.raises(RuntimeError):
+        main.send_digest(DIGEST)
+
+    [logged] = _logged(database)
+    assert logged["asset_idx"] == 501
+    assert logged["response_code"] is None
+
+
+@pytest.mark.parametrize("change", [{"user_email": None}, {"matches": []}])
+def test_digest_without_email_or_matches_is_skipped(database, sent, change):
+    main.send_digest({**DIGEST, **change})
+
+    assert sent == []
+    assert _logged(database) == []
@@ -14,6 +14,7 @@ from .utils.clean_asset_data import (
     update_if_changed,
 )
 from .utils.log import get_logger
+from .utils.normalize import normalize_text
 
 logger = get_logger()
 
@@ -164,6 +165,7 @@ class AssetRepository:
             asset_id=asset_data.get("token_asset_address"),
             baxus_idx=baxus_idx,
             name=asset_name,
+            name_normalized=normalize_text(asset_name),
             price=price,
             bottled_year=bottled_year,
             age=age,
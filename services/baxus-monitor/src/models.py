@@ -79,6 +79,7 @@ class AssetDetails(Base):
     asset_id = Column(CHAR(44), primary_key=False, nullable=False, index=True)
     baxus_idx = Column(Integer, primary_key=False, nullable=True)
     name = Column(Text, nullable=False)
+    name_normalized = Column(Text, nullable=True)
     price = Column(Float, nullable=True)
     bottled_year = Column(Integer, nullable=True)
     age = Column(Integer, nullable=True)
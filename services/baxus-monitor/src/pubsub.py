@@ -32,6 +32,7 @@ class PubSubPublisher:
         data_to_send = {'asset_idx': asset_data.asset_idx,
                         'asset_id': asset_data.asset_id,
                         'name': asset_data.name,
+                        'name_normalized': asset_data.name_normalized,
                         'price': asset_data.price,
                         'bottled_year': asset_data.bottled_year,
                         'age': asset_data.age
@@ -0,0 +1,38 @@
+"""Listing name normalization persisted on baxus.assets.name_normalized.
+
+Must stay identical to ``normalize_text`` in alert-processor's
+``src/normalize.py`` (its tests compare the two) and to the SQL
+``normalize_name()`` (migrations 0020 and 0023):
+alert-processor matches alert terms against the value sent in the listing
+payload without normalizing the name again.
+"""
+
+import re
+import unicodedata
+
+# Combining diacritical marks left behind by NFKD ("é" -> "e" + U+0301)
+_MARKS = re.compile("[\u0300-\u036f]+")
+
+# Straight and typographic apostrophes / single quotes, removed without a space
+_APOSTROPHES = str.maketrans("", "", "'‘’`´ʼ")
+
+# Runs of anything but letters and digits (``\W`` keeps ``_``, so it is listed too)
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize_text(value: str | None) -> str:
+    """Case-fold, accent-fold, drop apostrophes and collapse punctuation/whitespace to single spaces.
+
+    Args:
+        value: The listing name.
+
+    Returns:
+        str: The normalized name ("" for None or empty input).
+    """
+    if not value:
+        return ""
+    text = value.casefold()
+    if not text.isascii():
+        text = _MARKS.sub("", unicodedata.normalize("NFKD", text))
+    text = text.translate(_APOSTROPHES)
+    return _SEPARATORS.sub(" ", text).strip()
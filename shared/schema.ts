@@ -85,7 +85,9 @@ export const alertMatches = pgTable("alert_matches", {
   activityIdx: integer("activity_idx").notNull(),
   assetIdx: integer("asset_idx").notNull(),
   createdAt: timestamp("created_at").defaultNow().notNull(),
-});
+}, (table) => [
+  unique("alert_matches_alert_id_activity_idx_unique").on(table.alertId, table.activityIdx),
+]);
 
 export const emailLogs = pgTable("email_logs", {
   emailIdx: serial("email_idx").primaryKey(),
@@ -412,6 +412,19 @@ resource "google_pubsub_topic_iam_member" "baxpro_runner_pubsub_publisher" {
   ]
 }
 
+# Grant main Cloud Run service permission to publish alert create/edit events (for retroactive matching)
+resource "google_pubsub_topic_iam_member" "baxpro_runner_alert_changes_publisher" {
+  count  = var.enable_alert_processor && var.enable_baxus_monitor ? 1 : 0
+  topic  = google_pubsub_topic.alert_changes[0].name
+  role   = "roles/pubsub.publisher"
+  member = "serviceAccount:${google_service_account.baxpro_runner.email}"
+
+  depends_on = [
+    google_service_account.baxpro_runner,
+    google_pubsub_topic.alert_changes,
+  ]
+}
+
 # Secret access - use static secret names to allow imports
 locals {
   secret_names = concat([
@@ -615,6 +628,14 @@ resource "google_cloud_run_v2_service" "baxpro" {
           value = "alert-matches-${var.environment}"
         }
       }
+      # Pub/Sub topic for alert create/edit events, matched against listed assets by alert-processor
+      dynamic "env" {
+        for_each = var.enable_alert_processor && var.enable_baxus_monitor ? [1] : []
+        content {
+          name  = "PUBSUB_TOPIC_ALERT_CHANGES"
+          value = "alert-changes-${var.environment}"
+        }
+      }
 
       # Unix socket mount for fast private connection
       volume_mounts {
@@ -745,6 +766,18 @@ resource "google_pubsub_topic" "alert_matches" {
   name  = "alert-matches-${var.environment}"
 }
 
+# Created or edited alerts get published here, to be matched against listed assets
+resource "google_pubsub_topic" "alert_changes" {
+  count = var.enable_alert_processor && var.enable_baxus_monitor ? 1 : 0
+  name  = "alert-changes-${var.environment}"
+}
+
+# Cloud Scheduler publishes here every minute to send the due notification digests
+resource "google_pubsub_topic" "digest_flush" {
+  count = var.enable_alert_processor && var.enable_baxus_monitor && var.alert_notify_throttle ? 1 : 0
+  name  = "digest-flush-${var.environment}"
+}
+
 # Allow Pub/Sub service agent to create auth tokens for authenticated push
 resource "google_project_iam_member" "pubsub_token_creator" {
   count   = var.enable_alert_processor && var.enable_baxus_monitor ? 1 : 0
@@ -1041,17 +1074,28 @@ resource "google_cloudfunctions2_function" "alert_processor" {
     min_instance_count            = 0
     max_instance_count            = 10
     available_memory              = "512Mi"
+    available_cpu                 = var.alert_processor_cpu
     timeout_seconds               = 60
     service_account_email         = google_service_account.alert_processor[0].email
     ingress_settings              = "ALLOW_INTERNAL_ONLY"
     vpc_connector                 = google_vpc_access_connector.baxpro.id
     vpc_connector_egress_settings = "PRIVATE_RANGES_ONLY"
 
+    # Events served at once per instance; they share the alert cache, DB pool and publisher
+    max_instance_request_concurrency = var.alert_processor_concurrency
+
     environment_variables = {
       GCP_PROJECT_ID = var.project_id
       ENVIRONMENT    = var.environment
       PUBSUB_TOPIC   = google_pubsub_topic.alert_matches[0].name
       DB_HOST        = google_sql_database_instance.baxpro_db.private_ip_address
+
+      # One connection per concurrent event, no overflow: 10 instances x concurrency stays under max_connections
+      DB_POOL_SIZE    = tostring(var.alert_processor_concurrency)
+      DB_MAX_OVERFLOW = "0"
+
+      # Matches over a user's budget are held back for the digest-flush function to send
+      NOTIFY_THROTTLE = tostring(var.alert_notify_throttle)
     }
     secret_environment_variables {
       key        = "INSTANCE_UNIX_SOCKET"
@@ -1113,6 +1157,206 @@ resource "google_cloud_run_service_iam_member" "alert_processor_invoker" {
   member   = "serviceAccount:${google_service_account.alert_processor[0].email}"
 }
 
+# Same source as alert-processor, entry point for alert create/edit events
+resource "google_cloudfunctions2_function" "alert_rematch" {
+  count    = var.enable_alert_processor && var.enable_baxus_monitor ? 1 : 0
+  name     = "alert-rematch-${var.environment}"
+  location = var.region
+
+  build_config {
+    runtime     = "python311"
+    entry_point = "process_alert_change"
+    source {
+      storage_source {
+        bucket = "${var.project_id}-functions-source"
+        object = "alert-processor-${var.alert_processor_source_hash}.zip"
+      }
+    }
+  }
+
+  service_config {
+    min_instance_count            = 0
+    max_instance_count            = 5
+    available_memory              = "512Mi"
+    timeout_seconds               = 60
+    service_account_email         = google_service_account.alert_processor[0].email
+    ingress_settings              = "ALLOW_INTERNAL_ONLY"
+    vpc_connector                 = google_vpc_access_connector.baxpro.id
+    vpc_connector_egress_settings = "PRIVATE_RANGES_ONLY"
+
+    environment_variables = {
+      GCP_PROJECT_ID = var.project_id
+      ENVIRONMENT    = var.environment
+      PUBSUB_TOPIC   = google_pubsub_topic.alert_matches[0].name
+      DB_HOST        = google_sql_database_instance.baxpro_db.private_ip_address
+
+      # Same pool as alert_processor, so both functions together stay under max_connections
+      DB_POOL_SIZE    = tostring(var.alert_processor_concurrency)
+      DB_MAX_OVERFLOW = "0"
+    }
+    secret_environment_variables {
+      key        = "INSTANCE_UNIX_SOCKET"
+      project_id = var.project_id
+      secret     = google_secret_manager_secret.instance_unix_socket.secret_id
+      version    = "latest"
+    }
+    secret_environment_variables {
+      key        = "DB_USER"
+      project_id = var.project_id
+      secret     = google_secret_manager_secret.db_user.secret_id
+      version    = "latest"
+    }
+    secret_environment_variables {
+      key        = "DB_PASS"
+      project_id = var.project_id
+      secret     = google_secret_manager_secret.db_pass.secret_id
+      version    = "latest"
+    }
+    secret_environment_variables {
+      key        = "DB_NAME"
+      project_id = var.project_id
+      secret     = google_secret_manager_secret.db_name.secret_id
+      version    = "latest"
+    }
+  }
+
+  event_trigger {
+    trigger_region        = var.region
+    event_type            = "google.cloud.pubsub.topic.v1.messagePublished"
+    pubsub_topic          = google_pubsub_topic.alert_changes[0].id
+    retry_policy          = "RETRY_POLICY_RETRY"
+    service_account_email = google_service_account.alert_processor[0].email
+  }
+
+  depends_on = [
+    google_project_service.apis,
+    google_vpc_access_connector.baxpro,
+    google_secret_manager_secret_version.db_user,
+    google_secret_manager_secret_version.db_pass,
+    google_secret_manager_secret_version.db_name,
+    google_pubsub_topic.alert_changes,
+    google_project_iam_member.alert_processor_eventarc,
+    google_project_iam_member.pubsub_token_creator,
+  ]
+}
+
+resource "google_cloud_run_service_iam_member" "alert_rematch_invoker" {
+  count    = var.enable_alert_processor && var.enable_baxus_monitor ? 1 : 0
+  location = var.region
+  service  = google_cloudfunctions2_function.alert_rematch[0].name
+  role     = "roles/run.invoker"
+  member   = "serviceAccount:${google_service_account.alert_processor[0].email}"
+}
+
+# Same source as alert-processor, sends the notification digests whose window has passed
+resource "google_cloudfunctions2_function" "digest_flush" {
+  count    = var.enable_alert_processor && var.enable_baxus_monitor && var.alert_notify_throttle ? 1 : 0
+  name     = "digest-flush-${var.environment}"
+  location = var.region
+
+  build_config {
+    runtime     = "python311"
+    entry_point = "flush_digests"
+    source {
+      storage_source {
+        bucket = "${var.project_id}-functions-source"
+        object = "alert-processor-${var.alert_processor_source_hash}.zip"
+      }
+    }
+  }
+
+  service_config {
+    min_instance_count            = 0
+    max_instance_count            = 1
+    available_memory              = "512Mi"
+    timeout_seconds               = 60
+    service_account_email         = google_service_account.alert_processor[0].email
+    ingress_settings              = "ALLOW_INTERNAL_ONLY"
+    vpc_connector                 = google_vpc_access_connector.baxpro.id
+    vpc_connector_egress_settings = "PRIVATE_RANGES_ONLY"
+
+    environment_variables = {
+      GCP_PROJECT_ID  = var.project_id
+      ENVIRONMENT     = var.environment
+      PUBSUB_TOPIC    = google_pubsub_topic.alert_matches[0].name
+      DB_HOST         = google_sql_database_instance.baxpro_db.private_ip_address
+      NOTIFY_THROTTLE = tostring(var.alert_notify_throttle)
+
+      # One run at a time needs one connection
+      DB_POOL_SIZE    = "1"
+      DB_MAX_OVERFLOW = "0"
+    }
+    secret_environment_variables {
+      key        = "INSTANCE_UNIX_SOCKET"
+      project_id = var.project_id
+      secret     = google_secret_manager_secret.instance_unix_socket.secret_id
+      version    = "latest"
+    }
+    secret_environment_variables {
+      key        = "DB_USER"
+      project_id = var.project_id
+      secret     = google_secret_manager_secret.db_user.secret_id
+      version    = "latest"
+    }
+    secret_environment_variables {
+      key        = "DB_PASS"
+      project_id = var.project_id
+      secret     = google_secret_manager_secret.db_pass.secret_id
+      version    = "latest"
+    }
+    secret_environment_variables {
+      key        = "DB_NAME"
+      project_id = var.project_id
+      secret     = google_secret_manager_secret.db_name.secret_id
+      version    = "latest"
+    }
+  }
+
+  # A failed run is not retried; the next scheduled run claims the same digests
+  event_trigger {
+    trigger_region        = var.region
+    event_type            = "google.cloud.pubsub.topic.v1.messagePublished"
+    pubsub_topic          = google_pubsub_topic.digest_flush[0].id
+    retry_policy          = "RETRY_POLICY_DO_NOT_RETRY"
+    service_account_email = google_service_account.alert_processor[0].email
+  }
+
+  depends_on = [
+    google_project_service.apis,
+    google_vpc_access_connector.baxpro,
+    google_secret_manager_secret_version.db_user,
+    google_secret_manager_secret_version.db_pass,
+    google_secret_manager_secret_version.db_name,
+    google_pubsub_topic.alert_matches,
+    google_pubsub_topic.digest_flush,
+    google_project_iam_member.alert_processor_eventarc,
+    google_project_iam_member.pubsub_token_creator,
+  ]
+}
+
+resource "google_cloud_run_service_iam_member" "digest_flush_invoker" {
+  count    = var.enable_alert_processor && var.enable_baxus_monitor && var.alert_notify_throttle ? 1 : 0
+  location = var.region
+  service  = google_cloudfunctions2_function.digest_flush[0].name
+  role     = "roles/run.invoker"
+  member   = "serviceAccount:${google_service_account.alert_processor[0].email}"
+}
+
+resource "google_cloud_scheduler_job" "digest_flush" {
+  count     = var.enable_alert_processor && var.enable_baxus_monitor && var.alert_notify_throttle ? 1 : 0
+  name      = "digest-flush-${var.environment}"
+  region    = var.region
+  schedule  = "* * * * *"
+  time_zone = "UTC"
+
+  pubsub_target {
+    topic_name = google_pubsub_topic.digest_flush[0].id
+    data       = base64encode("{}")
+  }
+
+  depends_on = [google_cloudfunctions2_function.digest_flush]
+}
+
 # ============================================================================
 # ALERT SENDER - Cloud Function 2nd Gen (Pub/Sub triggered)
 # ============================================================================
@@ -130,6 +130,24 @@ variable "alert_processor_source_hash" {
   default     = "latest"
 }
 
+variable "alert_processor_concurrency" {
+  description = "Concurrent events served by one Alert Processor instance (also its DB pool size; keep instances x concurrency under Cloud SQL max_connections)"
+  type        = number
+  default     = 4
+}
+
+variable "alert_processor_cpu" {
+  description = "vCPUs per Alert Processor instance (at least 1 when concurrency is above 1)"
+  type        = string
+  default     = "1"
+}
+
+variable "alert_notify_throttle" {
+  description = "Throttle match notifications per user (NOTIFY_THROTTLE) and deploy the scheduled digest flush"
+  type        = bool
+  default     = false
+}
+
 variable "alert_sender_source_hash" {
   description = "Hash of Alert Sender source code to force redeployment on changes"
   type        = string